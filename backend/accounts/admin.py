@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import OutboundEmail, User
 
 # --- Custom User Admin ---
 class UserAdmin(BaseUserAdmin):
@@ -24,3 +24,13 @@ class UserAdmin(BaseUserAdmin):
 
 # --- Register User only ---
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    # May hold password reset links
+    exclude = ('body', 'html_body')
@@ -0,0 +1,135 @@
+# accounts/google_auth.py - Google ID token verification against cached certs
+"""
+``id_token.verify_oauth2_token`` downloads Google's signing certificates on
+every call. Here they are fetched through one pooled HTTP session, kept
+for as long as the response's ``Cache-Control: max-age`` allows, and the
+token signature is checked locally against them.
+
+The certificates are refetched early only when a token names a key id we
+don't have (Google rotated its keys), and at most once a minute. If
+Google can't be reached, the last certificates we had keep working and the
+refetch is retried after a short backoff, not on every login.
+"""
+import logging
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from google.auth import jwt
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+# Used when the certificate response has no max-age
+DEFAULT_MAX_AGE = 3600
+# Unknown key ids can't trigger refetches more often than this
+MIN_REFRESH_SECONDS = 60
+# After a failed refresh, cached certificates are used without retrying for this long
+FAILURE_BACKOFF_SECONDS = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class CertificateFetchError(Exception):
+    pass
+
+
+def get_session():
+    """Shared HTTP session, so connections to Google are reused"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_maxsize=10,
+                    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504)),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def parse_max_age(cache_control):
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+class CertCache:
+    """Google's certificates ({key id: PEM}) for one URL, thread-safe"""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.certs = None
+        self.expires_at = 0.0
+        self.fetched_at = 0.0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _usable(self, kid, now):
+        if self.certs is None:
+            return False
+        if now < self.retry_at:
+            # The last refresh failed; don't queue logins behind another attempt yet
+            return True
+        if kid is not None and kid not in self.certs:
+            # Likely a key rotation, but don't let bogus key ids hammer Google
+            return now < self.expires_at and now - self.fetched_at < MIN_REFRESH_SECONDS
+        return now < self.expires_at
+
+    def get(self, kid=None):
+        if self._usable(kid, time.monotonic()):
+            return self.certs
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._usable(kid, time.monotonic()):
+                return self.certs
+            try:
+                self.refresh()
+            except (requests.RequestException, ValueError) as e:
+                if self.certs is None:
+                    raise CertificateFetchError(f'Could not fetch Google certificates: {e}')
+                self.retry_at = time.monotonic() + FAILURE_BACKOFF_SECONDS
+                logger.warning(f"Using cached Google certificates; refresh failed: {e}")
+            return self.certs
+
+    def refresh(self):
+        response = get_session().get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        certs = response.json()
+        now = time.monotonic()
+        self.certs = certs
+        self.fetched_at = now
+        self.expires_at = now + parse_max_age(response.headers.get('Cache-Control'))
+
+
+_caches = {}
+
+
+def get_cert_cache():
+    url = settings.GOOGLE_CERTS_URL
+    if url not in _caches:
+        _caches[url] = CertCache(url, getattr(settings, 'GOOGLE_CERTS_TIMEOUT', 5))
+    return _caches[url]
+
+
+def verify_google_id_token(token, audience=None, clock_skew_in_seconds=0):
+    """Verify a Google ID token and return its claims; raises ValueError if invalid"""
+    if isinstance(token, bytes):
+        token = token.decode('utf-8')
+    kid = jwt.decode_header(token).get('kid')
+    certs = get_cert_cache().get(kid)
+    idinfo = jwt.decode(
+        token, certs=certs, audience=audience, clock_skew_in_seconds=clock_skew_in_seconds
+    )
+    if idinfo.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+    return idinfo
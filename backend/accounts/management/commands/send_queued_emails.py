@@ -0,0 +1,32 @@
+from django.utils import timezone
+
+from accounts.models import OutboundEmail
+from accounts.outbox import send_batch
+from product.queues import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = (
+        'Deliver queued emails from the outbox over a reused SMTP connection, '
+        'retrying failures with backoff. Drains the due queue once, or keeps '
+        'polling with --loop.'
+    )
+    batch_size = 100
+    interval = 5.0
+    throughput_keys = ('sent',)
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help='Attempts before an email is marked failed '
+                                 '(default: EMAIL_OUTBOX_MAX_ATTEMPTS)')
+
+    def process_batch(self, options):
+        return send_batch(options['batch_size'], options['max_attempts'])
+
+    def backlog(self):
+        pending = OutboundEmail.objects.filter(status='pending')
+        return {
+            'pending': pending.count(),
+            'due': pending.filter(next_attempt_at__lte=timezone.now()).count(),
+        }
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_sent_bodies(apps, schema_editor):
+    # Sent emails no longer keep their bodies (they may hold reset links)
+    OutboundEmail = apps.get_model('accounts', 'OutboundEmail')
+    OutboundEmail.objects.filter(status='sent').update(body='', html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
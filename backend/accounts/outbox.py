@@ -0,0 +1,118 @@
+# accounts/outbox.py - DB-backed outbox for outgoing email
+"""
+Requests never talk to SMTP. They call ``enqueue_email``, which is one
+INSERT, and the ``send_queued_emails`` worker delivers the queue.
+
+The worker claims a batch of due emails (see ``product.queues.claim``),
+opens one SMTP connection for the whole batch and sends every
+message over it. Messages go one ``send_messages`` call at a time on that
+open connection so each failure is attributed to its own email. Failed
+emails are retried with exponential backoff until
+``EMAIL_OUTBOX_MAX_ATTEMPTS``, then marked failed.
+
+Bodies can carry secrets (password reset links), so a sent email keeps
+only its envelope: ``body`` and ``html_body`` are cleared when it is sent,
+and the admin never shows them.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from product.queues import claim
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Lease on a claimed batch; sending it over one connection takes seconds
+CLAIM_SECONDS = 300
+
+
+def enqueue_email(subject, body, to, from_email=None, html_body=''):
+    """Queue an email for the worker; returns the OutboundEmail"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 60)
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.to, connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, error, now, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= max_attempts:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def send_batch(batch_size=100, max_attempts=None, connection=None):
+    """Send one batch of due emails; returns metrics for the batch"""
+    max_attempts = max_attempts or getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    stats = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'seconds': 0.0}
+    started = time.monotonic()
+    batch, _ = claim(
+        OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=timezone.now()),
+        batch_size, CLAIM_SECONDS, order_by=('next_attempt_at',)
+    )
+    stats['claimed'] = len(batch)
+    if not batch:
+        return stats
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # SMTP is unreachable: nothing was sent, so every email gets a retry
+        logger.warning(f"Outbox: could not connect to the mail server: {e}")
+        now = timezone.now()
+        for email in batch:
+            _record_failure(email, e, now, max_attempts)
+    else:
+        try:
+            for email in batch:
+                try:
+                    connection.send_messages([_message(email, connection)])
+                except Exception as e:
+                    _record_failure(email, e, timezone.now(), max_attempts)
+                else:
+                    email.status = 'sent'
+                    email.body = email.html_body = ''
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        batch, ['status', 'body', 'html_body', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+    )
+    for email in batch:
+        if email.status == 'sent':
+            stats['sent'] += 1
+        elif email.status == 'failed':
+            stats['failed'] += 1
+        else:
+            stats['retrying'] += 1
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
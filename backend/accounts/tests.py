@@ -1,3 +1,257 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from google.auth import crypt, jwt
+from rest_framework.test import APIClient
+
+from product.models import Cart, CartItem, Category, Product
+
+from . import google_auth
+from .models import OutboundEmail
+from .outbox import enqueue_email, send_batch
+
+User = get_user_model()
+
+
+class LoginCartMergeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email='guest@example.com', username='guest', password=make_password('secret-pass')
+        )
+        category = Category.objects.create(name='Tees')
+        self.products = [
+            Product.objects.create(
+                name=f'Tee {i}', category=category, price=100, description='Tee', stock=5
+            )
+            for i in range(2)
+        ]
+        self.client = APIClient()
+
+    def test_login_merges_guest_cart_into_user_cart(self):
+        for product in self.products:
+            response = self.client.post(
+                '/api/cart/add_item/', {'product_id': product.pk, 'quantity': 2}, format='json'
+            )
+            self.assertEqual(response.status_code, 201)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=2)
+
+        response = self.client.post(
+            '/api/accounts/login/', {'email': 'guest@example.com', 'password': 'secret-pass'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Cart.objects.filter(user__isnull=True).exists())
+        self.assertEqual(
+            dict(cart.items.values_list('product_id', 'quantity')),
+            {self.products[0].pk: 4, self.products[1].pk: 2}
+        )
+
+
+class FlakyConnection:
+    """Mail connection whose sends fail for chosen recipients"""
+    def __init__(self, failing):
+        self.failing = failing
+        self.sent = []
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.failing:
+                raise OSError('mailbox unavailable')
+            self.sent.append(message)
+        return len(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def test_forgot_password_enqueues_instead_of_sending(self):
+        User.objects.create(email='forgot@example.com', username='forgot')
+        response = APIClient().post(
+            '/api/accounts/forgot-password/', {'email': 'forgot@example.com'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, 'pending')
+
+        call_command('send_queued_emails', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('/reset-password/', mail.outbox[0].body)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, 'sent')
+        # The reset link is not kept once it has been delivered
+        self.assertEqual((email.body, email.html_body), ('', ''))
+
+    def test_failures_are_retried_with_backoff_then_marked_failed(self):
+        ok = enqueue_email('Hi', 'Body', ['ok@example.com'])
+        bad = enqueue_email('Hi', 'Body', ['bad@example.com'])
+        connection = FlakyConnection({'bad@example.com'})
+
+        stats = send_batch(max_attempts=2, connection=connection)
+        self.assertEqual((stats['sent'], stats['retrying']), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, 'pending')
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+
+        # Not due yet, so nothing is claimed
+        self.assertEqual(send_batch(max_attempts=2, connection=connection)['claimed'], 0)
+
+        OutboundEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_batch(max_attempts=2, connection=connection)['failed'], 1)
+        bad.refresh_from_db()
+        ok.refresh_from_db()
+        self.assertEqual((ok.status, bad.status, bad.attempts), ('sent', 'failed', 2))
+        self.assertEqual(len(connection.sent), 1)
+
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+except ImportError:  # pragma: no cover
+    x509 = None
+
+
+def make_signing_key(kid):
+    """An RSA signer and its self-signed certificate, like one of Google's keys"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.now(dt_timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=kid)
+    return signer, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class StandInKeyServer:
+    """Local HTTP server that serves certificates the way Google's endpoint does"""
+
+    def __init__(self, max_age=3600):
+        self.certs = {}
+        self.max_age = max_age
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                body = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={server.max_age}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/oauth2/v1/certs'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def add_key(self, kid):
+        signer, cert = make_signing_key(kid)
+        self.certs[kid] = cert
+        return signer
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@unittest.skipIf(x509 is None, 'cryptography is needed to mint test certificates')
+class GoogleLoginTests(TestCase):
+    CLIENT_ID = 'test-client.apps.googleusercontent.com'
+
+    def setUp(self):
+        self.server = StandInKeyServer()
+        self.addCleanup(self.server.stop)
+        self.signer = self.server.add_key('key-1')
+        google_auth._caches.clear()
+        self.settings = override_settings(
+            GOOGLE_CERTS_URL=self.server.url, GOOGLE_CLIENT_ID=self.CLIENT_ID
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def token(self, signer=None, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': self.CLIENT_ID,
+            'iat': now, 'exp': now + 600, 'sub': '1234',
+            'email': 'google@example.com', 'given_name': 'Goo', **claims
+        }
+        return jwt.encode(signer or self.signer, payload).decode()
+
+    def login(self, token):
+        return APIClient().post('/api/accounts/google-login/', {'token': token}, format='json')
+
+    def test_certificates_are_fetched_once_per_max_age(self):
+        self.assertEqual(self.login(self.token()).status_code, 200)
+        self.assertEqual(self.login(self.token()).status_code, 200)
+        self.assertEqual(self.server.hits, 1)
+        self.assertTrue(User.objects.get(email='google@example.com').is_google_user)
+
+    def test_rejects_bad_audience_and_issuer(self):
+        self.assertEqual(self.login(self.token(aud='someone-else')).status_code, 400)
+        self.assertEqual(self.login(self.token(iss='https://evil.example')).status_code, 400)
+
+    def test_rotated_key_triggers_a_rate_limited_refetch(self):
+        self.login(self.token())
+        rotated = self.server.add_key('key-2')
+        # Unknown key ids right after a fetch don't hit Google again
+        self.assertEqual(self.login(self.token(signer=rotated)).status_code, 400)
+        self.assertEqual(self.server.hits, 1)
+
+        google_auth.get_cert_cache().fetched_at -= google_auth.MIN_REFRESH_SECONDS
+        self.assertEqual(self.login(self.token(signer=rotated)).status_code, 200)
+        self.assertEqual(self.server.hits, 2)
+
+    def test_expired_cache_still_verifies_when_google_is_unreachable(self):
+        self.login(self.token())
+        google_auth.get_cert_cache().expires_at = 0
+        self.server.stop()
+        self.assertEqual(self.login(self.token()).status_code, 200)
+
+    def test_failed_refresh_backs_off(self):
+        self.login(self.token())
+        cache = google_auth.get_cert_cache()
+        cache.expires_at = 0
+        with mock.patch.object(
+            google_auth.CertCache, 'refresh', side_effect=requests.ConnectionError('down')
+        ) as refresh:
+            self.assertEqual(self.login(self.token()).status_code, 200)
+            self.assertEqual(self.login(self.token()).status_code, 200)
+        self.assertEqual(refresh.call_count, 1)
+
+        cache.retry_at = 0
+        self.assertEqual(self.login(self.token()).status_code, 200)
+        self.assertEqual(self.server.hits, 2)
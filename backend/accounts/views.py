@@ -6,15 +6,17 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
 from django.template.loader import render_to_string
 
+from product.cart_operations import merge_guest_cart
+
+from .google_auth import verify_google_id_token
+from .outbox import enqueue_email
+
 User = get_user_model()
 
 
@@ -108,6 +110,9 @@ class LoginView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
         
         try:
+            # Carry over whatever was added to the cart before logging in
+            merge_guest_cart(request.session.session_key, user)
+            
             refresh = RefreshToken.for_user(user)
             
             return Response({
@@ -146,9 +151,9 @@ class GoogleLoginView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
+            # Checked against cached Google certificates; no fetch per login
+            idinfo = verify_google_id_token(
+                token,
                 getattr(settings, 'GOOGLE_CLIENT_ID', None)
             )
             
@@ -166,6 +171,9 @@ class GoogleLoginView(APIView):
                 }
             )
             
+            # Carry over whatever was added to the cart before logging in
+            merge_guest_cart(request.session.session_key, user)
+            
             refresh = RefreshToken.for_user(user)
             
             return Response({
@@ -320,13 +328,8 @@ WhatYouWear Team
         """
         
         try:
-            result = send_mail(
-                subject,
-                message,
-                settings.EMAIL_HOST_USER,
-                [email],
-                fail_silently=False,
-            )
+            # Delivered by the send_queued_emails worker, not in the request
+            enqueue_email(subject, message, [email], from_email=settings.EMAIL_HOST_USER)
             
             return Response({
                 'success': True,
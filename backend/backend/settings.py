@@ -110,6 +110,47 @@ DATABASES = {
     )
 }
 
+# ========================
+# Caching
+# ========================
+# Local memory by default; set CACHE_DIR for a file-based cache shared by all
+# workers on one host, or REDIS_URL for a shared Redis cache.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+elif os.getenv("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "whatyouwear",
+        }
+    }
+
+# Anonymous-safe catalog responses (categories, products). Writes invalidate
+# them by bumping a version key in this cache, so it has to be shared by every
+# process (Redis or file based). LocMemCache is per process: a bump from one
+# gunicorn worker or a management command never reaches the other workers,
+# which would keep serving stale lists and 304s until the timeout. Caching is
+# therefore off with locmem unless CATALOG_CACHE_ENABLED=true forces it
+# (single-process development servers).
+CATALOG_CACHE_ALIAS = "default"
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+CATALOG_CACHE_ENABLED = os.getenv(
+    "CATALOG_CACHE_ENABLED",
+    "false" if "locmem" in CACHES[CATALOG_CACHE_ALIAS]["BACKEND"] else "true",
+).lower() == "true"
+
 # ========================
 # Password Validation
 # ========================
@@ -137,6 +178,16 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Public origin uploaded media is served from, e.g. a CDN
+# ("https://cdn.example.com"); empty uses the host of each request
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "").rstrip("/")
+# Derivatives of uploaded product images (product/images.py): widths in
+# pixels, formats (jpeg, webp, avif; ones this Pillow build cannot encode
+# are skipped), encoder quality, and worker processes (0 renders inline)
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024").split(",")]
+IMAGE_VARIANT_FORMATS = os.getenv("IMAGE_VARIANT_FORMATS", "jpeg,webp,avif").split(",")
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -239,6 +290,9 @@ GOOGLE_CLIENT_ID = os.getenv(
     "GOOGLE_CLIENT_ID",
     "323225275507-dnjb6ok6iv5u153c8nteu8ral51pnj13.apps.googleusercontent.com",
 )
+# Google's ID-token signing certificates; cached for their Cache-Control max-age
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_CERTS_TIMEOUT = float(os.getenv("GOOGLE_CERTS_TIMEOUT", "5"))
 
 # ========================
 # Logging
@@ -263,6 +317,36 @@ logger = logging.getLogger(__name__)
 key_type = "TEST" if "test" in RAZORPAY_KEY_ID else "LIVE"
 logger.info(f"🔐 Using Razorpay {key_type} keys: {RAZORPAY_KEY_ID[:15]}...")
 
+# Payment gateway adapter (payment/gateway.py). "fake" runs an in-process
+# stand-in for tests, benchmarks and local development.
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "razorpay")
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", "3.05"))
+RAZORPAY_READ_TIMEOUT = float(os.getenv("RAZORPAY_READ_TIMEOUT", "10"))
+RAZORPAY_MAX_RETRIES = int(os.getenv("RAZORPAY_MAX_RETRIES", "2"))
+# Consecutive failures that open the circuit, and seconds before it is retried
+RAZORPAY_BREAKER_THRESHOLD = int(os.getenv("RAZORPAY_BREAKER_THRESHOLD", "5"))
+RAZORPAY_BREAKER_COOLDOWN = float(os.getenv("RAZORPAY_BREAKER_COOLDOWN", "30"))
+
+# Secret configured on the Razorpay dashboard webhook; deliveries signed
+# with anything else are rejected
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+# process_webhook_events: attempts before an event that matches no order is
+# ignored (the order may not exist yet), and base retry delay in seconds
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_RETRY_SECONDS = int(os.getenv("WEBHOOK_RETRY_SECONDS", "60"))
+
+# process_refunds: gateway refund calls per second (Razorpay rate-limits
+# the API), attempts before a refund is left for staff, base retry delay
+REFUND_RATE_PER_SECOND = float(os.getenv("REFUND_RATE_PER_SECOND", "5"))
+REFUND_MAX_ATTEMPTS = int(os.getenv("REFUND_MAX_ATTEMPTS", "5"))
+REFUND_RETRY_SECONDS = int(os.getenv("REFUND_RETRY_SECONDS", "300"))
+
+# Minutes a pending Razorpay checkout holds its stock before it is released
+STOCK_RESERVATION_MINUTES = int(os.getenv("STOCK_RESERVATION_MINUTES", "15"))
+
+# Hours a stored Idempotency-Key response is replayed for retried requests
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
 # ========================
 # Email Configuration (Hostinger) - FIXED VERSION
 # ========================
@@ -278,6 +362,11 @@ FRONTEND_URL = os.getenv('FRONTEND_URL', 'https://www.whatyouwear.store')
 PASSWORD_RESET_TIMEOUT = 86400
 EMAIL_TIMEOUT = 30
 
+# Outbox worker (send_queued_emails): attempts per email and the first retry
+# delay, doubled after every failed attempt
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', '60'))
+
 # For development/testing - uncomment to print emails to console instead of sending
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import WebhookEvent
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'event_id', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event')
+    search_fields = ('event_id',)
+    readonly_fields = ('event_id', 'event', 'payload', 'received_at', 'processed_at', 'last_error')
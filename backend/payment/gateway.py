@@ -0,0 +1,371 @@
+# payment/gateway.py - The one way the app talks to Razorpay
+"""
+Every Razorpay call goes through ``get_gateway()``:
+
+* one pooled HTTP session with explicit connect/read timeouts, so a slow
+  gateway can't hold a worker for longer than the timeout;
+* bounded retries: reads are retried on transport and 5xx errors, writes
+  (creating orders, refunds) only when the connection was never made;
+* a circuit breaker: after ``RAZORPAY_BREAKER_THRESHOLD`` consecutive
+  failures calls fail fast with ``GatewayUnavailable`` for
+  ``RAZORPAY_BREAKER_COOLDOWN`` seconds, then one trial call is let through;
+* latency and error metrics per operation (``gateway.metrics.snapshot()``).
+
+``PAYMENT_GATEWAY = "fake"`` swaps in ``FakeGateway``, an in-process
+stand-in with the same interface for tests and benchmarks.
+"""
+import hashlib
+import hmac
+import itertools
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Calls slower than this are logged
+SLOW_CALL_SECONDS = 2.0
+
+
+class PaymentGatewayError(Exception):
+    """The gateway rejected the request (4xx); retrying won't help"""
+
+
+class GatewayUnavailable(PaymentGatewayError):
+    """The gateway is down, timing out, or the circuit is open"""
+
+
+def compute_signature(secret, message):
+    if isinstance(message, str):
+        message = message.encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class GatewayMetrics:
+    """Per-operation call counts, errors and recent latencies"""
+
+    WINDOW = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._latencies = defaultdict(lambda: deque(maxlen=self.WINDOW))
+
+    def record(self, operation, seconds, ok):
+        with self._lock:
+            self._calls[operation] += 1
+            if not ok:
+                self._errors[operation] += 1
+            self._latencies[operation].append(seconds * 1000)
+        if seconds > SLOW_CALL_SECONDS:
+            logger.warning(f"Payment gateway {operation} took {seconds:.2f}s")
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                report[operation] = {
+                    'calls': self._calls[operation],
+                    'errors': self._errors[operation],
+                    'p50_ms': round(statistics.median(ordered), 2),
+                    'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 2),
+                    'max_ms': round(ordered[-1], 2),
+                }
+            return report
+
+
+class CircuitBreaker:
+    """Fail fast after repeated gateway failures instead of piling up workers"""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half_open' and self._trial_running):
+                raise GatewayUnavailable('Payment gateway is unavailable, please try again shortly')
+            if state == 'half_open':
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.error(f"Payment gateway circuit opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class BaseGateway:
+    # Longest one request can take before timing out (connect + read)
+    request_timeout = 0
+
+    def __init__(self, key_id, key_secret, breaker=None):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.breaker = breaker or CircuitBreaker(
+            getattr(settings, 'RAZORPAY_BREAKER_THRESHOLD', 5),
+            getattr(settings, 'RAZORPAY_BREAKER_COOLDOWN', 30),
+        )
+        self.metrics = GatewayMetrics()
+        self.max_retries = getattr(settings, 'RAZORPAY_MAX_RETRIES', 2)
+
+    # Subclasses implement _create_order, _fetch_order, _fetch_payment, _fetch_refunds, _refund
+
+    def max_call_seconds(self):
+        """Upper bound on one call, retries and their backoff included"""
+        return (self.max_retries + 1) * (self.request_timeout + 1)
+
+    def create_order(self, amount, currency='INR', receipt=None, notes=None):
+        """Create a gateway order for ``amount`` in the smallest currency unit (paise)"""
+        data = {'amount': int(amount), 'currency': currency, 'payment_capture': 1}
+        if receipt:
+            data['receipt'] = receipt
+        if notes:
+            data['notes'] = notes
+        return self.call('order.create', self._create_order, data, idempotent=False)
+
+    def fetch_order(self, order_id):
+        return self.call('order.fetch', self._fetch_order, order_id, idempotent=True)
+
+    def fetch_payment(self, payment_id):
+        return self.call('payment.fetch', self._fetch_payment, payment_id, idempotent=True)
+
+    def fetch_refunds(self, payment_id):
+        """The payment's refunds, as a collection with ``items``"""
+        return self.call('payment.refunds', self._fetch_refunds, payment_id, idempotent=True)
+
+    def refund_payment(self, payment_id, amount=None, notes=None):
+        """Refund a captured payment, in full unless ``amount`` (paise) is given"""
+        data = {}
+        if amount is not None:
+            data['amount'] = int(amount)
+        if notes:
+            data['notes'] = notes
+        return self.call('payment.refund', self._refund, payment_id, data, idempotent=False)
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        """Check the checkout signature locally; no network call"""
+        expected = compute_signature(self.key_secret, f'{order_id}|{payment_id}')
+        return hmac.compare_digest(expected, signature or '')
+
+    def call(self, operation, func, *args, idempotent):
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            started = time.monotonic()
+            try:
+                result = func(*args)
+            except razorpay.errors.BadRequestError as e:
+                # The gateway answered; it just didn't like the request
+                self.breaker.record_success()
+                self.metrics.record(operation, time.monotonic() - started, ok=False)
+                raise PaymentGatewayError(str(e)) from e
+            except (requests.RequestException, razorpay.errors.ServerError,
+                    razorpay.errors.GatewayError) as e:
+                self.breaker.record_failure()
+                self.metrics.record(operation, time.monotonic() - started, ok=False)
+                # Writes are only retried when the request never reached the gateway
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if retryable and attempt <= self.max_retries:
+                    time.sleep(min(0.1 * 2 ** (attempt - 1), 1.0))
+                    continue
+                raise GatewayUnavailable(f'Payment gateway {operation} failed: {e}') from e
+            self.breaker.record_success()
+            self.metrics.record(operation, time.monotonic() - started, ok=True)
+            return result
+
+
+class RazorpayGateway(BaseGateway):
+    def __init__(self, key_id, key_secret, connect_timeout=3.05, read_timeout=10, **kwargs):
+        super().__init__(key_id, key_secret, **kwargs)
+        self.request_timeout = connect_timeout + read_timeout
+        session = TimeoutSession((connect_timeout, read_timeout))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=20)
+        session.mount('https://', adapter)
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret))
+
+    def _create_order(self, data):
+        return self.client.order.create(data)
+
+    def _fetch_order(self, order_id):
+        return self.client.order.fetch(order_id)
+
+    def _fetch_payment(self, payment_id):
+        return self.client.payment.fetch(payment_id)
+
+    def _fetch_refunds(self, payment_id):
+        return self.client.payment.fetch_multiple_refund(payment_id)
+
+    def _refund(self, payment_id, data):
+        return self.client.payment.refund(payment_id, data)
+
+
+class FakeGateway(BaseGateway):
+    """In-process Razorpay stand-in with the same interface.
+
+    ``pay(order_id)`` simulates the customer completing checkout and
+    returns the payment id and signature the frontend would post to the
+    verify endpoint. ``fail_next(n)`` makes the next n calls fail like an
+    unreachable gateway, and ``latency`` adds a delay to every call.
+    Refunds come back with ``refund_status`` ('processed' or 'pending').
+    """
+
+    def __init__(self, key_id='rzp_test_fake', key_secret='fake_secret', latency=0.0,
+                 refund_status='processed', **kwargs):
+        super().__init__(key_id, key_secret, **kwargs)
+        self.latency = latency
+        self.request_timeout = latency
+        self.refund_status = refund_status
+        self.orders = {}
+        self.payments = {}
+        self.refunds = []
+        self._ids = itertools.count(1)
+        self._failures = 0
+        self._failure = requests.ConnectionError
+        self._lock = threading.Lock()
+
+    def fail_next(self, count=1, error=requests.ConnectionError):
+        self._failures = count
+        self._failure = error
+
+    def _simulate(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._failures:
+                self._failures -= 1
+                raise self._failure('Fake gateway failure')
+
+    def _next_id(self, prefix):
+        return f'{prefix}_fake{next(self._ids):010d}'
+
+    def _lookup(self, store, key):
+        if key not in store:
+            raise razorpay.errors.BadRequestError(f'The id provided does not exist: {key}')
+        return store[key]
+
+    def _create_order(self, data):
+        self._simulate()
+        order = {
+            'id': self._next_id('order'), 'entity': 'order', 'status': 'created',
+            'amount': data['amount'], 'amount_paid': 0, 'currency': data['currency'],
+            'receipt': data.get('receipt'), 'notes': data.get('notes', {}),
+        }
+        self.orders[order['id']] = order
+        return order
+
+    def _fetch_order(self, order_id):
+        self._simulate()
+        return self._lookup(self.orders, order_id)
+
+    def _fetch_payment(self, payment_id):
+        self._simulate()
+        return self._lookup(self.payments, payment_id)
+
+    def _fetch_refunds(self, payment_id):
+        self._simulate()
+        self._lookup(self.payments, payment_id)
+        items = [refund for refund in self.refunds if refund['payment_id'] == payment_id]
+        return {'entity': 'collection', 'count': len(items), 'items': items}
+
+    def _refund(self, payment_id, data):
+        self._simulate()
+        payment = self._lookup(self.payments, payment_id)
+        refunded = sum(r['amount'] for r in self.refunds if r['payment_id'] == payment_id)
+        if refunded >= payment['amount']:
+            raise razorpay.errors.BadRequestError('The payment has been fully refunded already')
+        refund = {
+            'id': self._next_id('rfnd'), 'entity': 'refund', 'payment_id': payment_id,
+            'amount': data.get('amount', payment['amount']), 'status': self.refund_status,
+            'notes': data.get('notes', {}),
+        }
+        self.refunds.append(refund)
+        return refund
+
+    def pay(self, order_id, method='upi'):
+        order = self.orders[order_id]
+        payment_id = self._next_id('pay')
+        self.payments[payment_id] = {
+            'id': payment_id, 'entity': 'payment', 'order_id': order_id,
+            'amount': order['amount'], 'currency': order['currency'],
+            'status': 'captured', 'method': method,
+        }
+        order['status'] = 'paid'
+        order['amount_paid'] = order['amount']
+        signature = compute_signature(self.key_secret, f'{order_id}|{payment_id}')
+        return payment_id, signature
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def build_gateway():
+    if getattr(settings, 'PAYMENT_GATEWAY', 'razorpay') == 'fake':
+        return FakeGateway(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+    return RazorpayGateway(
+        settings.RAZORPAY_KEY_ID,
+        settings.RAZORPAY_KEY_SECRET,
+        connect_timeout=getattr(settings, 'RAZORPAY_CONNECT_TIMEOUT', 3.05),
+        read_timeout=getattr(settings, 'RAZORPAY_READ_TIMEOUT', 10),
+    )
+
+
+def get_gateway():
+    """The process-wide gateway; built on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = build_gateway()
+    return _gateway
+
+
+def set_gateway(gateway):
+    """Replace the process-wide gateway (tests, benchmarks); None rebuilds it"""
+    global _gateway
+    _gateway = gateway
@@ -0,0 +1,39 @@
+from django.conf import settings
+
+from payment.gateway import get_gateway
+from payment.refunds import RateLimiter, backlog, process_batch
+from product.queues import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = (
+        'Send the refunds of REFUND_PENDING orders to Razorpay in rate-limited '
+        'batches and print throughput and backlog metrics. Drains the due queue '
+        'once, or keeps polling with --loop.'
+    )
+    batch_size = 50
+    interval = 30.0
+    throughput_keys = ('refunded', 'submitted')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Refund calls per second (default: REFUND_RATE_PER_SECOND)')
+
+    def handle(self, *args, **options):
+        self.gateway = get_gateway()
+        self.limiter = RateLimiter(options['rate'] or getattr(settings, 'REFUND_RATE_PER_SECOND', 5))
+        super().handle(*args, **options)
+
+    def process_batch(self, options):
+        return process_batch(options['batch_size'], gateway=self.gateway, limiter=self.limiter)
+
+    def stop_draining(self, stats):
+        # The circuit opened; wait for the next poll instead of spinning
+        return bool(stats['deferred'])
+
+    def backlog(self):
+        return {
+            'backlog': backlog(),
+            'gateway': self.gateway.metrics.snapshot().get('payment.refund', {}),
+        }
@@ -0,0 +1,30 @@
+from django.utils import timezone
+
+from payment.models import WebhookEvent
+from payment.webhooks import process_batch
+from product.queues import QueueWorkerCommand
+
+
+class Command(QueueWorkerCommand):
+    help = (
+        'Apply stored Razorpay webhook events to orders in batches. Drains the '
+        'due events once, or keeps polling with --loop.'
+    )
+    batch_size = 200
+    interval = 2.0
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help='Attempts before an event with no matching order is ignored '
+                                 '(default: WEBHOOK_MAX_ATTEMPTS)')
+
+    def process_batch(self, options):
+        return process_batch(options['batch_size'], options['max_attempts'])
+
+    def backlog(self):
+        pending = WebhookEvent.objects.filter(status='pending')
+        return {
+            'pending': pending.count(),
+            'due': pending.filter(next_attempt_at__lte=timezone.now()).count(),
+        }
@@ -0,0 +1,218 @@
+# payment/refunds.py - Refund worker: send REFUND_PENDING orders' refunds to Razorpay
+"""
+Cancelling a paid order (or requesting a refund) only marks it
+``REFUND_PENDING``. ``process_refunds`` drains that queue: it claims a
+batch of due orders, asks the gateway for a full refund of each payment
+through a token-bucket ``RateLimiter`` (Razorpay rate-limits its API), and
+writes the results back with one ``bulk_update``.
+
+A claim hides the batch from other workers until a lease runs out, sized
+so that the whole batch can be sent even if every call waits for its
+rate-limit slot and runs into its timeouts; a second worker can't pick up
+an order still being refunded. The lease's end also identifies the claim:
+results are only written to orders that still carry it and are still
+``REFUND_PENDING``, so staff or webhook changes made meanwhile are kept.
+
+Refunds Razorpay processes instantly complete the order here. Slower ones
+keep the refund id and are completed by the ``refund.processed`` webhook.
+Rejected or failed calls are retried with backoff until
+``REFUND_MAX_ATTEMPTS``; after that the order waits for staff, with the
+last error on it. A call that timed out may still have refunded the
+payment, so when a later attempt is rejected the payment's refunds are
+fetched and an existing one completes the order instead.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from product.models import Order
+from product.queues import claim
+
+from .gateway import GatewayUnavailable, PaymentGatewayError, get_gateway
+
+# Added to a claimed batch's worst-case run time to get its lease
+CLAIM_MARGIN_SECONDS = 60
+
+ORDER_FIELDS = [
+    'payment_status', 'razorpay_refund_id', 'refund_attempts', 'refund_next_attempt_at',
+    'refund_error', 'refund_completed_at', 'refund_notes', 'updated_at',
+]
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` calls per second on average, bursts of up to ``burst``"""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                self.sleep(wait)
+                self.updated_at += wait
+                self.tokens = 1
+            self.tokens -= 1
+
+
+def max_attempts():
+    return getattr(settings, 'REFUND_MAX_ATTEMPTS', 5)
+
+
+def refund_queue():
+    """Orders waiting for the worker to send their refund"""
+    return Order.objects.filter(
+        payment_status='REFUND_PENDING',
+        razorpay_refund_id__isnull=True,
+        razorpay_payment_id__isnull=False,
+        refund_attempts__lt=max_attempts(),
+    )
+
+
+def lease_seconds(batch_size, gateway, limiter):
+    """How long a batch may take: every call's rate-limit slot and worst-case duration"""
+    return CLAIM_MARGIN_SECONDS + batch_size * (1 / limiter.rate + gateway.max_call_seconds())
+
+
+def _add_note(order, note):
+    order.refund_notes = f"{order.refund_notes}\n{note}" if order.refund_notes else note
+
+
+def _record_failure(order, error, now):
+    order.refund_attempts += 1
+    order.refund_error = str(error)[:1000]
+    if order.refund_attempts >= max_attempts():
+        order.refund_next_attempt_at = None
+        _add_note(order, f"Automatic refund gave up after {order.refund_attempts} attempts")
+    else:
+        base = getattr(settings, 'REFUND_RETRY_SECONDS', 300)
+        order.refund_next_attempt_at = now + timedelta(seconds=base * 2 ** (order.refund_attempts - 1))
+
+
+def _record_refund(order, refund, now):
+    order.refund_attempts += 1
+    order.razorpay_refund_id = refund['id']
+    order.refund_error = None
+    order.refund_next_attempt_at = None
+    if refund.get('status') == 'processed':
+        order.payment_status = 'REFUNDED'
+        order.refund_completed_at = now
+        _add_note(order, f"Razorpay refund {refund['id']} processed")
+    else:
+        _add_note(order, f"Razorpay refund {refund['id']} submitted")
+
+
+def _landed_refund(gateway, order):
+    """A refund of the order's payment an earlier, timed-out attempt made, if any"""
+    try:
+        refunds = gateway.fetch_refunds(order.razorpay_payment_id).get('items') or []
+    except PaymentGatewayError:
+        return None
+    # Orders and payments are one to one, so any live refund of the payment is ours
+    return next((refund for refund in refunds if refund.get('status') != 'failed'), None)
+
+
+def process_batch(batch_size=50, gateway=None, limiter=None):
+    """Send one batch of due refunds; returns metrics for the batch"""
+    gateway = gateway or get_gateway()
+    limiter = limiter or RateLimiter(getattr(settings, 'REFUND_RATE_PER_SECOND', 5))
+    stats = {'claimed': 0, 'refunded': 0, 'submitted': 0, 'retrying': 0, 'gave_up': 0,
+             'deferred': 0, 'lost': 0, 'seconds': 0.0}
+    started = time.monotonic()
+    now = timezone.now()
+    batch, claimed_until = claim(
+        refund_queue().filter(
+            Q(refund_next_attempt_at__isnull=True) | Q(refund_next_attempt_at__lte=now)
+        ),
+        batch_size, lease_seconds(batch_size, gateway, limiter),
+        lease_field='refund_next_attempt_at', order_by=('refund_requested_at', 'id')
+    )
+    stats['claimed'] = len(batch)
+    if not batch:
+        return stats
+
+    for index, order in enumerate(batch):
+        limiter.acquire()
+        now = timezone.now()
+        try:
+            refund = gateway.refund_payment(
+                order.razorpay_payment_id,
+                notes={'order_number': order.order_number, 'reason': (order.refund_reason or '')[:250]},
+            )
+        except PaymentGatewayError as e:
+            landed = None
+            if order.refund_attempts and not isinstance(e, GatewayUnavailable):
+                # Rejected after an earlier attempt: perhaps because that one went through
+                landed = _landed_refund(gateway, order)
+            if landed:
+                _record_refund(order, landed, now)
+            else:
+                _record_failure(order, e, now)
+            if isinstance(e, GatewayUnavailable) and gateway.breaker.state == 'open':
+                # The gateway is down; hand the rest back without using an attempt
+                for deferred in batch[index + 1:]:
+                    deferred.refund_next_attempt_at = None
+                    stats['deferred'] += 1
+                break
+        else:
+            _record_refund(order, refund, now)
+        order.updated_at = now
+
+    with transaction.atomic():
+        # Orders still under this claim; the others were changed meanwhile
+        owned = set(
+            Order.objects.select_for_update()
+            .filter(pk__in=[order.pk for order in batch], payment_status='REFUND_PENDING',
+                    refund_next_attempt_at=claimed_until)
+            .values_list('pk', flat=True)
+        )
+        Order.objects.bulk_update([order for order in batch if order.pk in owned], ORDER_FIELDS)
+
+    for order in batch[:len(batch) - stats['deferred']]:
+        if order.pk not in owned:
+            stats['lost'] += 1
+        elif order.payment_status == 'REFUNDED':
+            stats['refunded'] += 1
+        elif order.razorpay_refund_id:
+            stats['submitted'] += 1
+        elif order.refund_attempts >= max_attempts():
+            stats['gave_up'] += 1
+        else:
+            stats['retrying'] += 1
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
+
+
+def backlog():
+    """Size and age of the refund queue, in one query"""
+    now = timezone.now()
+    pending = Q(payment_status='REFUND_PENDING')
+    waiting = pending & Q(razorpay_refund_id__isnull=True)
+    report = Order.objects.aggregate(
+        pending=Count('pk', filter=pending),
+        queued=Count('pk', filter=waiting & Q(
+            refund_attempts__lt=max_attempts(), razorpay_payment_id__isnull=False
+        )),
+        awaiting_gateway=Count('pk', filter=pending & Q(razorpay_refund_id__isnull=False)),
+        needs_staff=Count('pk', filter=waiting & (
+            Q(refund_attempts__gte=max_attempts()) | Q(razorpay_payment_id__isnull=True)
+        )),
+        oldest=Min('refund_requested_at', filter=waiting),
+    )
+    oldest = report.pop('oldest')
+    report['oldest_age_seconds'] = round((now - oldest).total_seconds()) if oldest else 0
+    return report
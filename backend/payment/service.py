@@ -0,0 +1,133 @@
+# payment/service.py - Razorpay checkout: create the gateway order, then verify and place it
+"""
+The one implementation of the Razorpay checkout flow; ``payment/views.py``
+only translates its results and errors into HTTP responses.
+
+``start_checkout`` loads the cart once, prices it in Decimal, creates the
+gateway order and holds the stock. ``complete_checkout`` checks the
+signature locally, reads back the amount the gateway order was created for
+and hands it with the same single cart load to ``place_order``, which
+writes the order atomically. A payment places at most one order
+(``razorpay_payment_id`` is unique); verifying it again returns that order.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Q
+
+from product.checkout import cart_total, load_cart_items, place_order, shipping_details
+from product.models import Order
+from product.stock import reserve_stock
+
+from .gateway import get_gateway
+
+CURRENCY = 'INR'
+
+
+class CheckoutError(Exception):
+    """The request can't be checked out as sent; the message is user-facing"""
+
+
+class EmptyCart(CheckoutError):
+    def __init__(self):
+        super().__init__('Cart is empty')
+
+
+def to_paise(amount):
+    """Rupees (Decimal) to integer paise, rounded half up"""
+    return int((Decimal(amount) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def start_checkout(user):
+    """Create a gateway order for the user's cart and reserve its stock.
+
+    Raises EmptyCart, InsufficientStock or GatewayUnavailable.
+    """
+    items = load_cart_items(user)
+    if not items:
+        raise EmptyCart()
+
+    total = cart_total(items)
+    gateway_order = get_gateway().create_order(
+        to_paise(total),
+        currency=CURRENCY,
+        notes={
+            'user_id': str(user.id),
+            'user_email': user.email,
+            'cart_id': str(items[0].cart_id),
+        },
+    )
+    # Hold the stock until the payment is verified or the hold expires
+    reserve_stock(user, gateway_order['id'], [(item.product_id, item.quantity) for item in items])
+
+    return {
+        'razorpay_order_id': gateway_order['id'],
+        'amount': gateway_order['amount'],
+        'currency': CURRENCY,
+        'key': settings.RAZORPAY_KEY_ID,
+        'cart_total': f'{total:.2f}',
+    }
+
+
+def complete_checkout(user, data):
+    """Verify a completed payment and turn the cart into a paid order.
+
+    Raises CheckoutError for missing details, a bad signature or an empty
+    cart, and GatewayUnavailable. If the cart no longer matches what was
+    paid for, or the reserved stock is gone, the order comes back cancelled
+    with ``payment_status == 'REFUND_PENDING'``. A payment that already
+    placed an order (a retried or doubled verify) returns that order.
+    """
+    razorpay_order_id = data.get('razorpay_order_id')
+    razorpay_payment_id = data.get('razorpay_payment_id')
+    razorpay_signature = data.get('razorpay_signature')
+
+    if not all([razorpay_order_id, razorpay_payment_id, razorpay_signature]):
+        raise CheckoutError('Missing payment verification parameters')
+    if not get_gateway().verify_payment_signature(
+        razorpay_order_id, razorpay_payment_id, razorpay_signature
+    ):
+        raise CheckoutError('Payment verification failed')
+
+    existing = placed_order(user, razorpay_order_id, razorpay_payment_id)
+    if existing:
+        return existing
+
+    items = load_cart_items(user)
+    if not items:
+        raise EmptyCart()
+
+    # What was charged; the cart may have changed since the order was created
+    paid = get_gateway().fetch_order(razorpay_order_id)['amount']
+
+    try:
+        return place_order(
+            user,
+            items,
+            shipping_details(data),
+            paid_amount=Decimal(paid) / 100,
+            status='processing',
+            payment_method='Razorpay',
+            payment_status='PAID',
+            is_paid=True,
+            razorpay_order_id=razorpay_order_id,
+            razorpay_payment_id=razorpay_payment_id,
+            razorpay_signature=razorpay_signature,
+        )
+    except IntegrityError:
+        # A concurrent verify of the same payment placed it first
+        existing = placed_order(user, razorpay_order_id, razorpay_payment_id)
+        if existing is None:
+            raise
+        return existing
+
+
+def placed_order(user, razorpay_order_id, razorpay_payment_id):
+    """The order already placed for this gateway order or payment, if any"""
+    order = Order.objects.filter(
+        Q(razorpay_order_id=razorpay_order_id) | Q(razorpay_payment_id=razorpay_payment_id)
+    ).order_by('pk').first()
+    if order is not None and order.user_id != user.id:
+        raise CheckoutError('Payment verification failed')
+    return order
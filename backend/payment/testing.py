@@ -0,0 +1,80 @@
+# payment/testing.py - Drive the Razorpay checkout against the fake gateway
+"""
+Shared by ``payment/tests.py`` and the ``benchmark_api`` command so both
+exercise the same create-order -> pay -> verify flow through the real
+endpoints, with ``FakeGateway`` standing in for Razorpay.
+"""
+import json
+import uuid
+
+from .gateway import FakeGateway, compute_signature, set_gateway
+
+CREATE_ORDER_URL = '/api/payment/create-order/'
+VERIFY_URL = '/api/payment/verify/'
+WEBHOOK_URL = '/api/payment/webhook/'
+
+
+def webhook_delivery(event, secret, event_id=None, **entities):
+    """Body and headers of a signed Razorpay webhook, e.g. payment={...}"""
+    body = json.dumps({
+        'entity': 'event',
+        'event': event,
+        'contains': list(entities),
+        'payload': {name: {'entity': entity} for name, entity in entities.items()},
+    }).encode()
+    headers = {
+        'HTTP_X_RAZORPAY_SIGNATURE': compute_signature(secret, body),
+        'HTTP_X_RAZORPAY_EVENT_ID': event_id or f'evt_{uuid.uuid4().hex[:14]}',
+    }
+    return body, headers
+
+
+class FakeCheckout:
+    """Install a FakeGateway and run checkouts with a Django/DRF test client.
+
+    ``headers`` (e.g. ``HTTP_AUTHORIZATION``) are sent with every request.
+    Use as a context manager, or call install()/uninstall().
+    """
+
+    def __init__(self, client, gateway=None, **headers):
+        self.client = client
+        self.gateway = gateway or FakeGateway()
+        self.headers = headers
+
+    def install(self):
+        set_gateway(self.gateway)
+        return self
+
+    def uninstall(self):
+        set_gateway(None)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def post(self, url, data):
+        return self.client.post(
+            url, json.dumps(data), content_type='application/json', **self.headers
+        )
+
+    def create_order(self):
+        return self.post(CREATE_ORDER_URL, {})
+
+    def verify(self, razorpay_order_id, shipping, signature=None):
+        """Pay the gateway order and post the result to the verify endpoint"""
+        payment_id, valid_signature = self.gateway.pay(razorpay_order_id)
+        return self.post(VERIFY_URL, {
+            **shipping,
+            'razorpay_order_id': razorpay_order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': signature or valid_signature,
+        })
+
+    def checkout(self, shipping):
+        """Create, pay and verify; returns (create response, verify response)"""
+        created = self.create_order()
+        if created.status_code != 201:
+            return created, None
+        return created, self.verify(created.json()['razorpay_order_id'], shipping)
@@ -1,3 +1,449 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from product.admin import OrderAdmin
+from product.management.commands.benchmark_api import SHIPPING
+from product.models import Cart, CartItem, Category, Order, Product, StockReservation
+
+from .gateway import CircuitBreaker, FakeGateway, GatewayUnavailable, set_gateway
+from .models import WebhookEvent
+from .refunds import RateLimiter, backlog
+from .refunds import process_batch as process_refunds
+from .service import to_paise
+from .testing import VERIFY_URL, WEBHOOK_URL, FakeCheckout, webhook_delivery
+from .webhooks import process_batch
+
+User = get_user_model()
+
+
+class GatewayTests(TestCase):
+    def setUp(self):
+        self.gateway = FakeGateway(breaker=CircuitBreaker(threshold=3, cooldown=60))
+        self.gateway.max_retries = 2
+
+    def test_reads_are_retried(self):
+        order = self.gateway.create_order(1000)
+        self.gateway.fail_next(2)
+        self.assertEqual(self.gateway.fetch_order(order['id'])['amount'], 1000)
+        self.assertEqual(self.gateway.metrics.snapshot()['order.fetch']['calls'], 3)
+
+    def test_writes_are_not_retried_after_the_request_may_have_landed(self):
+        self.gateway.fail_next(1, requests.ReadTimeout)
+        with self.assertRaises(GatewayUnavailable):
+            self.gateway.create_order(1000)
+        self.assertEqual(self.gateway.orders, {})
+
+    def test_writes_are_retried_on_connect_timeout(self):
+        self.gateway.fail_next(1, requests.ConnectTimeout)
+        self.gateway.create_order(1000)
+        self.assertEqual(len(self.gateway.orders), 1)
+
+    def test_circuit_opens_and_fails_fast(self):
+        self.gateway.fail_next(3)
+        for _ in range(3):
+            with self.assertRaises(GatewayUnavailable):
+                self.gateway.create_order(1000)
+        self.assertEqual(self.gateway.breaker.state, 'open')
+
+        # The gateway has recovered but the circuit is still open
+        with self.assertRaises(GatewayUnavailable):
+            self.gateway.create_order(1000)
+        self.assertEqual(self.gateway.orders, {})
+        self.assertEqual(self.gateway.metrics.snapshot()['order.create']['calls'], 3)
+
+    def test_half_open_trial_closes_the_circuit(self):
+        self.gateway.fail_next(3)
+        for _ in range(3):
+            with self.assertRaises(GatewayUnavailable):
+                self.gateway.create_order(1000)
+        self.gateway.breaker.opened_at -= 60
+        self.assertEqual(self.gateway.breaker.state, 'half_open')
+        self.gateway.create_order(1000)
+        self.assertEqual(self.gateway.breaker.state, 'closed')
+
+    def test_signature_is_checked_locally(self):
+        order = self.gateway.create_order(1000)
+        payment_id, signature = self.gateway.pay(order['id'])
+        self.assertTrue(self.gateway.verify_payment_signature(order['id'], payment_id, signature))
+        self.assertFalse(self.gateway.verify_payment_signature(order['id'], payment_id, 'forged'))
+
+
+class ToPaiseTests(TestCase):
+    def test_exact_decimal_conversion(self):
+        # int(float('19.99') * 100) == 1998
+        self.assertEqual(to_paise(Decimal('19.99')), 1999)
+        self.assertEqual(to_paise(Decimal('1234567.89')), 123456789)
+        self.assertEqual(to_paise(Decimal('0.005')), 1)
+
+
+class PaymentFlowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='payer@example.com', username='payer')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.checkout = FakeCheckout(client).install()
+        self.addCleanup(self.checkout.uninstall)
+        self.gateway = self.checkout.gateway
+        category = Category.objects.create(name='Tees')
+        self.product = Product.objects.create(
+            category=category, name='Tee', description='Tee', price=Decimal('19.99'), stock=5
+        )
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+
+    def test_create_and_verify(self):
+        created, verified = self.checkout.checkout(SHIPPING)
+        self.assertEqual(created.status_code, 201, created.data)
+        order_id = created.data['razorpay_order_id']
+        self.assertEqual(created.data['amount'], 3998)
+        self.assertEqual(self.gateway.orders[order_id]['amount'], 3998)
+        self.assertTrue(StockReservation.objects.filter(razorpay_order_id=order_id).exists())
+
+        self.assertEqual(verified.status_code, 201, verified.data)
+        order = Order.objects.get()
+        self.assertEqual(order.razorpay_order_id, order_id)
+        self.assertEqual(order.total_amount, Decimal('39.98'))
+        self.assertEqual((order.status, order.payment_status), ('processing', 'PAID'))
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 3)
+
+    def test_cart_changed_after_payment_is_refunded(self):
+        order_id = self.checkout.create_order().data['razorpay_order_id']
+        CartItem.objects.update(quantity=3)
+        response = self.checkout.verify(order_id, SHIPPING)
+        self.assertEqual(response.status_code, 409, response.data)
+        order = Order.objects.get()
+        self.assertEqual((order.status, order.payment_status), ('cancelled', 'REFUND_PENDING'))
+        self.assertEqual(order.total_amount, Decimal('39.98'))
+        # The hold is given back and the cart kept for another checkout
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 5)
+        self.assertEqual(StockReservation.objects.get().status, 'released')
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+
+    def test_price_change_after_payment_is_refunded(self):
+        order_id = self.checkout.create_order().data['razorpay_order_id']
+        Product.objects.update(price=Decimal('24.99'))
+        response = self.checkout.verify(order_id, SHIPPING)
+        self.assertEqual(response.status_code, 409, response.data)
+        order = Order.objects.get()
+        self.assertEqual(order.payment_status, 'REFUND_PENDING')
+        self.assertEqual(order.total_amount, Decimal('39.98'))
+
+    def test_repeated_verify_returns_the_placed_order(self):
+        order_id = self.checkout.create_order().data['razorpay_order_id']
+        payment_id, signature = self.gateway.pay(order_id)
+        body = {**SHIPPING, 'razorpay_order_id': order_id, 'razorpay_payment_id': payment_id,
+                'razorpay_signature': signature}
+        first = self.checkout.post(VERIFY_URL, body)
+        self.assertEqual(first.status_code, 201, first.data)
+
+        # A new cart must not turn the repeat into a cancelled, refunded second order
+        CartItem.objects.create(cart=Cart.objects.get(), product=self.product, quantity=1)
+        again = self.checkout.post(VERIFY_URL, body)
+        self.assertEqual(again.status_code, 201, again.data)
+        self.assertEqual(again.data['order_id'], first.data['order_id'])
+        order = Order.objects.get()
+        self.assertEqual((order.status, order.payment_status), ('processing', 'PAID'))
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+    def test_forged_signature_is_rejected(self):
+        order_id = self.checkout.create_order().data['razorpay_order_id']
+        response = self.checkout.verify(order_id, SHIPPING, signature='forged')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_cart(self):
+        CartItem.objects.all().delete()
+        response = self.checkout.create_order()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Cart is empty')
+
+    def test_unavailable_gateway_returns_503(self):
+        self.gateway.fail_next(1, requests.ReadTimeout)
+        response = self.checkout.create_order()
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.data['success'])
+        self.assertFalse(StockReservation.objects.exists())
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET='whsec_test')
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create(email='hook@example.com', username='hook')
+        self.order = Order.objects.create(
+            user=user, order_number='ORD-HOOK0001', total_amount=Decimal('500.00'),
+            razorpay_order_id='order_hook1', **SHIPPING
+        )
+
+    def deliver(self, event, event_id=None, secret='whsec_test', **entities):
+        body, headers = webhook_delivery(event, secret, event_id=event_id, **entities)
+        return self.client.post(WEBHOOK_URL, body, content_type='application/json', **headers)
+
+    def captured(self, order_id='order_hook1', payment_id='pay_hook1', **fields):
+        return {'id': payment_id, 'order_id': order_id, 'status': 'captured', **fields}
+
+    def test_request_only_inserts_the_event(self):
+        with self.assertNumQueries(1):
+            response = self.deliver('payment.captured', payment=self.captured(method='upi'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).payment_status, 'PENDING')
+
+    def test_bad_signature_is_rejected(self):
+        response = self.deliver('payment.captured', secret='wrong', payment=self.captured())
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_redelivery_is_stored_once(self):
+        for _ in range(3):
+            self.assertEqual(
+                self.deliver('payment.captured', event_id='evt_1', payment=self.captured()).status_code,
+                200
+            )
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_capture_fills_payment_method(self):
+        self.deliver('payment.captured', payment=self.captured(
+            method='card', card={'network': 'Visa', 'type': 'credit', 'last4': '1111'}
+        ))
+        stats = process_batch()
+        self.assertEqual((stats['processed'], stats['orders_updated']), (1, 1))
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.payment_status, order.is_paid), ('PAID', True))
+        self.assertEqual(order.razorpay_payment_id, 'pay_hook1')
+        self.assertEqual(order.get_display_payment_method(), 'VISA CREDIT Card')
+
+    def test_refund_completes_refund_pending_order(self):
+        Order.objects.filter(pk=self.order.pk).update(
+            razorpay_payment_id='pay_hook1', payment_status='REFUND_PENDING', status='cancelled'
+        )
+        self.deliver('refund.processed', refund={'id': 'rfnd_1', 'payment_id': 'pay_hook1'})
+        process_batch()
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.payment_status, 'REFUNDED')
+        self.assertIsNotNone(order.refund_completed_at)
+        self.assertIn('rfnd_1', order.refund_notes)
+
+    def test_capture_before_order_exists_is_retried(self):
+        self.deliver('payment.captured', payment=self.captured(order_id='order_later', method='upi'))
+        self.assertEqual(process_batch()['retrying'], 1)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+        Order.objects.filter(pk=self.order.pk).update(razorpay_order_id='order_later')
+        WebhookEvent.objects.update(next_attempt_at=event.received_at)
+        self.assertEqual(process_batch()['processed'], 1)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).actual_payment_method, 'upi')
+
+    def test_batch_query_count_is_independent_of_size(self):
+        def batch_queries(count):
+            orders = []
+            for i in range(count):
+                orders.append(Order(
+                    user=self.order.user, order_number=f'ORD-B{count}-{i}',
+                    total_amount=Decimal('10.00'), razorpay_order_id=f'order_b{count}_{i}', **SHIPPING
+                ))
+                self.deliver('payment.captured', payment=self.captured(
+                    order_id=f'order_b{count}_{i}', payment_id=f'pay_b{count}_{i}', method='upi'
+                ))
+            Order.objects.bulk_create(orders)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(process_batch()['orders_updated'], count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(batch_queries(2), batch_queries(10))
+
+    def test_worker_command_reports_metrics(self):
+        self.deliver('payment.captured', payment=self.captured())
+        self.deliver('subscription.charged', subscription={'id': 'sub_1'})
+        out = StringIO()
+        call_command('process_webhook_events', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual((report['processed'], report['ignored'], report['pending']), (1, 1, 0))
+
+
+class RateLimiterTests(TestCase):
+    def test_spaces_calls_at_the_configured_rate(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(rate=4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertEqual(sleeps, [0.25] * 4)
+
+        now[0] += 10
+        limiter.acquire()
+        self.assertEqual(len(sleeps), 4)
+
+
+class RefundWorkerTests(TestCase):
+    def setUp(self):
+        self.gateway = FakeGateway(breaker=CircuitBreaker(threshold=2, cooldown=60))
+        self.gateway.max_retries = 0
+        self.limiter = RateLimiter(rate=1000, burst=1000)
+        self.user = User.objects.create(email='refund@example.com', username='refund')
+
+    def paid_order(self, index, pending=True):
+        gateway_order = self.gateway.create_order(1000)
+        payment_id, _ = self.gateway.pay(gateway_order['id'])
+        return Order.objects.create(
+            user=self.user, order_number=f'ORD-RF{index:04d}', total_amount=Decimal('10.00'),
+            status='cancelled', is_paid=True, razorpay_order_id=gateway_order['id'],
+            razorpay_payment_id=payment_id, payment_status='REFUND_PENDING' if pending else 'PAID',
+            refund_requested_at=timezone.now(), refund_reason='Order cancelled by customer',
+            **SHIPPING
+        )
+
+    def run_worker(self, batch_size=50):
+        return process_refunds(batch_size, gateway=self.gateway, limiter=self.limiter)
+
+    def test_refunds_pending_orders_in_one_batch(self):
+        orders = [self.paid_order(i) for i in range(3)]
+        self.paid_order(99, pending=False)
+        stats = self.run_worker()
+        self.assertEqual((stats['claimed'], stats['refunded']), (3, 3))
+        self.assertEqual(len(self.gateway.refunds), 3)
+        for order in Order.objects.filter(pk__in=[o.pk for o in orders]):
+            self.assertEqual(order.payment_status, 'REFUNDED')
+            self.assertTrue(order.razorpay_refund_id.startswith('rfnd_'))
+            self.assertIsNotNone(order.refund_completed_at)
+        self.assertEqual(self.run_worker()['claimed'], 0)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        def queries(count):
+            for i in range(count):
+                self.paid_order(count * 100 + i)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.run_worker()['refunded'], count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(2), queries(10))
+
+    def test_pending_refund_waits_for_webhook(self):
+        self.gateway.refund_status = 'pending'
+        order = self.paid_order(1)
+        self.assertEqual(self.run_worker()['submitted'], 1)
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, 'REFUND_PENDING')
+        self.assertEqual(backlog()['awaiting_gateway'], 1)
+        self.assertEqual(self.run_worker()['claimed'], 0)
+
+    def test_rejected_refund_is_retried_then_left_for_staff(self):
+        order = self.paid_order(1)
+        Order.objects.filter(pk=order.pk).update(razorpay_payment_id='pay_unknown')
+        with self.settings(REFUND_MAX_ATTEMPTS=2):
+            self.assertEqual(self.run_worker()['retrying'], 1)
+            order.refresh_from_db()
+            self.assertEqual(order.refund_attempts, 1)
+            self.assertIn('does not exist', order.refund_error)
+            self.assertEqual(self.run_worker()['claimed'], 0)
+
+            Order.objects.filter(pk=order.pk).update(refund_next_attempt_at=None)
+            self.assertEqual(self.run_worker()['gave_up'], 1)
+            self.assertEqual(backlog()['needs_staff'], 1)
+
+            admin = OrderAdmin(Order, AdminSite())
+            admin.message_user = lambda *args, **kwargs: None
+            admin.retry_refunds(None, Order.objects.all())
+            self.assertEqual(backlog()['queued'], 1)
+
+    def test_refund_that_landed_despite_a_timeout_completes_the_order(self):
+        order = self.paid_order(1)
+        # The first attempt timed out after Razorpay had refunded the payment
+        refund = self.gateway.refund_payment(order.razorpay_payment_id)
+        Order.objects.filter(pk=order.pk).update(refund_attempts=1, refund_error='Read timed out')
+
+        stats = self.run_worker()
+        self.assertEqual(stats['refunded'], 1)
+        order.refresh_from_db()
+        self.assertEqual((order.payment_status, order.razorpay_refund_id), ('REFUNDED', refund['id']))
+        self.assertIsNone(order.refund_error)
+        self.assertEqual(len(self.gateway.refunds), 1)
+
+    def test_open_circuit_defers_the_rest_of_the_batch(self):
+        for i in range(4):
+            self.paid_order(i)
+        self.gateway.fail_next(2)
+        stats = self.run_worker()
+        self.assertEqual((stats['retrying'], stats['deferred'], stats['refunded']), (2, 2, 0))
+        self.assertEqual(
+            Order.objects.filter(refund_attempts=0, refund_next_attempt_at__isnull=True).count(), 2
+        )
+
+    def test_lease_outlasts_a_batch_of_timed_out_calls(self):
+        self.gateway.request_timeout = 13.05
+        self.gateway.max_retries = 2
+        self.limiter = RateLimiter(rate=5)
+        order = self.paid_order(1)
+        leases = []
+        refund = self.gateway._refund
+
+        def record_lease(payment_id, data):
+            leases.append(
+                Order.objects.values_list('refund_next_attempt_at', flat=True).get(pk=order.pk)
+            )
+            return refund(payment_id, data)
+
+        started = timezone.now()
+        with mock.patch.object(self.gateway, '_refund', side_effect=record_lease):
+            self.assertEqual(self.run_worker(batch_size=50)['refunded'], 1)
+        # 50 calls, each waiting for its slot and up to three timed-out attempts
+        self.assertGreater(leases[0] - started, timedelta(seconds=50 * (0.2 + 3 * 13.05)))
+
+    def test_orders_changed_during_the_batch_are_not_overwritten(self):
+        orders = [self.paid_order(i) for i in range(2)]
+        refund = self.gateway._refund
+
+        def staff_refunds_first_order(payment_id, data):
+            Order.objects.filter(pk=orders[0].pk).update(
+                payment_status='REFUNDED', refund_notes='Refunded by phone'
+            )
+            return refund(payment_id, data)
+
+        with mock.patch.object(self.gateway, '_refund', side_effect=staff_refunds_first_order):
+            stats = self.run_worker()
+        self.assertEqual((stats['lost'], stats['refunded']), (1, 1))
+        first, second = Order.objects.filter(pk__in=[o.pk for o in orders]).order_by('pk')
+        self.assertEqual((first.refund_notes, first.razorpay_refund_id), ('Refunded by phone', None))
+        self.assertEqual(second.payment_status, 'REFUNDED')
+
+    def test_admin_mark_as_refunded_is_one_update(self):
+        orders = [self.paid_order(i) for i in range(3)]
+        Order.objects.filter(pk=orders[0].pk).update(refund_notes='Customer called')
+        admin = OrderAdmin(Order, AdminSite())
+        admin.message_user = lambda *args, **kwargs: None
+        request = type('Request', (), {'user': self.user})()
+        with self.assertNumQueries(1):
+            admin.mark_as_refunded(request, Order.objects.all())
+        notes = dict(Order.objects.values_list('pk', 'refund_notes'))
+        self.assertTrue(notes[orders[0].pk].startswith('Customer called\nBulk refund completed by'))
+        self.assertTrue(notes[orders[1].pk].startswith('Bulk refund completed by'))
+        self.assertEqual(Order.objects.filter(payment_status='REFUNDED').count(), 3)
+
+    def test_command_reports_throughput_and_backlog(self):
+        self.paid_order(1)
+        set_gateway(self.gateway)
+        self.addCleanup(set_gateway, None)
+        out = StringIO()
+        call_command('process_refunds', '--rate', '1000', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['refunded'], 1)
+        self.assertEqual(report['backlog']['pending'], 0)
+        self.assertEqual(report['gateway']['calls'], 1)
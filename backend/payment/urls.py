@@ -1,8 +1,9 @@
 # payment/urls.py
 from django.urls import path
-from .views import CreateRazorpayOrderView, VerifyPaymentView
+from .views import CreateRazorpayOrderView, RazorpayWebhookView, VerifyPaymentView
 
 urlpatterns = [
     path('create-order/', CreateRazorpayOrderView.as_view(), name='create-razorpay-order'),
     path('verify/', VerifyPaymentView.as_view(), name='verify-payment'),
+    path('webhook/', RazorpayWebhookView.as_view(), name='razorpay-webhook'),
 ]
\ No newline at end of file
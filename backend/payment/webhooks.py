@@ -0,0 +1,220 @@
+# payment/webhooks.py - Razorpay webhook ingestion and the batch worker that applies it
+"""
+The webhook endpoint does three things: check the signature, INSERT the
+raw event (``ON CONFLICT DO NOTHING`` on the event id, so redeliveries are
+free) and answer 200. Nothing touches orders on the request path.
+
+``process_batch`` (run by ``process_webhook_events``) claims due events,
+then in one transaction locks every order they mention with a single
+``SELECT ... FOR UPDATE``, applies the events in the order they were
+received and writes the orders and events back with one ``bulk_update``
+each. The lock keeps the verify view, the refund worker and the admin from
+changing those orders in between, so the write can't undo their changes:
+
+* ``payment.captured`` / ``order.paid`` mark the order paid and fill
+  ``actual_payment_method`` and ``payment_method_details``;
+* ``payment.failed`` marks a still-pending order failed;
+* ``refund.processed`` completes a ``REFUND_PENDING`` order.
+
+Orders are only created when the browser calls verify, so a capture can
+arrive before its order exists; such events are retried with backoff
+until ``WEBHOOK_MAX_ATTEMPTS`` and then ignored.
+"""
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from product.models import Order
+from product.queues import claim
+
+from .gateway import compute_signature
+from .models import WebhookEvent
+
+# Lease on a claimed batch; applying it is a few queries
+CLAIM_SECONDS = 300
+
+PAID_EVENTS = ('payment.captured', 'order.paid')
+HANDLED_EVENTS = PAID_EVENTS + ('payment.failed', 'refund.processed')
+
+ORDER_FIELDS = [
+    'payment_status', 'is_paid', 'razorpay_payment_id', 'actual_payment_method',
+    'payment_method_details', 'refund_completed_at', 'refund_notes', 'updated_at',
+]
+
+
+class InvalidWebhook(Exception):
+    pass
+
+
+def verify_signature(body, signature):
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(compute_signature(secret, body), signature)
+
+
+def record_event(body, event_id=None):
+    """Store a verified delivery; a redelivered event id is a no-op"""
+    try:
+        data = json.loads(body)
+        event = data['event']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidWebhook('Malformed webhook payload')
+    # Razorpay sends X-Razorpay-Event-Id; fall back to the body's hash
+    event_id = event_id or hashlib.sha256(body).hexdigest()
+    WebhookEvent.objects.bulk_create(
+        [WebhookEvent(event_id=event_id, event=event, payload=data)],
+        ignore_conflicts=True,
+    )
+
+
+def _entity(event, name):
+    return ((event.payload.get('payload') or {}).get(name) or {}).get('entity') or {}
+
+
+def method_details(payment):
+    """payment_method_details in the shape Order.get_display_payment_method reads"""
+    method = payment.get('method')
+    if method == 'card':
+        card = payment.get('card') or {}
+        return {
+            'network': card.get('network') or '',
+            'card_type': card.get('type') or '',
+            'last4': card.get('last4') or '',
+            'issuer': card.get('issuer') or '',
+        }
+    if method == 'upi':
+        return {'vpa': payment.get('vpa') or ''}
+    if method == 'netbanking':
+        return {'bank': payment.get('bank') or ''}
+    if method == 'wallet':
+        return {'wallet': payment.get('wallet') or ''}
+    return {}
+
+
+def _load_orders(batch):
+    order_ids, payment_ids = set(), set()
+    for event in batch:
+        payment = _entity(event, 'payment')
+        if payment.get('order_id'):
+            order_ids.add(payment['order_id'])
+        refund = _entity(event, 'refund')
+        if refund.get('payment_id'):
+            payment_ids.add(refund['payment_id'])
+    if not order_ids and not payment_ids:
+        return {}, {}
+    # Locked in id order so concurrent batches can't deadlock on each other
+    orders = list(Order.objects.select_for_update().filter(
+        Q(razorpay_order_id__in=order_ids) | Q(razorpay_payment_id__in=payment_ids)
+    ).order_by('pk'))
+    by_order_id = {order.razorpay_order_id: order for order in orders if order.razorpay_order_id}
+    by_payment_id = {order.razorpay_payment_id: order for order in orders if order.razorpay_payment_id}
+    return by_order_id, by_payment_id
+
+
+def _apply(event, by_order_id, by_payment_id, now):
+    """Apply one event; returns the order it changed, or None if it matched none"""
+    if event.event in PAID_EVENTS or event.event == 'payment.failed':
+        payment = _entity(event, 'payment')
+        order = by_order_id.get(payment.get('order_id'))
+        if order is None:
+            return None
+        if payment.get('method'):
+            order.actual_payment_method = payment['method']
+            order.payment_method_details = method_details(payment)
+        if event.event in PAID_EVENTS:
+            if not order.razorpay_payment_id:
+                order.razorpay_payment_id = payment.get('id')
+                by_payment_id[order.razorpay_payment_id] = order
+            # A cancelled order that is being refunded stays that way
+            if order.payment_status in ('PENDING', 'FAILED'):
+                order.payment_status = 'PAID'
+                order.is_paid = True
+        elif order.payment_status == 'PENDING':
+            order.payment_status = 'FAILED'
+        return order
+
+    refund = _entity(event, 'refund')
+    order = by_payment_id.get(refund.get('payment_id'))
+    if order is None:
+        return None
+    if order.payment_status == 'REFUND_PENDING':
+        order.payment_status = 'REFUNDED'
+        order.refund_completed_at = now
+        note = f"Razorpay refund {refund.get('id')} processed"
+        order.refund_notes = f"{order.refund_notes}\n{note}" if order.refund_notes else note
+    return order
+
+
+def _retry_or_ignore(event, error, now, max_attempts):
+    event.attempts += 1
+    event.last_error = error
+    if event.attempts >= max_attempts:
+        event.status = 'ignored'
+        event.processed_at = now
+    else:
+        base = getattr(settings, 'WEBHOOK_RETRY_SECONDS', 60)
+        event.next_attempt_at = now + timedelta(seconds=base * 2 ** (event.attempts - 1))
+
+
+def process_batch(batch_size=200, max_attempts=None):
+    """Apply one batch of due webhook events; returns metrics for the batch"""
+    max_attempts = max_attempts or getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 5)
+    stats = {'claimed': 0, 'processed': 0, 'retrying': 0, 'ignored': 0, 'orders_updated': 0,
+             'seconds': 0.0}
+    started = time.monotonic()
+    batch, _ = claim(
+        WebhookEvent.objects.filter(status='pending', next_attempt_at__lte=timezone.now()),
+        batch_size, CLAIM_SECONDS, order_by=('next_attempt_at', 'id')
+    )
+    # Applied in the order they were received
+    batch.sort(key=lambda event: event.pk)
+    stats['claimed'] = len(batch)
+    if not batch:
+        return stats
+
+    now = timezone.now()
+    changed = {}
+    with transaction.atomic():
+        by_order_id, by_payment_id = _load_orders(batch)
+        for event in batch:
+            if event.event not in HANDLED_EVENTS:
+                event.status = 'ignored'
+                event.processed_at = now
+                continue
+            order = _apply(event, by_order_id, by_payment_id, now)
+            if order is None:
+                if event.event in PAID_EVENTS:
+                    _retry_or_ignore(event, 'No matching order yet', now, max_attempts)
+                else:
+                    event.status = 'ignored'
+                    event.last_error = 'No matching order'
+                    event.processed_at = now
+                continue
+            order.updated_at = now
+            changed[order.pk] = order
+            event.attempts += 1
+            event.status = 'processed'
+            event.processed_at = now
+            event.last_error = ''
+
+        Order.objects.bulk_update(list(changed.values()), ORDER_FIELDS)
+        WebhookEvent.objects.bulk_update(
+            batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'processed_at']
+        )
+
+    for event in batch:
+        if event.status == 'pending':
+            stats['retrying'] += 1
+        else:
+            stats[event.status] += 1
+    stats['orders_updated'] = len(changed)
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
@@ -4,7 +4,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     Category, Product, ProductImage, ProductColor, ProductSize,
-    ProductSpecification, ProductMaterial, Cart, CartItem, Order, OrderItem, Review
+    ProductSpecification, ProductMaterial, Cart, CartItem, Order, OrderItem, Review,
+    StockReservation
 )
 
 
@@ -71,6 +72,14 @@ class CartAdmin(admin.ModelAdmin):
     inlines = [CartItemInline]
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['razorpay_order_id', 'product', 'user', 'quantity', 'status', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['razorpay_order_id', 'user__email', 'product__name']
+    raw_id_fields = ['product', 'user']
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -97,7 +106,8 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = [
         'order_number', 'created_at', 'updated_at',
         'razorpay_order_id', 'razorpay_payment_id', 'razorpay_signature',
-        'refund_requested_at', 'refund_completed_at', 'get_display_payment_method'
+        'refund_requested_at', 'refund_completed_at', 'get_display_payment_method',
+        'razorpay_refund_id', 'refund_attempts', 'refund_error'
     ]
     inlines = [OrderItemInline]
     
@@ -118,15 +128,16 @@ class OrderAdmin(admin.ModelAdmin):
                 'refund_requested_at', 
                 'refund_reason',
                 'refund_completed_at', 
-                'refund_notes'
+                'refund_notes',
+                'razorpay_refund_id', 'refund_attempts', 'refund_error'
             ),
             'description': '''
                 <strong style="color: #d97706; font-size: 14px;">HOW TO PROCESS REFUNDS:</strong><br>
                 <ol style="margin-top: 10px; line-height: 1.8;">
                     <li><strong>User cancels order</strong> → Payment Status automatically becomes "REFUND_PENDING"</li>
-                    <li><strong>You manually refund money</strong> to customer (via Razorpay dashboard, bank transfer, etc.)</li>
-                    <li><strong>Change "Payment status" above to "REFUNDED"</strong></li>
-                    <li><strong>Click Save</strong> → Refund completion timestamp will be auto-recorded</li>
+                    <li><strong>The refund worker</strong> (process_refunds) refunds the payment through Razorpay and marks it "REFUNDED"</li>
+                    <li><strong>If it keeps failing</strong> (see "Refund error"), refund the money by hand, change "Payment status" to "REFUNDED" and click Save,
+                        or use the "Retry automatic refund" action</li>
                 </ol>
                 <p style="background: #fef3c7; padding: 10px; margin-top: 10px; border-left: 4px solid #f59e0b;">
                     ⚠️ <strong>Important:</strong> Payment Status dropdown above controls refunds. 
@@ -219,32 +230,41 @@ class OrderAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     # ✅ Add custom action to bulk process refunds
-    actions = ['mark_as_refunded']
+    actions = ['mark_as_refunded', 'retry_refunds']
     
     def mark_as_refunded(self, request, queryset):
-        """Bulk action: Mark selected orders as refunded"""
+        """Bulk action: Mark selected orders as refunded, in one UPDATE"""
+        from django.db.models import Case, F, Q, TextField, Value, When
+        from django.db.models.functions import Concat
         from django.utils import timezone
         
-        # Only update orders that are in REFUND_PENDING status
-        refund_pending_orders = queryset.filter(payment_status='REFUND_PENDING')
+        now = timezone.now()
+        admin_note = f"Bulk refund completed by {request.user.email} on {now.strftime('%Y-%m-%d %H:%M:%S')}"
         
-        count = 0
-        for order in refund_pending_orders:
-            order.payment_status = 'REFUNDED'
-            order.refund_completed_at = timezone.now()
-            
-            admin_note = f"Bulk refund completed by {request.user.email} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            if order.refund_notes:
-                order.refund_notes += f"\n{admin_note}"
-            else:
-                order.refund_notes = admin_note
-            
-            order.save()
-            count += 1
+        # Only update orders that are in REFUND_PENDING status
+        count = queryset.filter(payment_status='REFUND_PENDING').update(
+            payment_status='REFUNDED',
+            refund_completed_at=now,
+            refund_notes=Case(
+                When(Q(refund_notes__isnull=True) | Q(refund_notes=''), then=Value(admin_note)),
+                default=Concat(F('refund_notes'), Value(f"\n{admin_note}")),
+                output_field=TextField()
+            ),
+            updated_at=now
+        )
         
         self.message_user(request, f'{count} order(s) marked as refunded successfully.')
     
     mark_as_refunded.short_description = "✓ Mark selected as REFUNDED (after you refund money)"
+    
+    def retry_refunds(self, request, queryset):
+        """Bulk action: Hand refunds the worker gave up on back to it"""
+        count = queryset.filter(
+            payment_status='REFUND_PENDING', razorpay_refund_id__isnull=True
+        ).update(refund_attempts=0, refund_next_attempt_at=None, refund_error=None)
+        self.message_user(request, f'{count} refund(s) queued for the refund worker.')
+    
+    retry_refunds.short_description = "↻ Retry automatic refund"
 
 
 @admin.register(Review)
@@ -0,0 +1,120 @@
+# product/cache.py - Versioned response cache for catalog reads
+"""
+Cached catalog responses.
+
+Every cache key embeds a global catalog version. Saving or deleting any
+catalog model bumps the version (see ``product.signals``), which orphans
+all previously cached responses at once; they then age out via the cache
+timeout. Catalog payloads carry no per-user data, so one entry serves
+every visitor.
+
+The version only invalidates across processes if the cache is shared; with
+a per-process cache (locmem) ``CATALOG_CACHE_ENABLED`` is off by default and
+responses are served uncached (see settings).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+
+# Query parameters that change catalog responses; everything else is ignored
+CACHED_PARAMS = (
+    'category', 'search', 'in_stock', 'min_price', 'max_price',
+    'ordering', 'page', 'page_size', 'cursor',
+)
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def catalog_version():
+    cache = get_catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response"""
+    cache = get_catalog_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def normalized_query(query_params):
+    """Stable string for the cache-relevant query parameters"""
+    parts = []
+    for name in CACHED_PARAMS:
+        value = query_params.get(name)
+        if value is None or value.strip() == '':
+            continue
+        value = value.strip()
+        if name in ('category', 'in_stock'):
+            value = value.lower()
+        elif name == 'search':
+            value = ' '.join(value.lower().split())
+        parts.append(f'{name}={value}')
+    return '&'.join(parts)
+
+
+def catalog_cache_key(request, view):
+    # Absolute image URLs depend on scheme and host
+    origin = request.build_absolute_uri('/')
+    lookup = ','.join(f'{k}={v}' for k, v in sorted(view.kwargs.items()))
+    raw = f'{origin}|{view.basename}|{view.action}|{lookup}|{normalized_query(request.query_params)}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'catalog:{catalog_version()}:{digest}'
+
+
+def compute_etag(data):
+    return quote_etag(hashlib.md5(JSONRenderer().render(data)).hexdigest())
+
+
+def cache_catalog_response(view_method):
+    """Cache a read-only viewset action and answer If-None-Match with 304"""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not getattr(settings, 'CATALOG_CACHE_ENABLED', True):
+            return view_method(self, request, *args, **kwargs)
+        cache = get_catalog_cache()
+        key = catalog_cache_key(request, self)
+        entry = cache.get(key)
+
+        response = None
+        if entry is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = compute_etag(response.data)
+            cache.set(key, (etag, response.data), settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            etag, data = entry
+
+        if_none_match = {
+            tag.removeprefix('W/')
+            for tag in parse_etags(request.headers.get('If-None-Match', ''))
+        }
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        if response is None:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+    return wrapper
@@ -0,0 +1,137 @@
+# product/cards.py - Denormalized product cards for listing pages
+"""
+``ProductCard`` holds everything a listing card shows for one active
+product: its listing fields, category name and slug, the primary image URL
+and its resized variants, and the image, color and size lists as JSON. The
+product list endpoint reads one card row per product, so a page costs a
+single query however many images and variants its products have.
+
+Cards are rebuilt from the source rows by ``product.signals`` when a
+product, image, color, size or category is saved or deleted. Writers that
+bypass signals (bulk imports, stock and rating UPDATEs) refresh the cards
+they touch themselves, and ``rebuild_product_cards`` rebuilds the table.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models import OuterRef, Subquery
+
+from .media import image_path, variant_paths
+from .models import Product, ProductCard
+
+# Copied from the product row as is
+PRODUCT_FIELDS = ['name', 'slug', 'price', 'rating', 'reviews_count', 'in_stock', 'created_at']
+CARD_FIELDS = PRODUCT_FIELDS + [
+    'category', 'category_name', 'category_slug', 'image', 'image_variants', 'images',
+    'colors', 'sizes',
+]
+
+_deferred = threading.local()
+
+
+def card_fields(product):
+    """Card column values for a product with its category, images, colors and sizes loaded"""
+    images = sorted(product.images.all(), key=lambda image: (image.order, image.pk))
+    primary = next((image for image in images if image.is_primary), None)
+    primary = primary or (images[0] if images else None)
+    return {
+        **{field: getattr(product, field) for field in PRODUCT_FIELDS},
+        'category_id': product.category_id,
+        'category_name': product.category.name,
+        'category_slug': product.category.slug,
+        'image': image_path(primary) if primary else None,
+        'image_variants': variant_paths(primary) if primary else {},
+        'images': [
+            {
+                'id': image.pk,
+                'image_url': image_path(image),
+                'color_name': image.color_name,
+                'is_primary': image.is_primary,
+                'order': image.order,
+                'variants': variant_paths(image),
+            }
+            for image in images
+        ],
+        'colors': [color.color_name for color in sorted(product.colors.all(), key=lambda c: c.pk)],
+        'sizes': [size.size_name for size in sorted(product.sizes.all(), key=lambda s: s.pk)],
+    }
+
+
+def card_sources():
+    """Active products with everything ``card_fields`` reads"""
+    return Product.objects.filter(is_active=True).select_related('category').prefetch_related(
+        'images', 'colors', 'sizes'
+    )
+
+
+def rebuild_cards(product_ids):
+    """Rebuild the cards of ``product_ids``; returns the number written.
+
+    Inactive and deleted products lose their card.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+    products = list(card_sources().filter(pk__in=product_ids))
+    gone = product_ids - {product.pk for product in products}
+    if gone:
+        ProductCard.objects.filter(pk__in=gone).delete()
+    ProductCard.objects.bulk_create(
+        [ProductCard(product_id=product.pk, **card_fields(product)) for product in products],
+        update_conflicts=True, unique_fields=['product'], update_fields=CARD_FIELDS,
+    )
+    return len(products)
+
+
+def rebuild_all(batch_size=500):
+    """Rebuild every card in batches and drop orphans; returns the number written"""
+    ProductCard.objects.exclude(product__is_active=True).delete()
+    product_ids = list(Product.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+    count = 0
+    for start in range(0, len(product_ids), batch_size):
+        count += rebuild_cards(product_ids[start:start + batch_size])
+    return count
+
+
+def schedule_rebuild(product_ids):
+    """Rebuild now, or at the end of the enclosing ``deferred_rebuilds()`` block"""
+    pending = getattr(_deferred, 'product_ids', None)
+    if pending is None:
+        rebuild_cards(product_ids)
+    else:
+        pending.update(product_ids)
+
+
+@contextmanager
+def deferred_rebuilds():
+    """Collect rebuilds requested inside the block and run them once on exit.
+
+    For bulk writers: deleting a product's images one by one would otherwise
+    rebuild its card once per image. Yields the pending id set, to which the
+    block may add the products it wrote.
+    """
+    if getattr(_deferred, 'product_ids', None) is not None:
+        # Nested: the outer block rebuilds
+        yield _deferred.product_ids
+        return
+    _deferred.product_ids = pending = set()
+    try:
+        yield pending
+    finally:
+        _deferred.product_ids = None
+    rebuild_cards(pending)
+
+
+def refresh_card_fields(product_ids, fields):
+    """Copy ``fields`` from the products to their cards in one UPDATE"""
+    product = Product.objects.filter(pk=OuterRef('pk'))
+    ProductCard.objects.filter(pk__in=product_ids).update(
+        **{field: Subquery(product.values(field)[:1]) for field in fields}
+    )
+
+
+def refresh_category(category):
+    """A category was renamed: update its name and slug on every card"""
+    ProductCard.objects.filter(category=category).update(
+        category_name=category.name, category_slug=category.slug
+    )
@@ -0,0 +1,207 @@
+# product/cart_operations.py - Applying many cart changes in one transaction
+"""
+``apply_cart_operations`` takes a list of operations::
+
+    {'op': 'add', 'product_id': 3, 'quantity': 2, 'selected_color': 'Black', 'selected_size': 'M'}
+    {'op': 'update', 'item_id': 17, 'quantity': 1}
+    {'op': 'remove', 'item_id': 18}
+
+and applies all of them or none. The cart is read once, stock is checked
+for every touched product with one query, and the writes are one DELETE,
+one bulk INSERT and one bulk UPDATE, so the cost does not grow with the
+number of operations.
+
+``merge_guest_cart`` folds a guest (session) cart into the user's cart at
+login, with the same bulk writes.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Cart, CartItem, Product
+
+OPERATIONS = ('add', 'update', 'remove')
+
+
+class CartOperationError(Exception):
+    def __init__(self, index, message):
+        self.index = index
+        self.message = message
+        super().__init__(f'Operation {index}: {message}')
+
+
+def _quantity(index, operation):
+    try:
+        quantity = int(operation.get('quantity', 1))
+    except (TypeError, ValueError):
+        raise CartOperationError(index, 'Invalid quantity')
+    if quantity < 1:
+        raise CartOperationError(index, 'Quantity must be at least 1')
+    return quantity
+
+
+def _line_key(product_id, color, size):
+    return (product_id, color or None, size or None)
+
+
+def apply_cart_operations(cart, operations, skip_unavailable=False):
+    """Apply ``operations`` to ``cart``; raises CartOperationError.
+
+    With ``skip_unavailable``, adds for products that are gone or short of
+    stock are left out (and reported) instead of failing the whole batch.
+    Returns ``{'items': [...changed CartItems], 'removed_item_ids': [...],
+    'skipped_product_ids': [...]}``.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartOperationError(None, 'operations must be a non-empty list')
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise CartOperationError(index, f"op must be one of {', '.join(OPERATIONS)}")
+
+    with transaction.atomic():
+        existing = list(cart.items.select_related('product').select_for_update(of=('self',)))
+        by_id = {item.id: item for item in existing}
+        by_line = {
+            _line_key(item.product_id, item.selected_color, item.selected_size): item
+            for item in existing
+        }
+
+        # One stock lookup for every product the batch can touch
+        product_ids = {item.product_id for item in existing}
+        for operation in operations:
+            if operation['op'] == 'add':
+                try:
+                    product_ids.add(int(operation.get('product_id')))
+                except (TypeError, ValueError):
+                    pass
+        products = Product.objects.filter(pk__in=product_ids, is_active=True).in_bulk()
+
+        wanted = Counter()
+        for item in existing:
+            wanted[item.product_id] += item.quantity
+
+        added, updated, removed, skipped, touched = [], {}, set(), [], set()
+        for index, operation in enumerate(operations):
+            op = operation['op']
+
+            if op == 'add':
+                try:
+                    product_id = int(operation.get('product_id'))
+                except (TypeError, ValueError):
+                    raise CartOperationError(index, 'Invalid product ID')
+                quantity = _quantity(index, operation)
+                product = products.get(product_id)
+                if skip_unavailable and (
+                    product is None or not product.in_stock
+                    or product.stock < wanted[product_id] + quantity
+                ):
+                    skipped.append(product_id)
+                    continue
+                if product is None:
+                    raise CartOperationError(index, 'Product not found')
+
+                key = _line_key(
+                    product_id, operation.get('selected_color'), operation.get('selected_size')
+                )
+                item = by_line.get(key)
+                if item is not None and item.id not in removed:
+                    item.quantity += quantity
+                    if item.pk:
+                        updated[item.pk] = item
+                else:
+                    item = CartItem(
+                        cart=cart, product=product, quantity=quantity,
+                        selected_color=key[1], selected_size=key[2]
+                    )
+                    by_line[key] = item
+                    added.append(item)
+                wanted[product_id] += quantity
+                touched.add(product_id)
+                continue
+
+            item = by_id.get(operation.get('item_id'))
+            if item is None or item.id in removed:
+                raise CartOperationError(index, 'Cart item not found')
+            if op == 'update':
+                quantity = _quantity(index, operation)
+                wanted[item.product_id] += quantity - item.quantity
+                item.quantity = quantity
+                updated[item.pk] = item
+                touched.add(item.product_id)
+            else:
+                wanted[item.product_id] -= item.quantity
+                removed.add(item.pk)
+                updated.pop(item.pk, None)
+
+        for product_id in sorted(touched):
+            product = products.get(product_id)
+            if product is None or not product.in_stock or product.stock < wanted[product_id]:
+                available = product.stock if product is not None and product.in_stock else 0
+                name = product.name if product is not None else f'product {product_id}'
+                raise CartOperationError(None, f'Only {available} of {name} available in stock')
+
+        now = timezone.now()
+        for item in updated.values():
+            item.updated_at = now
+        # Delete first: a removed line may be re-added by a later operation
+        if removed:
+            CartItem.objects.filter(pk__in=removed).delete()
+        CartItem.objects.bulk_create(added)
+        CartItem.objects.bulk_update(list(updated.values()), ['quantity', 'updated_at'])
+        if added or updated or removed:
+            cart.bump_version()
+
+    return {
+        'items': added + list(updated.values()),
+        'removed_item_ids': sorted(removed),
+        'skipped_product_ids': skipped,
+    }
+
+
+def merge_guest_cart(session_key, user):
+    """Move the session's guest cart into the user's cart; returns lines merged.
+
+    Lines the user already has get the guest quantity added (capped at
+    the product's stock); the rest are re-pointed at the user's cart with
+    one UPDATE. The guest cart is deleted afterwards.
+    """
+    if not session_key:
+        return 0
+
+    with transaction.atomic():
+        guest = Cart.objects.select_for_update().filter(
+            session_id=session_key, user__isnull=True
+        ).first()
+        if guest is None:
+            return 0
+        guest_items = list(guest.items.select_related('product'))
+        if not guest_items:
+            guest.delete()
+            return 0
+
+        cart, created = Cart.objects.get_or_create(user=user)
+        by_line = {
+            _line_key(item.product_id, item.selected_color, item.selected_size): item
+            for item in cart.items.select_for_update()
+        }
+        moved, updated = [], []
+        for guest_item in guest_items:
+            item = by_line.get(
+                _line_key(guest_item.product_id, guest_item.selected_color, guest_item.selected_size)
+            )
+            if item is None:
+                moved.append(guest_item.pk)
+                continue
+            item.quantity = max(
+                item.quantity, min(item.quantity + guest_item.quantity, guest_item.product.stock)
+            )
+            item.updated_at = timezone.now()
+            updated.append(item)
+
+        CartItem.objects.filter(pk__in=moved).update(cart=cart, updated_at=timezone.now())
+        CartItem.objects.bulk_update(updated, ['quantity', 'updated_at'])
+        guest.delete()
+        cart.bump_version()
+
+    return len(guest_items)
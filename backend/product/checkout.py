@@ -0,0 +1,125 @@
+# product/checkout.py - Turning a cart into an order in one transaction
+"""
+Every checkout endpoint (plain orders and the Razorpay verify view) goes
+through ``place_order``. The cart is read once with its products, the total
+is computed from those rows, and the order is written with a fixed number
+of statements however many lines the cart has: one stock UPDATE, one order
+INSERT, one bulk OrderItem INSERT and the cart clean-up.
+
+A paid order must match what was paid for: the reserved lines and the
+amount the gateway order was created for. If it doesn't, or the reserved
+stock is gone, the payment is refunded instead (see ``payment/refunds.py``).
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cart, CartItem, Order, OrderItem, StockReservation
+from .stock import (
+    InsufficientStock, ReservationMismatch, commit_reservation, decrement_stock,
+    release_reservations,
+)
+
+SHIPPING_FIELDS = [
+    'shipping_name', 'shipping_email', 'shipping_phone', 'shipping_address',
+    'shipping_city', 'shipping_state', 'shipping_zip_code',
+]
+
+# Order.refund_reason of paid orders that could not be placed
+OUT_OF_STOCK = 'Out of stock at payment verification'
+CART_CHANGED = 'Cart changed after payment'
+
+
+def generate_order_number():
+    return f"ORD-{uuid.uuid4().hex[:8].upper()}"
+
+
+def shipping_details(data):
+    """Shipping fields for Order from request data"""
+    details = {field: data.get(field) for field in SHIPPING_FIELDS}
+    details['shipping_country'] = data.get('shipping_country', 'India')
+    return details
+
+
+def load_cart_items(user):
+    """The user's cart lines with their products, in a single query"""
+    return list(
+        CartItem.objects.filter(cart__user=user).select_related('product').order_by('id')
+    )
+
+
+def cart_total(items):
+    return sum((item.product.price * item.quantity for item in items), 0)
+
+
+def place_order(user, items, shipping, paid_amount=None, **order_fields):
+    """Create an order for ``items`` (from load_cart_items) and empty the cart.
+
+    Plain checkouts take stock here and let InsufficientStock propagate
+    with nothing written. Paid checkouts pass ``razorpay_order_id`` and the
+    ``paid_amount`` of its gateway order, and commit the reservation made
+    when the gateway order was created. The payment has already been
+    captured, so if the cart no longer matches the reservation and amount,
+    or the stock is gone, the order is still recorded but cancelled with
+    its refund queued. A changed cart is left in place to check out again.
+    """
+    lines = [(item.product_id, item.quantity) for item in items]
+    total = cart_total(items)
+    razorpay_order_id = order_fields.get('razorpay_order_id')
+    refund_reason = None
+
+    with transaction.atomic():
+        if razorpay_order_id:
+            try:
+                if paid_amount is not None and paid_amount != total:
+                    raise ReservationMismatch(razorpay_order_id)
+                with transaction.atomic():
+                    commit_reservation(user, razorpay_order_id, lines)
+            except ReservationMismatch:
+                # Nothing of it will be sold; give the hold back now
+                release_reservations(
+                    StockReservation.objects.filter(user=user, razorpay_order_id=razorpay_order_id)
+                )
+                refund_reason = CART_CHANGED
+            except InsufficientStock:
+                refund_reason = OUT_OF_STOCK
+            if refund_reason:
+                order_fields.update(
+                    status='cancelled',
+                    payment_status='REFUND_PENDING',
+                    refund_requested_at=timezone.now(),
+                    refund_reason=refund_reason,
+                )
+        else:
+            decrement_stock(lines)
+
+        order = Order.objects.create(
+            user=user,
+            order_number=generate_order_number(),
+            total_amount=total if paid_amount is None else paid_amount,
+            **shipping,
+            **order_fields
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item.product,
+                product_name=item.product.name,
+                product_price=item.product.price,
+                quantity=item.quantity,
+                selected_color=item.selected_color,
+                selected_size=item.selected_size
+            )
+            for item in items
+        ])
+
+        if refund_reason != CART_CHANGED:
+            # Only the lines that were ordered; anything added meanwhile stays
+            CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+            Cart.objects.filter(pk=items[0].cart_id).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+
+    return order
@@ -0,0 +1,135 @@
+# product/idempotency.py - Idempotency-Key support for write endpoints
+"""
+A client that retries a write sends the same ``Idempotency-Key`` header.
+The first request claims the key (a unique row in IdempotencyKey) and its
+response is stored; retries replay that response without running the view
+again. A key reused with a different request is rejected with 422, and a
+retry that arrives while the first request is still running gets 409.
+
+Keys are scoped to the client (user, or session for guests) and expire
+after ``IDEMPOTENCY_KEY_TTL_HOURS``; ``purge_idempotency_keys`` deletes
+expired rows. Server errors (5xx) are not stored, so those can be retried.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def request_owner(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if not request.session.session_key:
+        request.session.create()
+    return f'session:{request.session.session_key}'
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, to catch a key reused for something else"""
+    payload = json.dumps(
+        [request.method, request.get_full_path(), request.data],
+        cls=JSONEncoder, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _claim(owner, key, fingerprint):
+    """Create the key's row; returns None if claimed, else the existing row"""
+    now = timezone.now()
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    owner=owner, key=key, request_fingerprint=fingerprint,
+                    expires_at=now + key_ttl()
+                )
+            return None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(owner=owner, key=key).first()
+            if existing is None:
+                continue
+            if existing.expires_at > now:
+                return existing
+            IdempotencyKey.objects.filter(pk=existing.pk, expires_at__lte=now).delete()
+    return IdempotencyKey.objects.filter(owner=owner, key=key).first()
+
+
+def idempotent(view):
+    """Make a view or viewset action replay its response for a repeated Idempotency-Key"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        owner = request_owner(request)
+        fingerprint = request_fingerprint(request)
+        existing = _claim(owner, key, fingerprint)
+        if existing is not None:
+            if existing.request_fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{HEADER} was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if existing.response_status is None:
+                return Response(
+                    {'error': f'A request with this {HEADER} is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response = Response(existing.response_body, status=existing.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        claimed = IdempotencyKey.objects.filter(owner=owner, key=key)
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+        if response.status_code >= 500:
+            claimed.delete()
+        else:
+            claimed.update(
+                response_status=response.status_code,
+                response_body=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+            )
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired keys in chunks; returns how many"""
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        IdempotencyKey.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
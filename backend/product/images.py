@@ -0,0 +1,189 @@
+# product/images.py - Resized JPEG/WebP/AVIF variants of uploaded product images
+"""
+Every uploaded ``ProductImage`` gets fixed-width derivatives
+(``IMAGE_VARIANT_WIDTHS``) in each of ``IMAGE_VARIANT_FORMATS``, stored next
+to the upload as ``variants/<name>-<width>w.<ext>``. Serializers expose them
+as ``srcset`` maps (see ``product.media``) so grid pages can fetch a
+320px WebP instead of the full original.
+
+Resizing and encoding is CPU-bound, so it runs in a process pool of
+``IMAGE_VARIANT_WORKERS`` processes. The workers only run
+``product.imaging`` (Pillow on bytes); reading the upload, writing the
+variants and recording them on the image stay in this process. Uploads are
+queued once their transaction commits, and the admin save returns without
+waiting for them.
+``generate_image_variants`` backfills existing images through a pool of its
+own. With 0 workers variants are rendered inline (tests, small deployments).
+"""
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F
+from PIL import features
+
+from . import cards
+from .cache import bump_catalog_version
+from .imaging import FORMATS, render_variants
+from .models import ProductImage
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_formats():
+    """Configured formats this Pillow build can encode"""
+    return [
+        fmt for fmt in settings.IMAGE_VARIANT_FORMATS
+        if fmt in FORMATS and (fmt == 'jpeg' or features.check(fmt))
+    ]
+
+
+def variant_name(name, width, fmt):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}-{width}w.{FORMATS[fmt][1]}')
+
+
+def create_executor(workers):
+    # Forking a threaded server process is unsafe; spawned workers only
+    # import product.imaging, which needs no Django setup
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def get_executor():
+    """The shared pool for uploads, started on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = create_executor(settings.IMAGE_VARIANT_WORKERS)
+        return _executor
+
+
+def _job(name):
+    """Arguments for render_variants of the stored upload ``name``"""
+    storage = ProductImage._meta.get_field('image').storage
+    with storage.open(name) as f:
+        data = f.read()
+    return data, settings.IMAGE_VARIANT_WIDTHS, variant_formats(), settings.IMAGE_VARIANT_QUALITY
+
+
+def write_variants(name, rendered):
+    """Store rendered variants beside the upload; returns ``{format: {width: name}}``"""
+    storage = ProductImage._meta.get_field('image').storage
+    names = {}
+    for fmt, by_width in rendered.items():
+        names[fmt] = {}
+        for width, content in by_width.items():
+            target = variant_name(name, width, fmt)
+            # Regenerating replaces the file instead of adding a suffixed copy
+            storage.delete(target)
+            names[fmt][width] = storage.save(target, ContentFile(content))
+    return names
+
+
+def save_variants(results):
+    """Record ``(image id, source name, variants)`` results and refresh the cards.
+
+    Images whose upload changed since the job was queued are skipped; their
+    new upload has a job of its own.
+    """
+    images = ProductImage.objects.in_bulk([image_id for image_id, _, _ in results])
+    changed = []
+    for image_id, name, variants in results:
+        image = images.get(image_id)
+        if image is None or image.image.name != name:
+            continue
+        image.variants = variants
+        image.variants_source = name
+        changed.append(image)
+    if not changed:
+        return 0
+    ProductImage.objects.bulk_update(changed, ['variants', 'variants_source'])
+    cards.rebuild_cards({image.product_id for image in changed})
+    transaction.on_commit(bump_catalog_version)
+    return len(changed)
+
+
+def _finish(image_id, name, future, own_thread):
+    """Pool callback, normally run on the executor's result thread"""
+    try:
+        save_variants([(image_id, name, write_variants(name, future.result()))])
+    except Exception:
+        logger.exception(f"Generating variants of product image {image_id} failed")
+    finally:
+        if own_thread:
+            # That thread's connection would otherwise stay open
+            connection.close()
+
+
+def generate_variants(image_id, name):
+    """Render an upload's variants: in the pool, or inline with 0 workers"""
+    if settings.IMAGE_VARIANT_WORKERS <= 0:
+        save_variants([(image_id, name, write_variants(name, render_variants(*_job(name))))])
+        return
+    future = get_executor().submit(render_variants, *_job(name))
+    submitter = threading.get_ident()
+    # A future that is already done runs the callback right here
+    future.add_done_callback(
+        lambda done: _finish(image_id, name, done, threading.get_ident() != submitter)
+    )
+
+
+def schedule_variants(image):
+    """Generate an upload's variants once the saving transaction commits"""
+    image_id, name = image.pk, image.image.name
+    transaction.on_commit(lambda: generate_variants(image_id, name))
+
+
+def pending_images(force=False):
+    """Uploaded images whose variants are missing or stale"""
+    queryset = ProductImage.objects.exclude(image='').exclude(image__isnull=True)
+    if not force:
+        queryset = queryset.exclude(variants_source=F('image'))
+    return queryset
+
+
+def backfill(batch_size=50, workers=None, force=False):
+    """Generate variants for every pending image, a batch at a time across the workers.
+
+    Returns counts of the images processed and failed; failures (missing
+    or unreadable files) are logged and left pending.
+    """
+    workers = settings.IMAGE_VARIANT_WORKERS if workers is None else workers
+    queue = list(pending_images(force).order_by('pk').values_list('pk', 'image'))
+    stats = {'processed': 0, 'failed': 0}
+    executor = create_executor(workers) if workers > 0 else None
+    try:
+        for start in range(0, len(queue), batch_size):
+            jobs = []
+            for image_id, name in queue[start:start + batch_size]:
+                try:
+                    job = _job(name)
+                    work = executor.submit(render_variants, *job) if executor else render_variants(*job)
+                except Exception as e:
+                    logger.warning(f"Skipping product image {image_id}: {e}")
+                    stats['failed'] += 1
+                    continue
+                jobs.append((image_id, name, work))
+
+            results = []
+            for image_id, name, work in jobs:
+                try:
+                    rendered = work.result() if executor else work
+                    results.append((image_id, name, write_variants(name, rendered)))
+                except Exception as e:
+                    logger.warning(f"Skipping product image {image_id}: {e}")
+                    stats['failed'] += 1
+            stats['processed'] += save_variants(results)
+    finally:
+        if executor:
+            executor.shutdown()
+    return stats
@@ -0,0 +1,39 @@
+# product/imaging.py - Pillow resizing for the image variant worker processes
+"""
+The CPU-bound half of ``product.images``. Imports nothing from Django, so
+the spawned pool processes can run it without setting Django up.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Variant format: (Pillow format, file extension)
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+    'avif': ('AVIF', 'avif'),
+}
+
+
+def render_variants(data, widths, formats, quality):
+    """Resize and encode one image; returns ``{format: {width: bytes}}``.
+
+    Runs in the worker processes: pure Pillow, no storage or database.
+    Widths wider than the original are skipped rather than upscaled.
+    """
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    fitting = [width for width in widths if width < image.width] or [image.width]
+    rendered = {fmt: {} for fmt in formats}
+    for width in fitting:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            frame = resized.convert('RGB') if fmt == 'jpeg' else resized
+            buffer = BytesIO()
+            frame.save(buffer, format=FORMATS[fmt][0], quality=quality)
+            rendered[fmt][str(width)] = buffer.getvalue()
+    return rendered
@@ -0,0 +1,234 @@
+import json
+import math
+import statistics
+import subprocess
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from payment.testing import FakeCheckout
+from product.cache import bump_catalog_version
+from product.models import Cart, CartItem, Category, Product
+
+User = get_user_model()
+
+SHIPPING = {
+    'shipping_name': 'Benchmark User',
+    'shipping_email': 'bench@example.com',
+    'shipping_phone': '9999999999',
+    'shipping_address': '1 Benchmark Road',
+    'shipping_city': 'Mumbai',
+    'shipping_state': 'Maharashtra',
+    'shipping_zip_code': '400001',
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main API endpoints with the Django test client and print '
+        'p50/p95/p99 latency and query counts as JSON. All writes are rolled back.'
+    )
+
+    SCENARIOS = [
+        'product_list', 'product_list_filtered', 'product_detail', 'search',
+        'cart_add', 'cart_update', 'checkout', 'razorpay_checkout', 'review_create',
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', choices=self.SCENARIOS,
+                            help='Run only these scenarios (repeatable)')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Let catalog reads hit the response cache')
+        parser.add_argument('--search-term', default='cotton')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        self.options = options
+        products = list(
+            Product.objects.filter(is_active=True, stock__gte=50)
+            .order_by('pk').values_list('pk', 'slug')[:options['iterations'] + options['warmup']]
+        )
+        if not products:
+            raise CommandError('No products with stock; run generate_catalog first.')
+        self.product_ids = [pk for pk, _ in products]
+        self.product_slugs = [slug for _, slug in products]
+        self.category = Category.objects.order_by('pk').first()
+        self.client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+
+        results = {}
+        with transaction.atomic():
+            self.user = User.objects.create(
+                email=f'bench-{uuid.uuid4().hex[:8]}@example.com',
+                username=f'bench-{uuid.uuid4().hex[:8]}',
+            )
+            self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+            for name in options['scenario'] or self.SCENARIOS:
+                results[name] = self.run_scenario(name)
+                self.stderr.write(
+                    f"{name:24} p50={results[name]['p50_ms']:.1f}ms "
+                    f"p95={results[name]['p95_ms']:.1f}ms "
+                    f"queries={results[name]['queries_max']}"
+                )
+            transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'products': Product.objects.count(),
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+            },
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
+
+    def run_scenario(self, name):
+        setup = getattr(self, f'setup_{name}', None)
+        request = getattr(self, f'request_{name}')
+        if setup:
+            setup()
+
+        timings, queries, statuses = [], [], {}
+        total = self.options['warmup'] + self.options['iterations']
+        for i in range(total):
+            prepare = getattr(self, f'prepare_{name}', None)
+            if prepare:
+                prepare(i)
+            if not self.options['warm_cache']:
+                bump_catalog_version()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = request(i)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i < self.options['warmup']:
+                continue
+            timings.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        teardown = getattr(self, f'teardown_{name}', None)
+        if teardown:
+            teardown()
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries_median': statistics.median(queries),
+            'queries_max': max(queries),
+            'status_codes': statuses,
+        }
+
+    def product_for(self, i):
+        return self.product_ids[i % len(self.product_ids)]
+
+    # Catalog reads
+
+    def request_product_list(self, i):
+        return self.client.get('/api/products/', {'page': 1 + i % 3})
+
+    def request_product_list_filtered(self, i):
+        params = {'ordering': 'price', 'in_stock': 'true'}
+        if self.category:
+            params['category'] = self.category.slug
+        return self.client.get('/api/products/', params)
+
+    def request_product_detail(self, i):
+        return self.client.get(f'/api/products/{self.product_slugs[i % len(self.product_slugs)]}/')
+
+    def request_search(self, i):
+        return self.client.get('/api/products/', {'search': self.options['search_term']})
+
+    # Cart and checkout
+
+    def cart(self):
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+        return cart
+
+    def prepare_cart_add(self, i):
+        self.cart().items.all().delete()
+
+    def request_cart_add(self, i):
+        return self.client.post(
+            '/api/cart/add_item/',
+            {'product_id': self.product_for(i), 'quantity': 1},
+            content_type='application/json', **self.auth
+        )
+
+    def setup_cart_update(self):
+        cart = self.cart()
+        cart.items.all().delete()
+        self.cart_item = CartItem.objects.create(cart=cart, product_id=self.product_ids[0])
+
+    def request_cart_update(self, i):
+        return self.client.patch(
+            '/api/cart/update_item/',
+            {'item_id': self.cart_item.pk, 'quantity': 1 + i % 3},
+            content_type='application/json', **self.auth
+        )
+
+    def prepare_checkout(self, i):
+        cart = self.cart()
+        cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=self.product_for(i + offset), quantity=1)
+            for offset in range(3)
+        ])
+
+    def request_checkout(self, i):
+        return self.client.post(
+            '/api/orders/', SHIPPING, content_type='application/json', **self.auth
+        )
+
+    def setup_razorpay_checkout(self):
+        # Create order -> pay -> verify through the endpoints, with the fake gateway
+        self.payments = FakeCheckout(self.client, **self.auth).install()
+
+    prepare_razorpay_checkout = prepare_checkout
+
+    def request_razorpay_checkout(self, i):
+        created, verified = self.payments.checkout(SHIPPING)
+        return verified or created
+
+    def teardown_razorpay_checkout(self):
+        self.payments.uninstall()
+
+    def request_review_create(self, i):
+        return self.client.post(
+            '/api/reviews/',
+            {'product_id': self.product_for(i), 'rating': 1 + i % 5, 'comment': 'Benchmark'},
+            content_type='application/json', **self.auth
+        )
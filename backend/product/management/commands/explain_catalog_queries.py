@@ -0,0 +1,120 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from product.models import (
+    Category, Product, ProductImage, ProductColor, ProductSize, Order
+)
+from product.views import ProductViewSet
+
+# Small lookup tables the planner may legitimately scan
+DEFAULT_ALLOWED_SCANS = [Category._meta.db_table]
+
+PAGE_SIZE = 12
+
+
+def find_sequential_scans(vendor, plan):
+    """Return the table names the plan reads with a full sequential scan"""
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if vendor == 'sqlite':
+        # "SCAN t USING [COVERING] INDEX i" walks an index; a bare "SCAN t" does not
+        return [
+            match.group(1)
+            for line in plan.splitlines()
+            if (match := re.search(r'\bSCAN (\w+)\s*$', line))
+        ]
+    raise CommandError(f'EXPLAIN parsing is not supported for {vendor}')
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the canonical catalog and order listing queries and fail if '
+        'any of them falls back to a sequential scan. Run against a seeded '
+        'large catalog; on tiny tables the planner prefers scans anyway.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-products', type=int, default=10000,
+                            help='Refuse to run on catalogs smaller than this')
+        parser.add_argument('--force', action='store_true',
+                            help='Run even if the catalog is smaller than --min-products')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Refresh planner statistics (ANALYZE) first')
+        parser.add_argument('--allow-scan', action='append', default=None,
+                            metavar='TABLE', help='Tables allowed to be scanned')
+        parser.add_argument('--min-price', default='500')
+        parser.add_argument('--max-price', default='1000')
+
+    def handle(self, *args, **options):
+        product_count = Product.objects.count()
+        if product_count < options['min_products'] and not options['force']:
+            raise CommandError(
+                f'Only {product_count} products; seed a large catalog first '
+                f'or pass --force.'
+            )
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        allowed = set(options['allow_scan'] or DEFAULT_ALLOWED_SCANS)
+        failures = []
+        for name, queryset in self.canonical_queries(options):
+            plan = queryset.explain()
+            scans = [t for t in find_sequential_scans(connection.vendor, plan) if t not in allowed]
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'SEQ SCAN  {name}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK        {name}'))
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + '\n')
+
+        if failures:
+            raise CommandError(f'{len(failures)} query(ies) use a sequential scan')
+
+    def product_list(self, params):
+        """The queryset ProductViewSet.list builds for the given query params"""
+        view = ProductViewSet(action_map={'get': 'list'})
+        view.request = view.initialize_request(APIRequestFactory().get('/api/products/', params))
+        view.action = 'list'
+        view.format_kwarg = None
+        view.kwargs = {}
+        return view.filter_queryset(view.get_queryset())[:PAGE_SIZE]
+
+    def canonical_queries(self, options):
+        category = Category.objects.order_by('pk').first()
+        order = Order.objects.order_by('pk').first()
+        product_ids = list(Product.objects.order_by('-pk').values_list('pk', flat=True)[:PAGE_SIZE])
+        price_range = {'min_price': options['min_price'], 'max_price': options['max_price']}
+
+        queries = [
+            ('products: default listing', self.product_list({})),
+            ('products: ordered by price', self.product_list({'ordering': 'price'})),
+            ('products: ordered by rating', self.product_list({'ordering': '-rating'})),
+            ('products: in stock', self.product_list({'in_stock': 'true'})),
+            ('products: price range', self.product_list({**price_range, 'ordering': 'price'})),
+        ]
+        if category:
+            queries += [
+                ('products: category', self.product_list({'category': category.slug})),
+                ('products: category by price',
+                 self.product_list({'category': category.slug, 'ordering': 'price'})),
+            ]
+        queries += [
+            ('images: prefetch',
+             ProductImage.objects.filter(product_id__in=product_ids).order_by('order', 'id')),
+            ('images: primary',
+             ProductImage.objects.filter(product_id__in=product_ids, is_primary=True)),
+            ('colors: prefetch', ProductColor.objects.filter(product_id__in=product_ids)),
+            ('sizes: prefetch', ProductSize.objects.filter(product_id__in=product_ids)),
+        ]
+        if order:
+            queries.append((
+                'orders: user listing',
+                Order.objects.filter(user_id=order.user_id).order_by('-created_at')[:PAGE_SIZE]
+            ))
+        return queries
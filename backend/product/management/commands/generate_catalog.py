@@ -0,0 +1,269 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from product import cards, search
+from product.cache import bump_catalog_version
+from product.models import (
+    Category, Product, ProductImage, ProductColor, ProductSize,
+    ProductSpecification, Cart, CartItem, Order, OrderItem, Review
+)
+
+User = get_user_model()
+
+ADJECTIVES = [
+    'Classic', 'Premium', 'Essential', 'Vintage', 'Slim', 'Relaxed', 'Urban',
+    'Athletic', 'Organic', 'Lightweight', 'Heavyweight', 'Tailored', 'Everyday',
+]
+NOUNS = [
+    'T-Shirt', 'Hoodie', 'Jacket', 'Jeans', 'Chinos', 'Sweater', 'Polo',
+    'Shorts', 'Blazer', 'Joggers', 'Cardigan', 'Overshirt', 'Parka',
+]
+MATERIALS = ['cotton', 'linen', 'wool', 'denim', 'fleece', 'polyester blend']
+COLORS = ['Black', 'White', 'Navy', 'Gray', 'Olive', 'Beige', 'Burgundy', 'Blue', 'Brown']
+SIZES = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+SPECIFICATIONS = [
+    'Machine washable', 'Pre-shrunk fabric', 'Reinforced stitching', 'Tagless comfort',
+    'Breathable fabric', 'Wrinkle resistant', 'Moisture wicking', 'Relaxed fit',
+]
+REVIEW_COMMENTS = [
+    'Great fit and quality.', 'Runs a little small.', 'Fabric feels premium.',
+    'Colour faded after a few washes.', 'Exactly as pictured.', 'Would buy again.',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Deterministically generate a large synthetic catalog with users, '
+        'carts, orders and reviews for load testing. The same --seed always '
+        'produces the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products-per-category', type=int, default=500)
+        parser.add_argument('--images-per-product', type=int, default=5)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--carts', type=int, default=None,
+                            help='Users with a cart (default: half of --users)')
+        parser.add_argument('--orders', type=int, default=None,
+                            help='Orders to create (default: 2 x --users)')
+        parser.add_argument('--max-reviews-per-product', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prefix', default='gen',
+                            help='Prefix for generated slugs, emails and order numbers')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated data with this prefix first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        users = options['users']
+        carts = options['carts'] if options['carts'] is not None else users // 2
+        orders = options['orders'] if options['orders'] is not None else users * 2
+
+        if options['clear']:
+            self.clear()
+        elif Category.objects.filter(slug__startswith=f'{self.prefix}-').exists():
+            raise CommandError(
+                f'Generated data with prefix "{self.prefix}" already exists; '
+                f'use --clear or a different --prefix.'
+            )
+
+        started = time.monotonic()
+        user_ids = self.create_users(users)
+        categories = self.create_categories(options['categories'])
+        product_ids = self.create_products(
+            categories, options['products_per_category'],
+            options['images_per_product'], user_ids, options['max_reviews_per_product']
+        )
+        self.create_carts(user_ids[:carts], product_ids)
+        self.create_orders(orders, user_ids, product_ids)
+        transaction.on_commit(bump_catalog_version)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(categories)} categories, {len(product_ids)} products, '
+            f'{len(user_ids)} users, {carts} carts and {orders} orders '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
+
+    def clear(self):
+        self.stdout.write(f'Deleting generated data with prefix "{self.prefix}"...')
+        with transaction.atomic():
+            Order.objects.filter(order_number__startswith=f'{self.prefix.upper()}-').delete()
+            Category.objects.filter(slug__startswith=f'{self.prefix}-').delete()
+            User.objects.filter(email__startswith=f'{self.prefix}-user').delete()
+
+    def batched(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def create_users(self, count):
+        # Hashing is deliberately slow; every generated user shares one hash
+        password = make_password('benchmark-password')
+        user_ids = []
+        for start in range(0, count, self.batch_size):
+            batch = [
+                User(
+                    email=f'{self.prefix}-user{i}@example.com',
+                    username=f'{self.prefix}-user{i}',
+                    first_name=f'User{i}',
+                    password=password,
+                )
+                for i in range(start, min(start + self.batch_size, count))
+            ]
+            with transaction.atomic():
+                user_ids.extend(u.pk for u in User.objects.bulk_create(batch))
+        self.stdout.write(f'Created {len(user_ids)} users')
+        return user_ids
+
+    def create_categories(self, count):
+        categories = Category.objects.bulk_create([
+            Category(
+                name=f'{self.prefix.title()} {NOUNS[i % len(NOUNS)]}s {i}',
+                slug=f'{self.prefix}-category-{i}',
+                description=f'Generated category {i}',
+            )
+            for i in range(count)
+        ])
+        self.stdout.write(f'Created {len(categories)} categories')
+        return categories
+
+    def create_products(self, categories, per_category, images_per_product, user_ids, max_reviews):
+        rng = self.rng
+        product_ids = []
+        total = len(categories) * per_category
+        for start in range(0, total, self.batch_size):
+            products, reviews = [], []
+            for i in range(start, min(start + self.batch_size, total)):
+                category = categories[i % len(categories)]
+                stock = rng.randint(0, 200)
+                products.append(Product(
+                    name=f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS).title()} '
+                         f'{rng.choice(NOUNS)} {i}',
+                    slug=f'{self.prefix}-product-{i}',
+                    category=category,
+                    price=Decimal(rng.randint(999, 19999)) / 100,
+                    description=(
+                        f'{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} piece '
+                        f'for everyday wear. {rng.choice(SPECIFICATIONS)}.'
+                    ),
+                    stock=stock,
+                    in_stock=stock > 0,
+                ))
+                review_users = rng.sample(user_ids, min(rng.randint(0, max_reviews), len(user_ids)))
+                reviews.append([(u, rng.randint(1, 5), rng.choice(REVIEW_COMMENTS)) for u in review_users])
+
+            for product, product_reviews in zip(products, reviews):
+                if product_reviews:
+                    ratings = [rating for _, rating, _ in product_reviews]
+                    product.rating = round(Decimal(sum(ratings)) / len(ratings), 1)
+                    product.reviews_count = len(ratings)
+                    product.rating_sum = sum(ratings)
+                    for stars in range(1, 6):
+                        setattr(product, f'rating_{stars}_count', ratings.count(stars))
+
+            with transaction.atomic():
+                products = Product.objects.bulk_create(products)
+                self.create_product_children(products, reviews, images_per_product)
+                search.index_products(products)
+                cards.rebuild_cards([p.pk for p in products])
+            product_ids.extend(p.pk for p in products)
+            self.stdout.write(f'Created {len(product_ids)}/{total} products')
+        return product_ids
+
+    def create_product_children(self, products, reviews, images_per_product):
+        rng = self.rng
+        images, colors, sizes, specs, review_rows = [], [], [], [], []
+        for product, product_reviews in zip(products, reviews):
+            product_colors = rng.sample(COLORS, rng.randint(1, 4))
+            for order in range(images_per_product):
+                images.append(ProductImage(
+                    product=product,
+                    image_url=f'https://picsum.photos/seed/{product.slug}-{order}/500/500',
+                    is_primary=(order == 0),
+                    order=order,
+                    color_name=product_colors[order % len(product_colors)],
+                ))
+            colors.extend(ProductColor(product=product, color_name=c) for c in product_colors)
+            start = rng.randint(0, 2)
+            sizes.extend(ProductSize(product=product, size_name=s) for s in SIZES[start:start + 4])
+            specs.extend(
+                ProductSpecification(product=product, specification=spec, order=order)
+                for order, spec in enumerate(rng.sample(SPECIFICATIONS, 3))
+            )
+            review_rows.extend(
+                Review(product=product, user_id=user_id, rating=rating, comment=comment)
+                for user_id, rating, comment in product_reviews
+            )
+
+        for model, rows in (
+            (ProductImage, images), (ProductColor, colors), (ProductSize, sizes),
+            (ProductSpecification, specs), (Review, review_rows),
+        ):
+            for batch in self.batched(rows):
+                model.objects.bulk_create(batch)
+
+    def create_carts(self, user_ids, product_ids):
+        rng = self.rng
+        for batch in self.batched(user_ids):
+            with transaction.atomic():
+                carts = Cart.objects.bulk_create([Cart(user_id=u) for u in batch])
+                items = []
+                for cart in carts:
+                    for product_id in rng.sample(product_ids, min(rng.randint(1, 5), len(product_ids))):
+                        items.append(CartItem(
+                            cart=cart, product_id=product_id, quantity=rng.randint(1, 3),
+                            selected_color=rng.choice(COLORS), selected_size=rng.choice(SIZES),
+                        ))
+                CartItem.objects.bulk_create(items)
+        self.stdout.write(f'Created {len(user_ids)} carts')
+
+    def create_orders(self, count, user_ids, product_ids):
+        rng = self.rng
+        generated = Product.objects.filter(slug__startswith=f'{self.prefix}-product-')
+        prices, names = {}, {}
+        for pk, price, name in generated.values_list('pk', 'price', 'name').iterator():
+            prices[pk] = price
+            names[pk] = name
+        statuses = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+        for start in range(0, count, self.batch_size):
+            orders, lines = [], []
+            for i in range(start, min(start + self.batch_size, count)):
+                chosen = rng.sample(product_ids, min(rng.randint(1, 4), len(product_ids)))
+                order_lines = [(p, rng.randint(1, 3)) for p in chosen]
+                status = rng.choice(statuses)
+                orders.append(Order(
+                    user_id=rng.choice(user_ids),
+                    order_number=f'{self.prefix.upper()}-{i:08d}',
+                    total_amount=sum(prices[p] * q for p, q in order_lines),
+                    status=status,
+                    payment_status='PENDING' if status == 'pending' else 'PAID',
+                    is_paid=status != 'pending',
+                    shipping_name=f'User {i}',
+                    shipping_email=f'{self.prefix}-order{i}@example.com',
+                    shipping_phone='9999999999',
+                    shipping_address=f'{i} Generated Street',
+                    shipping_city='Mumbai',
+                    shipping_state='Maharashtra',
+                    shipping_zip_code='400001',
+                ))
+                lines.append(order_lines)
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order, product_id=p, product_name=names[p],
+                        product_price=prices[p], quantity=q,
+                    )
+                    for order, order_lines in zip(orders, lines)
+                    for p, q in order_lines
+                ], batch_size=self.batch_size)
+        self.stdout.write(f'Created {count} orders')
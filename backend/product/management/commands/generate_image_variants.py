@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from product import images
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the resized JPEG/WebP/AVIF variants of uploaded product images '
+        'that do not have current ones, in parallel worker processes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (default IMAGE_VARIANT_WORKERS; 0 renders inline)')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate variants that are already current')
+
+    def handle(self, *args, **options):
+        stats = images.backfill(
+            batch_size=options['batch_size'], workers=options['workers'], force=options['force']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated variants for {stats['processed']} image(s); {stats['failed']} failed"
+        ))
@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from product.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete guest carts that have not changed for longer than a session '
+        'lives (SESSION_COOKIE_AGE by default), in chunks. Carts whose session '
+        'is still active in the database are kept.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=None,
+                            help='Age in days after which a guest cart is abandoned')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the carts that would be deleted')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None:
+            max_age = timedelta(days=options['days'])
+        else:
+            max_age = timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        now = timezone.now()
+
+        abandoned = Cart.objects.filter(user__isnull=True, updated_at__lt=now - max_age)
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+            # Reading a cart doesn't touch it, but it does keep the session alive
+            abandoned = abandoned.exclude(
+                session_id__in=Session.objects.filter(expire_date__gt=now).values('session_key')
+            )
+
+        if options['dry_run']:
+            self.stdout.write(f'{abandoned.count()} abandoned guest carts')
+            return
+
+        started = time.monotonic()
+        deleted = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                abandoned.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                # Items go with their cart (CASCADE)
+                Cart.objects.filter(pk__in=ids, user__isnull=True).delete()
+            deleted += len(ids)
+            last_pk = ids[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Deleted {deleted} guest carts')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} abandoned guest carts in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from product import cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized product cards that listing pages are served from'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = cards.rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} product cards'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from product.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute product rating sums, counts and averages from the Review table '
+        'for products whose stored aggregates have drifted. Reviews are the source '
+        'of truth: ratings seeded by import_products without Review rows count as '
+        'drift, so check --dry-run first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the drifted products')
+
+    def handle(self, *args, **options):
+        product_ids = reconcile_ratings(
+            batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        verb = 'Found' if options['dry_run'] else 'Reconciled'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(product_ids)} product(s) with drifted ratings'
+        ))
@@ -0,0 +1,76 @@
+# product/media.py - Public URLs for product images
+"""
+Resolves the URLs serializers emit for product images.
+
+Uploaded files are served from ``MEDIA_BASE_URL`` (a CDN origin) when it is
+set, otherwise from the origin of the request; external image URLs pass
+through unchanged. The expensive parts are memoized: the storage backend's
+URL for each file name once per process, and the request origin (host
+validation, scheme detection) once per request. What is left per image is
+a string concatenation. ``srcset`` turns an image's resized variants
+(see ``product.images``) into ``srcset`` attribute values per format.
+
+The storage memo assumes public, unsigned file URLs, as with the default
+``FileSystemStorage`` or a CDN-fronted bucket.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=10000)
+def _storage_url(storage, name):
+    return storage.url(name)
+
+
+def image_path(image):
+    """Media URL of an uploaded image (usually site-relative), or its external URL"""
+    if image.image:
+        return _storage_url(image.image.storage, image.image.name)
+    return image.image_url or None
+
+
+def media_origin(request=None):
+    """``MEDIA_BASE_URL``, else the request's scheme and host; '' without either"""
+    if settings.MEDIA_BASE_URL:
+        return settings.MEDIA_BASE_URL
+    if request is None:
+        return ''
+    origin = getattr(request, '_media_origin', None)
+    if origin is None:
+        origin = request._media_origin = request.build_absolute_uri('/').rstrip('/')
+    return origin
+
+
+def public_url(path, request=None):
+    """Absolute URL for a path from ``image_path``"""
+    if not path or not path.startswith('/') or path.startswith('//'):
+        return path or None
+    return media_origin(request) + path
+
+
+def image_url(image, request=None):
+    """Absolute URL of a ProductImage"""
+    return public_url(image_path(image), request)
+
+
+def variant_paths(image):
+    """``{format: {width: media URL}}`` of an image's variants; {} while they are stale"""
+    if not image.image or image.variants_source != image.image.name:
+        return {}
+    storage = image.image.storage
+    return {
+        fmt: {width: _storage_url(storage, name) for width, name in by_width.items()}
+        for fmt, by_width in image.variants.items()
+    }
+
+
+def srcset(variants, request=None):
+    """``{format: "url 320w, url 640w"}`` for ``variant_paths`` output"""
+    return {
+        fmt: ', '.join(
+            f'{public_url(path, request)} {width}w'
+            for width, path in sorted(by_width.items(), key=lambda item: int(item[0]))
+        )
+        for fmt, by_width in variants.items()
+    }
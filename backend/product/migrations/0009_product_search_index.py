@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# Frozen copy of the product.search index DDL and document SQL at this
+# migration; later changes to product.search must not alter it
+PG_TABLE = 'product_search'
+FTS_TABLE = 'product_search_fts'
+
+CREATE_SQL = {
+    'postgresql': [
+        f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+        f"product_id bigint PRIMARY KEY REFERENCES product_product(id) ON DELETE CASCADE, "
+        f"document tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_document_gin ON {PG_TABLE} USING GIN (document)",
+    ],
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"name, description, category, tokenize='porter unicode61')",
+    ],
+}
+
+INSERT_SQL = {
+    'postgresql': (
+        f"INSERT INTO {PG_TABLE} (product_id, document) VALUES (%s, "
+        f"setweight(to_tsvector('english', %s), 'A') || "
+        f"setweight(to_tsvector('english', %s), 'C') || "
+        f"setweight(to_tsvector('english', %s), 'B')) "
+        f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+    ),
+    'sqlite': f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) VALUES (%s, %s, %s, %s)",
+}
+
+DROP_SQL = {
+    'postgresql': f"DROP TABLE IF EXISTS {PG_TABLE}",
+    'sqlite': f"DROP TABLE IF EXISTS {FTS_TABLE}",
+}
+
+BATCH_SIZE = 1000
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    for sql in CREATE_SQL[vendor]:
+        schema_editor.execute(sql)
+
+    Product = apps.get_model('product', 'Product')
+    documents = Product.objects.order_by('pk').values_list(
+        'pk', 'name', 'description', 'category__name'
+    )
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for pk, name, description, category in documents.iterator(chunk_size=BATCH_SIZE):
+            batch.append((pk, name or '', description or '', category or ''))
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(INSERT_SQL[vendor], batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL[vendor], batch)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in DROP_SQL:
+        schema_editor.execute(DROP_SQL[vendor])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_alter_order_payment_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_listing_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='import_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the last imported feed record (import_products --incremental)', max_length=64),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+from django.db import migrations, models
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+
+
+def backfill_rating_sum(apps, schema_editor):
+    # Existing ratings may come from imports without Review rows; keep their average
+    Product = apps.get_model('product', 'Product')
+    Product.objects.update(
+        rating_sum=Cast(Round(F('rating') * F('reviews_count')), IntegerField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0018_order_refund_worker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def image_url(image):
+    if image.image:
+        return image.image.url
+    return image.image_url or None
+
+
+def card_fields(product):
+    # Frozen copy of product.cards.card_fields for this migration's models
+    images = sorted(product.images.all(), key=lambda image: (image.order, image.pk))
+    primary = next((image for image in images if image.is_primary), None)
+    primary = primary or (images[0] if images else None)
+    return {
+        'name': product.name,
+        'slug': product.slug,
+        'price': product.price,
+        'rating': product.rating,
+        'reviews_count': product.reviews_count,
+        'in_stock': product.in_stock,
+        'created_at': product.created_at,
+        'category_id': product.category_id,
+        'category_name': product.category.name,
+        'category_slug': product.category.slug,
+        'image': image_url(primary) if primary else None,
+        'images': [
+            {
+                'id': image.pk,
+                'image_url': image_url(image),
+                'color_name': image.color_name,
+                'is_primary': image.is_primary,
+                'order': image.order,
+            }
+            for image in images
+        ],
+        'colors': [color.color_name for color in sorted(product.colors.all(), key=lambda c: c.pk)],
+        'sizes': [size.size_name for size in sorted(product.sizes.all(), key=lambda s: s.pk)],
+    }
+
+
+def backfill_cards(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    ProductCard = apps.get_model('product', 'ProductCard')
+    products = Product.objects.filter(is_active=True).select_related('category').prefetch_related(
+        'images', 'colors', 'sizes'
+    ).order_by('pk')
+    batch = []
+    for product in products.iterator(chunk_size=500):
+        batch.append(ProductCard(product_id=product.pk, **card_fields(product)))
+        if len(batch) >= 500:
+            ProductCard.objects.bulk_create(batch)
+            batch = []
+    ProductCard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0020_rating_histogram_review_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='product.product')),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_slug', models.SlugField(max_length=100)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('rating', models.DecimalField(decimal_places=1, default=0.0, max_digits=2)),
+                ('reviews_count', models.IntegerField(default=0)),
+                ('in_stock', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('image', models.CharField(blank=True, max_length=500, null=True)),
+                ('images', models.JSONField(default=list)),
+                ('colors', models.JSONField(default=list)),
+                ('sizes', models.JSONField(default=list)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.category')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'product'], name='card_created_id_idx'), models.Index(fields=['price', 'product'], name='card_price_id_idx'), models.Index(fields=['rating', 'product'], name='card_rating_id_idx'), models.Index(fields=['category_slug', 'created_at'], name='card_cat_created_idx'), models.Index(fields=['category_slug', 'price'], name='card_cat_price_idx'), models.Index(fields=['in_stock', 'created_at'], name='card_instock_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_cards, migrations.RunPython.noop),
+    ]
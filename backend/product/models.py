@@ -1,7 +1,11 @@
 # product/models.py - INTEGRATED & CLEAN VERSION
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -26,6 +30,19 @@ class Category(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_images(self):
+        """Prefetch ordered images and annotate the primary image id"""
+        primary_image = ProductImage.objects.filter(
+            product=models.OuterRef('pk'), is_primary=True
+        ).order_by('order', 'id').values('id')[:1]
+        return self.annotate(
+            primary_image_id=models.Subquery(primary_image)
+        ).prefetch_related(
+            models.Prefetch('images', queryset=ProductImage.objects.order_by('order', 'id'))
+        )
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
@@ -34,14 +51,59 @@ class Product(models.Model):
     description = models.TextField()
     rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
     reviews_count = models.IntegerField(default=0)
+    # Sum of review ratings; rating == rating_sum / reviews_count (product/ratings.py)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # Star histogram: number of reviews with each rating
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     in_stock = models.BooleanField(default=True)
     stock = models.IntegerField(default=0)  # Actual stock quantity
     is_active = models.BooleanField(default=True)
+    import_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Fingerprint of the last imported feed record (import_products --incremental)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination over the listing's ordering fields (id breaks ties)
+            models.Index(
+                fields=['created_at', 'id'], name='product_active_created_id_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['price', 'id'], name='product_active_price_id_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['rating', 'id'], name='product_active_rating_id_idx',
+                condition=models.Q(is_active=True)
+            ),
+            # Listing filters: category and stock, combined with the default/price ordering
+            models.Index(
+                fields=['category', 'created_at'], name='product_active_cat_created_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['category', 'price'], name='product_active_cat_price_idx',
+                condition=models.Q(is_active=True)
+            ),
+            models.Index(
+                fields=['in_stock', 'created_at'], name='product_active_instock_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -53,6 +115,25 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def rating_histogram(self):
+        return {str(stars): getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
+    def get_primary_image(self):
+        """Return the primary image, falling back to the first image.
+
+        Uses prefetched images (and the ``primary_image_id`` annotation from
+        ``with_images()``) when available, so no extra query is issued.
+        """
+        images = list(self.images.all())
+        if not images:
+            return None
+        if hasattr(self, 'primary_image_id'):
+            primary = next((img for img in images if img.id == self.primary_image_id), None)
+        else:
+            primary = next((img for img in images if img.is_primary), None)
+        return primary or images[0]
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='images')
@@ -61,9 +142,17 @@ class ProductImage(models.Model):
     is_primary = models.BooleanField(default=False)
     order = models.IntegerField(default=0)
     color_name = models.CharField(max_length=50, blank=True, null=True)
+    # Resized derivatives of the upload: {format: {width: file name}} (product/images.py)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    # The upload the variants were made from; a new upload makes them stale
+    variants_source = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Primary-image lookup and ordered image prefetch per product
+            models.Index(fields=['product', 'is_primary', 'order'], name='productimage_primary_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - Image {self.order}"
@@ -93,6 +182,46 @@ class ProductSize(models.Model):
         return f"{self.product.name} - {self.size_name}"
 
 
+class ProductCard(models.Model):
+    """Denormalized listing row for one active product (see product/cards.py)"""
+    # Shares the product's id so cards page, search and sort like products
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, db_column='id',
+        related_name='card'
+    )
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=100)
+    category_slug = models.SlugField(max_length=100)
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
+    reviews_count = models.IntegerField(default=0)
+    in_stock = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    # Primary image URL; uploaded files are stored as their media path
+    image = models.CharField(max_length=500, blank=True, null=True)
+    image_variants = models.JSONField(default=dict)
+    images = models.JSONField(default=list)
+    colors = models.JSONField(default=list)
+    sizes = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Same listing orderings and filters as the Product indexes
+            models.Index(fields=['created_at', 'product'], name='card_created_id_idx'),
+            models.Index(fields=['price', 'product'], name='card_price_id_idx'),
+            models.Index(fields=['rating', 'product'], name='card_rating_id_idx'),
+            models.Index(fields=['category_slug', 'created_at'], name='card_cat_created_idx'),
+            models.Index(fields=['category_slug', 'price'], name='card_cat_price_idx'),
+            models.Index(fields=['in_stock', 'created_at'], name='card_instock_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - Card"
+
+
 class ProductSpecification(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='specifications')
     specification = models.CharField(max_length=255)
@@ -115,6 +244,51 @@ class ProductMaterial(models.Model):
         return f"{self.product.name} - Materials"
 
 
+def cart_totals(items):
+    """Aggregate expressions for the price and item totals of ``items`` rows.
+
+    ``items`` is the path from the queried model to CartItem ('' when
+    querying CartItem itself).
+    """
+    prefix = f'{items}__' if items else ''
+    return {
+        'items_total_price': Coalesce(
+            models.Sum(
+                models.F(f'{prefix}quantity') * models.F(f'{prefix}product__price'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+            models.Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ),
+        'items_total_quantity': Coalesce(models.Sum(f'{prefix}quantity'), 0),
+    }
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate price and item totals, aggregated in the database"""
+        return self.annotate(**cart_totals('items'))
+
+    def for_serialization(self):
+        """Prefetch everything CartSerializer reads.
+
+        Costs a fixed number of queries however many items the cart holds:
+        items with their product and category, then images, colors and sizes.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                'items',
+                queryset=CartItem.objects.select_related('product__category').prefetch_related(
+                    models.Prefetch(
+                        'product__images', queryset=ProductImage.objects.order_by('order', 'id')
+                    ),
+                    'product__colors',
+                    'product__sizes',
+                ).order_by('id')
+            )
+        )
+
+
 class Cart(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, 
@@ -123,22 +297,64 @@ class Cart(models.Model):
         null=True, 
         blank=True
     )
-    session_id = models.CharField(max_length=255, null=True, blank=True)
+    session_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    # Bumped on every change to the items so clients can spot a stale cart
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # purge_guest_carts: abandoned guest carts, oldest first
+            models.Index(
+                fields=['updated_at'],
+                name='cart_guest_updated_idx',
+                condition=models.Q(user__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         if self.user:
             return f"Cart of {self.user.email}"
         return f"Guest Cart {self.session_id}"
 
+    def bump_version(self):
+        """Record a change to the cart's items; returns the new version"""
+        Cart.objects.filter(pk=self.pk).update(
+            version=models.F('version') + 1, updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['version', 'updated_at'])
+        return self.version
+
+    def summary(self):
+        """Price and item totals in a single aggregate query"""
+        totals = CartItem.objects.filter(cart=self).aggregate(**cart_totals(''))
+        self.items_total_price = totals['items_total_price']
+        self.items_total_quantity = totals['items_total_quantity']
+        return {'total_price': self.items_total_price, 'total_items': self.items_total_quantity}
+
+    def _totals_loaded(self):
+        """Make sure the totals are known, without loading every item"""
+        if hasattr(self, 'items_total_price'):
+            return
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            items = self.items.all()
+            self.items_total_price = sum((item.subtotal for item in items), Decimal('0.00'))
+            self.items_total_quantity = sum(item.quantity for item in items)
+        else:
+            self.summary()
+
     @property
     def total_price(self):
-        return sum(item.subtotal for item in self.items.all())
+        self._totals_loaded()
+        return self.items_total_price
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        self._totals_loaded()
+        return self.items_total_quantity
 
 
 class CartItem(models.Model):
@@ -161,6 +377,38 @@ class CartItem(models.Model):
     def subtotal(self):
         return self.product.price * self.quantity
 
+class StockReservation(models.Model):
+    """Stock held for a pending Razorpay order until it is paid or expires"""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('committed', 'Committed'),
+        ('released', 'Released'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    razorpay_order_id = models.CharField(max_length=100, db_index=True)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['expires_at'], name='reservation_active_exp_idx',
+                condition=models.Q(status='active')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} for {self.razorpay_order_id} ({self.status})"
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -233,12 +481,34 @@ class Order(models.Model):
         null=True,
         help_text="Admin notes about refund processing"
     )
+    # Refund worker (process_refunds) bookkeeping
+    razorpay_refund_id = models.CharField(max_length=100, blank=True, null=True)
+    refund_attempts = models.PositiveSmallIntegerField(default=0)
+    refund_next_attempt_at = models.DateTimeField(blank=True, null=True)
+    refund_error = models.TextField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_id_idx'),
+            # Webhook and refund workers look orders up by gateway ids
+            models.Index(fields=['razorpay_order_id'], name='order_rzp_order_idx'),
+            # The refund worker's queue
+            models.Index(
+                fields=['refund_requested_at'], name='order_refund_pending_idx',
+                condition=models.Q(payment_status='REFUND_PENDING', razorpay_refund_id__isnull=True)
+            ),
+        ]
+        constraints = [
+            # One order per captured payment; also the index webhooks look it up by
+            models.UniqueConstraint(
+                fields=['razorpay_payment_id'], name='order_rzp_payment_unique',
+                condition=models.Q(razorpay_payment_id__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number}"
@@ -310,6 +580,28 @@ class Review(models.Model):
     class Meta:
         unique_together = ('product', 'user')
         ordering = ['-created_at']
+        indexes = [
+            # The product review feed, newest first (id breaks ties)
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.product.name} - {self.rating}★"
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request made with an Idempotency-Key header"""
+    # "user:<id>" or "session:<key>"; keys are only unique per client
+    owner = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    # Both stay empty while the first request is still running
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('owner', 'key')
 
     def __str__(self):
-        return f"{self.user.email} - {self.product.name} - {self.rating}★"
\ No newline at end of file
+        return f"{self.owner} {self.key}"
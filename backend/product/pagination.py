@@ -0,0 +1,163 @@
+# product/pagination.py - Opt-in keyset (cursor) pagination
+"""
+Keyset pagination for deep pages and infinite scroll.
+
+Clients opt in by sending ``?cursor=`` (empty for the first page) and then
+follow the ``next``/``previous`` links. Pages are ordered by one of the
+view's ``ordering_fields`` (or its default ordering) with the primary key as
+the tie breaker, so no COUNT(*) or OFFSET is issued and rows never repeat or
+go missing between pages. Page-number pagination stays the default.
+"""
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    ordering_query_param = api_settings.ORDERING_PARAM
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        """Return (field, descending) from ?ordering= or the default ordering"""
+        allowed = getattr(view, 'ordering_fields', None) or []
+        requested = request.query_params.get(self.ordering_query_param, '')
+        for term in requested.split(','):
+            term = term.strip()
+            if term and term.lstrip('-') in allowed:
+                return term.lstrip('-'), term.startswith('-')
+
+        default = getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        if isinstance(default, str):
+            default = [default]
+        term = default[0] if default else '-pk'
+        return term.lstrip('-'), term.startswith('-')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return cursor['o'], cursor['v'], int(cursor['id']), bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def cursor_value(self, queryset, value):
+        """The cursor's ordering value as the ordering field's type"""
+        opts = queryset.model._meta
+        field = opts.pk if self.field == 'pk' else opts.get_field(self.field)
+        try:
+            value = field.to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+    def encode_cursor(self, item, reverse):
+        value = getattr(item, self.field)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = json.dumps(
+            {'o': self.field, 'v': value, 'id': item.pk, 'r': int(reverse)},
+            separators=(',', ':')
+        )
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.field, descending = self.get_ordering(request, queryset, view)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            field, value, pk, reverse = cursor
+            if field != self.field:
+                raise NotFound(self.invalid_cursor_message)
+            value = self.cursor_value(queryset, value)
+
+        # Walking backwards flips the scan direction; results are re-reversed below
+        scan_descending = descending != reverse
+        if scan_descending:
+            queryset = queryset.order_by(f'-{self.field}', '-pk')
+        else:
+            queryset = queryset.order_by(self.field, 'pk')
+
+        if cursor is not None:
+            op = 'lt' if scan_descending else 'gt'
+            bound = 'lte' if scan_descending else 'gte'
+            # The plain range on the leading column lets the index bound the scan
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{bound}': value}),
+                Q(**{f'{self.field}__{op}': value}) | Q(**{f'pk__{op}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """Switch a viewset to keyset pagination when ``?cursor=`` is present"""
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            cursor_param = self.keyset_pagination_class.cursor_query_param
+            if self.request is not None and cursor_param in self.request.query_params:
+                self._paginator = self.keyset_pagination_class()
+        return super().paginator
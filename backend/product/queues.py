@@ -0,0 +1,89 @@
+# product/queues.py - Claiming batches from DB-backed work queues, and the command that drains them
+"""
+The outbox (``accounts/outbox.py``), webhook events (``payment/webhooks.py``)
+and refunds (``payment/refunds.py``) are tables polled by worker commands.
+They share the claim and the command loop kept here; each module only says
+which rows are due and what to do with a batch.
+
+``claim`` locks due rows with ``SELECT ... FOR UPDATE SKIP LOCKED`` and
+moves their next-attempt time to the end of a lease, so concurrent workers
+take disjoint batches and a crashed worker's batch comes back once the
+lease runs out. ``QueueWorkerCommand`` drains a queue batch by batch, once
+or polling with ``--loop``, and prints the totals as JSON.
+"""
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+def claim(due, batch_size, lease_seconds, lease_field='next_attempt_at', order_by=('pk',)):
+    """Lock up to ``batch_size`` rows of the ``due`` queryset and lease them.
+
+    ``lease_field`` is set to the end of the lease, which hides the rows
+    from other workers until then. Returns the rows and the lease's end.
+    """
+    leased_until = timezone.now() + timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        batch = list(due.select_for_update(skip_locked=True).order_by(*order_by)[:batch_size])
+        due.model.objects.filter(pk__in=[row.pk for row in batch]).update(
+            **{lease_field: leased_until}
+        )
+    return batch, leased_until
+
+
+class QueueWorkerCommand(BaseCommand):
+    """Drain a queue once, or keep polling it with --loop; prints JSON totals.
+
+    Subclasses implement ``process_batch`` (returning the batch's metrics,
+    with ``claimed`` and ``seconds``) and ``backlog``, and name the metrics
+    that count as throughput in ``throughput_keys``.
+    """
+    batch_size = 100
+    interval = 5.0
+    throughput_keys = ('claimed',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.batch_size)
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, polling the queue every --interval seconds')
+        parser.add_argument('--interval', type=float, default=self.interval)
+
+    def handle(self, *args, **options):
+        while True:
+            totals = self.drain(options)
+            if totals['claimed'] or not options['loop']:
+                self.report(totals)
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def process_batch(self, options):
+        raise NotImplementedError
+
+    def backlog(self):
+        """Queue depth and anything else to add to the report"""
+        return {}
+
+    def stop_draining(self, stats):
+        """Whether to stop before the queue runs dry, e.g. when the gateway is down"""
+        return False
+
+    def drain(self, options):
+        totals = {}
+        while True:
+            stats = self.process_batch(options)
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+            if stats['claimed'] < options['batch_size'] or self.stop_draining(stats):
+                return totals
+
+    def report(self, totals):
+        totals['seconds'] = round(totals['seconds'], 3)
+        done = sum(totals[key] for key in self.throughput_keys)
+        totals['per_second'] = round(done / totals['seconds'], 1) if totals['seconds'] else 0
+        totals.update(self.backlog())
+        self.stdout.write(json.dumps(totals, sort_keys=True))
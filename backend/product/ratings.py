@@ -0,0 +1,107 @@
+# product/ratings.py - Product rating aggregates kept in step with reviews
+"""
+``Product.rating_sum``, ``reviews_count`` and the star histogram
+(``rating_1_count`` .. ``rating_5_count``) are adjusted by a single ``F()``
+UPDATE in the same transaction as each review write, and the average in
+``Product.rating`` (shown and sorted on) is recomputed in that same
+statement. Nothing reads the product's reviews, so a review costs the same
+on a product with ten reviews as on one with ten thousand.
+
+``reconcile_ratings`` recomputes the aggregates from the Review table in
+bulk SQL, for repairing drift (raw SQL edits, imports, bugs).
+"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .cache import bump_catalog_version
+from .cards import refresh_card_fields
+from .models import Product, Review
+
+STARS = range(1, 6)
+
+# Aggregates shown on product cards
+CARD_FIELDS = ['rating', 'reviews_count']
+
+
+def histogram_field(stars):
+    return f'rating_{stars}_count'
+
+
+def average_expression(rating_sum, reviews_count):
+    """SQL for the rounded average rating; 0 without reviews"""
+    return Coalesce(
+        Round(Cast(rating_sum, FloatField()) / NullIf(reviews_count, 0), 1),
+        Value(0.0),
+    )
+
+
+def apply_review_change(product_id, added=None, removed=None):
+    """Adjust a product's aggregates for one review write; call inside its transaction.
+
+    ``added`` is the rating of a new or edited review, ``removed`` the
+    rating it had before an edit or delete.
+    """
+    rating_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    updates = {
+        # Listed first so it is computed from the old values on every backend
+        'rating': average_expression(
+            F('rating_sum') + rating_delta, F('reviews_count') + count_delta
+        ),
+        'rating_sum': F('rating_sum') + rating_delta,
+        'reviews_count': F('reviews_count') + count_delta,
+    }
+    if added != removed:
+        if added is not None:
+            updates[histogram_field(added)] = F(histogram_field(added)) + 1
+        if removed is not None:
+            updates[histogram_field(removed)] = F(histogram_field(removed)) - 1
+    Product.objects.filter(pk=product_id).update(**updates)
+    refresh_card_fields([product_id], CARD_FIELDS)
+    # Ratings appear in cached catalog responses
+    transaction.on_commit(bump_catalog_version)
+
+
+def _actual_aggregates():
+    """Subquery expressions for each aggregate, computed from the reviews"""
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+
+    def aggregate(expression):
+        return Coalesce(Subquery(reviews.annotate(total=expression).values('total')), 0)
+
+    actual = {
+        'rating_sum': aggregate(Sum('rating')),
+        'reviews_count': aggregate(Count('pk')),
+    }
+    for stars in STARS:
+        actual[histogram_field(stars)] = aggregate(Count('pk', filter=Q(rating=stars)))
+    return actual
+
+
+def drifted_product_ids():
+    """Products whose stored aggregates disagree with their reviews"""
+    actual = _actual_aggregates()
+    return list(
+        Product.objects.annotate(**{f'actual_{field}': expr for field, expr in actual.items()})
+        .exclude(**{field: F(f'actual_{field}') for field in actual})
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def reconcile_ratings(batch_size=1000, dry_run=False):
+    """Recompute drifted products' aggregates from their reviews; returns the ids"""
+    product_ids = drifted_product_ids()
+    if dry_run or not product_ids:
+        return product_ids
+
+    actual = _actual_aggregates()
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        Product.objects.filter(pk__in=batch).update(
+            rating=average_expression(actual['rating_sum'], actual['reviews_count']),
+            **actual
+        )
+        refresh_card_fields(batch, CARD_FIELDS)
+    transaction.on_commit(bump_catalog_version)
+    return product_ids
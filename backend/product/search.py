@@ -0,0 +1,237 @@
+# product/search.py - Full-text product search
+"""
+Full-text search over product name, description and category name.
+
+PostgreSQL keeps a ``tsvector`` per product in ``product_search`` (GIN
+indexed); SQLite keeps an FTS5 virtual table ``product_search_fts`` keyed by
+product id. Both are created by migration 0009 and kept up to date from
+``product.signals``. Databases without either fall back to ``icontains``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+PG_TABLE = 'product_search'
+FTS_TABLE = 'product_search_fts'
+PG_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a raw search string into lowercase word tokens"""
+    return _TOKEN_RE.findall((query or '').lower())
+
+
+def _document_rows(products):
+    """(id, name, description, category name) for each product"""
+    return [
+        (p.pk, p.name or '', p.description or '', p.category.name if p.category_id else '')
+        for p in products
+    ]
+
+
+class IContainsSearchBackend:
+    """Fallback for databases without a full-text index"""
+
+    def search(self, queryset, query):
+        from .models import Product
+
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        # Matched on products so ProductCard querysets (same ids) can be searched too
+        matches = Product.objects.all()
+        for token in tokens:
+            matches = matches.filter(
+                Q(name__icontains=token) |
+                Q(description__icontains=token) |
+                Q(category__name__icontains=token)
+            )
+        return queryset.filter(pk__in=matches.values('pk'))
+
+    def index_products(self, products):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+    def create_index(self, schema_editor):
+        pass
+
+    def drop_index(self, schema_editor):
+        pass
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """tsvector documents with a GIN index; prefix-matching tsquery"""
+
+    def _tsquery(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        tsquery = self._tsquery(tokens)
+        table = queryset.model._meta.db_table
+        matches = RawSQL(
+            f"SELECT product_id FROM {PG_TABLE} "
+            f"WHERE document @@ to_tsquery('{PG_CONFIG}', %s)",
+            (tsquery,)
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('{PG_CONFIG}', %s)) FROM {PG_TABLE} "
+            f"WHERE product_id = {table}.id",
+            (tsquery,),
+            output_field=FloatField()
+        )
+        return queryset.filter(pk__in=matches).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', '-created_at')
+
+    def index_products(self, products):
+        rows = _document_rows(products)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {PG_TABLE} (product_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B')) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {PG_TABLE} WHERE product_id = ANY(%s)", (list(product_ids),)
+            )
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            f"product_id bigint PRIMARY KEY REFERENCES product_product(id) ON DELETE CASCADE, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_document_gin "
+            f"ON {PG_TABLE} USING GIN (document)"
+        )
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {PG_TABLE}")
+
+
+class SQLiteSearchBackend(IContainsSearchBackend):
+    """FTS5 virtual table ranked with bm25(); prefix-matching MATCH query"""
+
+    # Column weights for bm25(): name, description, category
+    weights = (10.0, 1.0, 5.0)
+
+    def _match(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        match = self._match(tokens)
+        table = queryset.model._meta.db_table
+        weights = ', '.join(str(w) for w in self.weights)
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+        )
+        # bm25() rescans every match to score one row, so a per-row MATCH
+        # would be quadratic. The CTE runs the MATCH once per query and each
+        # row looks its score up; bm25() is lower-is-better, so it's negated.
+        rank = RawSQL(
+            f"WITH ranked AS MATERIALIZED ("
+            f"SELECT rowid AS id, -bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s) "
+            f"SELECT score FROM ranked WHERE ranked.id = {table}.id",
+            (match,),
+            output_field=FloatField()
+        )
+        return queryset.filter(pk__in=matches).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', '-created_at')
+
+    def index_products(self, products):
+        rows = _document_rows(products)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+                f"VALUES (%s, %s, %s, %s)",
+                rows
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids]
+            )
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"name, description, category, tokenize='porter unicode61')"
+        )
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend(conn=None):
+    """Return the search backend for the given (default) connection"""
+    conn = conn or connection
+    return _BACKENDS.get(conn.vendor, IContainsSearchBackend)()
+
+
+def search_products(queryset, query):
+    """Filter ``queryset`` to products matching ``query``, best match first"""
+    return get_search_backend().search(queryset, query)
+
+
+def index_products(products):
+    """Add or refresh the search documents for ``products``"""
+    get_search_backend().index_products(products)
+
+
+def remove_products(product_ids):
+    """Drop the search documents for the given product ids"""
+    get_search_backend().remove_products(product_ids)
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every product in batches; returns the number indexed"""
+    from .models import Product
+
+    queryset = Product.objects.select_related('category').order_by('pk')
+    count = 0
+    batch = []
+    for product in queryset.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            index_products(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        index_products(batch)
+        count += len(batch)
+    return count
@@ -2,31 +2,55 @@
 
 from rest_framework import serializers
 from .models import (
-    Category, Product, ProductImage, ProductColor, ProductSize,
+    Category, Product, ProductCard, ProductImage, ProductColor, ProductSize,
     ProductSpecification, ProductMaterial, Cart, CartItem, Order, OrderItem, Review
 )
+from .media import image_url, public_url, srcset, variant_paths
+
+
+class ProductImagesMixin:
+    """Image fields for product serializers, read from prefetched images.
+
+    Pair with ``Product.objects.with_images()`` so listing a page of
+    products costs a fixed number of queries.
+    """
+
+    def get_image(self, obj):
+        """Get primary image URL, falling back to the first image"""
+        primary_image = obj.get_primary_image()
+        if primary_image:
+            return image_url(primary_image, self.context.get('request'))
+        return None
+
+    def get_image_srcset(self, obj):
+        """Resized variants of the primary image, as srcset values per format"""
+        primary_image = obj.get_primary_image()
+        if primary_image:
+            return srcset(variant_paths(primary_image), self.context.get('request'))
+        return {}
+
+    def get_images(self, obj):
+        """Get all product images with proper URLs"""
+        return ProductImageSerializer(
+            obj.images.all(), many=True, context=self.context
+        ).data
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image_url', 'color_name', 'is_primary', 'order']
+        fields = ['id', 'image_url', 'color_name', 'is_primary', 'order', 'srcset']
     
     def get_image_url(self, obj):
         """Return uploaded image URL or external URL"""
-        request = self.context.get('request')
-        
-        # For uploaded images
-        if obj.image:
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            # Fallback without request
-            return f"http://127.0.0.1:8000{obj.image.url}"
-        
-        # For external URLs
-        return obj.image_url or None
+        return image_url(obj, self.context.get('request'))
+
+    def get_srcset(self, obj):
+        """{format: "url 320w, url 640w"}; empty for external or unprocessed images"""
+        return srcset(variant_paths(obj), self.context.get('request'))
 
 
 class ProductColorSerializer(serializers.ModelSerializer):
@@ -68,9 +92,10 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(ProductImagesMixin, serializers.ModelSerializer):
     category = serializers.CharField(source='category.name')
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
     colors = ProductColorSerializer(many=True, read_only=True)
     sizes = ProductSizeSerializer(many=True, read_only=True)
@@ -78,45 +103,61 @@ class ProductListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'slug', 'price', 'category', 'image', 'images',
+            'id', 'name', 'slug', 'price', 'category', 'image', 'image_srcset', 'images',
+            'rating', 'reviews_count', 'in_stock', 'colors', 'sizes'
+        ]
+
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    """ProductListSerializer's output, read from a single ProductCard row"""
+    id = serializers.IntegerField(source='pk', read_only=True)
+    category = serializers.CharField(source='category_name')
+    image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductCard
+        fields = [
+            'id', 'name', 'slug', 'price', 'category', 'image', 'image_srcset', 'images',
             'rating', 'reviews_count', 'in_stock', 'colors', 'sizes'
         ]
 
     def get_image(self, obj):
-        """Get primary image URL using ProductImageSerializer"""
-        request = self.context.get('request')
-        
-        # Try to get primary image first
-        primary_image = obj.images.filter(is_primary=True).first()
-        if not primary_image:
-            # Fall back to first image
-            primary_image = obj.images.first()
-        
-        if primary_image:
-            # Use ProductImageSerializer to get proper URL
-            serializer = ProductImageSerializer(primary_image, context={'request': request})
-            return serializer.data.get('image_url')
-        
-        return None
+        return public_url(obj.image, self.context.get('request'))
+
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_variants, self.context.get('request'))
 
     def get_images(self, obj):
-        """Get all product images with proper URLs"""
         request = self.context.get('request')
-        images = obj.images.all().order_by('order')
-        serializer = ProductImageSerializer(images, many=True, context={'request': request})
-        return serializer.data
+        return [
+            {
+                'id': image['id'],
+                'image_url': public_url(image['image_url'], request),
+                'color_name': image['color_name'],
+                'is_primary': image['is_primary'],
+                'order': image['order'],
+                # Cards built before variants existed lack the key
+                'srcset': srcset(image.get('variants') or {}, request),
+            }
+            for image in obj.images
+        ]
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(ProductImagesMixin, serializers.ModelSerializer):
     category = serializers.CharField(source='category.name')
     category_name = serializers.CharField(source='category.name')
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
     colors = ProductColorSerializer(many=True, read_only=True)
     sizes = ProductSizeSerializer(many=True, read_only=True)
     specifications = ProductSpecificationSerializer(many=True, read_only=True)
     material = ProductMaterialSerializer(read_only=True)
     reviews = serializers.SerializerMethodField()
+    # Stored on the product row, so it costs no extra query
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     original_price = serializers.DecimalField(
         max_digits=10, 
         decimal_places=2, 
@@ -128,32 +169,11 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'id', 'name', 'slug', 'price', 'original_price', 'category', 'category_name',
-            'description', 'rating', 'reviews_count', 'reviews', 'in_stock', 
-            'image', 'images', 'colors', 'sizes', 'specifications', 
+            'description', 'rating', 'reviews_count', 'reviews', 'rating_histogram', 'in_stock', 
+            'image', 'image_srcset', 'images', 'colors', 'sizes', 'specifications', 
             'material', 'created_at'
         ]
 
-    def get_image(self, obj):
-        """Get primary image URL using ProductImageSerializer"""
-        request = self.context.get('request')
-        
-        primary_image = obj.images.filter(is_primary=True).first()
-        if not primary_image:
-            primary_image = obj.images.first()
-        
-        if primary_image:
-            serializer = ProductImageSerializer(primary_image, context={'request': request})
-            return serializer.data.get('image_url')
-        
-        return None
-
-    def get_images(self, obj):
-        """Get all product images as objects with full URLs"""
-        request = self.context.get('request')
-        images = obj.images.all().order_by('order')
-        serializer = ProductImageSerializer(images, many=True, context={'request': request})
-        return serializer.data
-    
     def get_reviews(self, obj):
         return obj.reviews_count if obj.reviews_count > 0 else None
 
@@ -178,7 +198,29 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cart
-        fields = ['id', 'items', 'total_price', 'total_items', 'created_at', 'updated_at']
+        fields = ['id', 'items', 'total_price', 'total_items', 'version', 'created_at', 'updated_at']
+
+
+class CartLineSerializer(serializers.ModelSerializer):
+    """A cart item without the nested product, for delta responses"""
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = [
+            'id', 'product_id', 'quantity', 'selected_color', 'selected_size',
+            'subtotal', 'added_at'
+        ]
+
+
+class CartDeltaSerializer(serializers.Serializer):
+    """The changed line(s) and the recomputed totals after a cart mutation"""
+    item = CartLineSerializer(allow_null=True, required=False)
+    items = CartLineSerializer(many=True, required=False)
+    removed_item_ids = serializers.ListField(child=serializers.IntegerField())
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_items = serializers.IntegerField()
+    version = serializers.IntegerField()
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -193,19 +235,10 @@ class OrderItemSerializer(serializers.ModelSerializer):
         ]
     
     def get_product_image(self, obj):
-        """Get the product's primary image URL"""
-        request = self.context.get('request')
-        
-        if obj.product:
-            from .serializers import ProductImageSerializer
-            primary_image = obj.product.images.filter(is_primary=True).first()
-            if not primary_image:
-                primary_image = obj.product.images.first()
-            
-            if primary_image:
-                serializer = ProductImageSerializer(primary_image, context={'request': request})
-                return serializer.data.get('image_url')
-        
+        """Get the product's primary image URL, from the prefetched images"""
+        primary_image = obj.product.get_primary_image() if obj.product else None
+        if primary_image:
+            return image_url(primary_image, self.context.get('request'))
         return None
 
 
@@ -301,4 +334,5 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['id', 'user', 'rating', 'comment', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        extra_kwargs = {'comment': {'required': False, 'allow_blank': True}}
 
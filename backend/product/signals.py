@@ -0,0 +1,103 @@
+# product/signals.py - Keep derived catalog data in sync with the source models
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import cards, images, search
+from .cache import bump_catalog_version
+from .models import (
+    Category, Product, ProductImage, ProductColor, ProductSize,
+    ProductSpecification, ProductMaterial
+)
+
+# Models whose rows appear in cached catalog responses
+CATALOG_MODELS = (
+    Category, Product, ProductImage, ProductColor, ProductSize,
+    ProductSpecification, ProductMaterial,
+)
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    """Refresh the product's search document on every save"""
+    if raw:
+        return
+    search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created=False, raw=False, **kwargs):
+    """Category names are part of the search document"""
+    if raw or created:
+        return
+    search.index_products(instance.products.select_related('category'))
+
+
+@receiver(post_save, sender=Product)
+def rebuild_saved_product_card(sender, instance, raw=False, **kwargs):
+    """Also drops the card when the product is deactivated"""
+    if raw:
+        return
+    cards.schedule_rebuild([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_cards(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    cards.refresh_category(instance)
+
+
+@receiver(post_save, sender=ProductImage)
+def generate_upload_variants(sender, instance, raw=False, **kwargs):
+    """New uploads get resized variants in the background (product/images.py)"""
+    if raw or not instance.image or instance.variants_source == instance.image.name:
+        return
+    images.schedule_variants(instance)
+
+
+def _deleted_with_product(origin):
+    """True when a child row goes because its product or category is being deleted"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Product, Category)
+
+
+def rebuild_product_card(sender, instance, raw=False, origin=None, **kwargs):
+    """An image, color or size changed; its product's card lists them"""
+    if raw or _deleted_with_product(origin):
+        return
+    cards.schedule_rebuild([instance.product_id])
+
+
+for model in (ProductImage, ProductColor, ProductSize):
+    post_save.connect(
+        rebuild_product_card, sender=model,
+        dispatch_uid=f'product_card_save_{model.__name__}'
+    )
+    post_delete.connect(
+        rebuild_product_card, sender=model,
+        dispatch_uid=f'product_card_delete_{model.__name__}'
+    )
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    # Bumping before commit would let a concurrent read cache the old rows
+    # under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(
+        invalidate_catalog_cache, sender=model,
+        dispatch_uid=f'catalog_cache_save_{model.__name__}'
+    )
+    post_delete.connect(
+        invalidate_catalog_cache, sender=model,
+        dispatch_uid=f'catalog_cache_delete_{model.__name__}'
+    )
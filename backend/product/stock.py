@@ -0,0 +1,216 @@
+# product/stock.py - Race-free stock decrements and checkout reservations
+"""
+Stock is only ever changed with conditional UPDATEs, one statement per
+checkout however many lines it has::
+
+    UPDATE product SET stock = stock - CASE id WHEN p THEN q ... END
+    WHERE id IN (...) AND stock >= CASE id WHEN p THEN q ... END
+
+The database serializes concurrent updates of the same row, so two
+checkouts can never both take the last unit, and checkouts of different
+products never wait on each other. If any line is short, the statement's
+changes are rolled back and ``InsufficientStock`` names the product.
+Callers run these helpers inside ``transaction.atomic()``; a raised
+``InsufficientStock`` rolls back every decrement made in that transaction.
+
+Razorpay checkouts reserve stock when the gateway order is created and
+commit the reservation when the payment is verified. Unpaid reservations
+expire after ``STOCK_RESERVATION_MINUTES`` and are released by
+``release_expired_reservations`` (see the command of the same name).
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .cards import refresh_card_fields
+from .models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f'Insufficient stock for product {product_id} (requested {requested})')
+
+
+class ReservationMismatch(Exception):
+    """The lines being ordered are not the ones reserved, and paid, for the gateway order"""
+
+    def __init__(self, razorpay_order_id):
+        self.razorpay_order_id = razorpay_order_id
+        super().__init__(f'Order lines differ from the reservation for {razorpay_order_id}')
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, 'STOCK_RESERVATION_MINUTES', 15))
+
+
+def _quantities(lines):
+    """Sum (product_id, quantity) lines per product, in id order"""
+    totals = Counter()
+    for product_id, quantity in lines:
+        totals[product_id] += quantity
+    return sorted((pid, qty) for pid, qty in totals.items() if qty > 0)
+
+
+def _per_product(quantities):
+    """CASE expression mapping each product id to its quantity"""
+    return Case(
+        *[When(pk=pid, then=Value(qty)) for pid, qty in quantities],
+        output_field=IntegerField()
+    )
+
+
+def decrement_stock(lines):
+    """Take stock for every line in one UPDATE, or raise InsufficientStock"""
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+    product_ids = [pid for pid, _ in quantities]
+    quantity = _per_product(quantities)
+    with transaction.atomic():
+        updated = Product.objects.filter(pk__in=product_ids, stock__gte=quantity).update(
+            stock=F('stock') - quantity,
+            # Evaluated against the pre-update row, like the stock decrement
+            in_stock=Case(
+                When(stock__gt=quantity, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+        )
+        if updated != len(quantities):
+            # Undo the rows that did have enough before reporting the short one
+            transaction.set_rollback(True)
+    if updated != len(quantities):
+        stock = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'stock'))
+        for product_id, requested in quantities:
+            if stock.get(product_id, 0) < requested:
+                raise InsufficientStock(product_id, requested)
+        # Stock arrived between the UPDATE and the re-read; report the first line
+        raise InsufficientStock(*quantities[0])
+
+    # in_stock is part of product cards and cached catalog responses; only sell-outs change it
+    if Product.objects.filter(pk__in=product_ids, in_stock=False).exists():
+        refresh_card_fields(product_ids, ['in_stock'])
+        transaction.on_commit(bump_catalog_version)
+
+
+def restore_stock(lines):
+    """Give stock back in one UPDATE, e.g. for cancelled orders or released reservations"""
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+    product_ids = [pid for pid, _ in quantities]
+    back_in_stock = Product.objects.filter(pk__in=product_ids, in_stock=False).exists()
+    if back_in_stock:
+        transaction.on_commit(bump_catalog_version)
+    quantity = _per_product(quantities)
+    Product.objects.filter(pk__in=product_ids).update(
+        stock=F('stock') + quantity,
+        in_stock=Case(
+            When(stock__gt=-quantity, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        ),
+    )
+    if back_in_stock:
+        refresh_card_fields(product_ids, ['in_stock'])
+
+
+def reserve_stock(user, razorpay_order_id, lines):
+    """Hold stock for a pending Razorpay order; raises InsufficientStock.
+
+    A user checks out one cart at a time, so the holds of their earlier
+    unpaid orders are released first; a retried checkout would otherwise
+    hold the stock twice, or be refused because of its own hold. If this
+    reservation fails they are kept.
+    """
+    quantities = _quantities(lines)
+    with transaction.atomic():
+        release_reservations(
+            StockReservation.objects.filter(user=user).exclude(razorpay_order_id=razorpay_order_id)
+        )
+        try:
+            with transaction.atomic():
+                decrement_stock(quantities)
+        except InsufficientStock:
+            # Stale holds on these products may be what is blocking the sale
+            if not release_expired_reservations(product_ids=[pid for pid, _ in quantities]):
+                raise
+            decrement_stock(quantities)
+
+        expires_at = timezone.now() + reservation_ttl()
+        return StockReservation.objects.bulk_create([
+            StockReservation(
+                product_id=product_id,
+                user=user,
+                razorpay_order_id=razorpay_order_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for product_id, quantity in quantities
+        ])
+
+
+def commit_reservation(user, razorpay_order_id, lines):
+    """Turn a paid order's reservation into a sale.
+
+    ``lines`` must be exactly what was reserved when the gateway order was
+    created, since that is what the payment covers; otherwise (the cart
+    changed, or the order was already placed) ReservationMismatch is
+    raised. A hold that expired meanwhile is taken again, raising
+    InsufficientStock if the stock is gone. Either error leaves nothing
+    changed when run inside its own savepoint.
+    """
+    reservations = list(
+        StockReservation.objects.select_for_update().filter(
+            user=user, razorpay_order_id=razorpay_order_id, status__in=['active', 'released']
+        )
+    )
+    reserved = _quantities((r.product_id, r.quantity) for r in reservations)
+    if not reservations or reserved != _quantities(lines):
+        raise ReservationMismatch(razorpay_order_id)
+
+    decrement_stock((r.product_id, r.quantity) for r in reservations if r.status == 'released')
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).update(status='committed')
+
+
+def release_reservations(queryset):
+    """Release the active reservations in ``queryset``; returns how many"""
+    with transaction.atomic():
+        reservations = list(
+            queryset.filter(status='active').select_for_update(skip_locked=True)
+        )
+        if not reservations:
+            return 0
+        restore_stock((r.product_id, r.quantity) for r in reservations)
+        StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).update(status='released')
+    return len(reservations)
+
+
+def release_expired_reservations(product_ids=None, batch_size=500):
+    """Release reservations past their expiry; returns how many"""
+    released = 0
+    while True:
+        queryset = StockReservation.objects.filter(status='active', expires_at__lte=timezone.now())
+        if product_ids is not None:
+            queryset = queryset.filter(product_id__in=product_ids)
+        ids = list(queryset.order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        count = release_reservations(StockReservation.objects.filter(pk__in=ids))
+        released += count
+        if count < len(ids):
+            # The rest are locked by a concurrent release; leave them to it
+            break
+    if released:
+        logger.info(f"Released {released} expired stock reservations")
+    return released
@@ -1,3 +1,1019 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .cache import catalog_version, get_catalog_cache
+from .checkout import load_cart_items, place_order
+from .management.commands.benchmark_api import SHIPPING
+from .models import (
+    Cart, CartItem, Category, Order, OrderItem, Product, ProductCard, ProductImage, ProductColor,
+    ProductSize, Review, StockReservation
+)
+from .stock import (
+    InsufficientStock, ReservationMismatch, commit_reservation, decrement_stock,
+    release_expired_reservations, reserve_stock,
+)
+
+User = get_user_model()
+
+
+def create_product(category, index, **kwargs):
+    """Create a product with a few images, colors and sizes"""
+    defaults = {
+        'name': f'Product {index}',
+        'price': 10 + index,
+        'description': f'Description for product {index}',
+        'stock': 10,
+    }
+    defaults.update(kwargs)
+    product = Product.objects.create(category=category, **defaults)
+    for order in range(3):
+        ProductImage.objects.create(
+            product=product,
+            image_url=f'https://example.com/{index}/{order}.jpg',
+            is_primary=(order == 1),
+            order=order,
+        )
+    ProductColor.objects.create(product=product, color_name='Black')
+    ProductSize.objects.create(product=product, size_name='M')
+    return product
+
+
+# Tests run in one process, so the locmem cache is shared by every request
+@override_settings(CATALOG_CACHE_ENABLED=True)
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+
+    def committed(self):
+        """Run the block's on-commit callbacks (cache invalidation) as a commit would"""
+        return self.captureOnCommitCallbacks(execute=True)
+
+
+class ProductListQueryCountTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='T-Shirts')
+
+    def list_query_count(self, page_size_products):
+        with self.committed():
+            Product.objects.all().delete()
+            for index in range(page_size_products):
+                create_product(self.category, index)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size_products)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        # COUNT and the product cards
+        self.assertEqual(self.list_query_count(2), 2)
+        self.assertEqual(self.list_query_count(12), 2)
+
+    def test_list_uses_primary_image_and_ordered_images(self):
+        create_product(self.category, 1)
+        response = self.client.get('/api/products/')
+        product = response.data['results'][0]
+        self.assertEqual(product['image'], 'https://example.com/1/1.jpg')
+        self.assertEqual([img['order'] for img in product['images']], [0, 1, 2])
+
+    def test_detail_falls_back_to_first_image(self):
+        product = create_product(self.category, 1)
+        product.images.update(is_primary=False)
+        response = self.client.get(f'/api/products/{product.slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['image'], 'https://example.com/1/0.jpg')
+
+
+class ProductCardTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='T-Shirts')
+        self.product = create_product(self.category, 1)
+
+    def listed(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        return {p['id']: p for p in response.data['results']}
+
+    def test_card_matches_list_serializer(self):
+        from .serializers import ProductListSerializer
+
+        product = Product.objects.with_images().prefetch_related('colors', 'sizes').get()
+        self.assertEqual(
+            self.listed()[product.pk], dict(ProductListSerializer(product).data)
+        )
+
+    def test_cards_follow_source_rows(self):
+        with self.committed():
+            ProductColor.objects.create(product=self.product, color_name='White')
+            self.product.images.get(is_primary=True).delete()
+            self.category.name = 'Tees'
+            self.category.save()
+        card = self.listed()[self.product.pk]
+        self.assertEqual(card['colors'], ['Black', 'White'])
+        self.assertEqual(card['image'], 'https://example.com/1/0.jpg')
+        self.assertEqual(len(card['images']), 2)
+        self.assertEqual(card['category'], 'Tees')
+        self.assertEqual(self.client.get('/api/products/', {'category': 'tees'}).data['count'], 1)
+
+        self.product.is_active = False
+        with self.committed():
+            self.product.save()
+        self.assertEqual(self.listed(), {})
+        self.product.is_active = True
+        self.product.save()
+        self.product.delete()
+        self.assertFalse(ProductCard.objects.exists())
+
+    def test_stock_and_rating_updates_reach_the_card(self):
+        decrement_stock([(self.product.pk, 10)])
+        self.assertFalse(self.listed()[self.product.pk]['in_stock'])
+        user = User.objects.create_user(username='rater', email='rater@example.com', password='x')
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            '/api/reviews/', {'product_id': self.product.pk, 'rating': 4}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        card = ProductCard.objects.get()
+        self.assertEqual((card.rating, card.reviews_count), (Decimal('4.0'), 1))
+
+    def test_rebuild_command(self):
+        ProductCard.objects.update(name='stale', colors=[])
+        create_product(self.category, 2)
+        ProductCard.objects.filter(product__name='Product 2').delete()
+        out = StringIO()
+        call_command('rebuild_product_cards', stdout=out)
+        self.assertIn('Rebuilt 2 product cards', out.getvalue())
+        self.assertEqual(
+            sorted(ProductCard.objects.values_list('name', flat=True)), ['Product 1', 'Product 2']
+        )
+
+
+class ImageUrlTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        product = create_product(Category.objects.create(name='Tees'), 1)
+        product.images.filter(order=1).update(image='products/tee.jpg', image_url=None)
+        # The update skipped signals
+        call_command('rebuild_product_cards', stdout=StringIO())
+        self.product = product
+
+    def image_urls(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        data = response.data['results'][0] if 'results' in response.data else response.data
+        return data['image'], data['images'][2]['image_url']
+
+    def test_uploaded_images_use_the_request_origin(self):
+        for path in ('/api/products/', f'/api/products/{self.product.slug}/'):
+            self.assertEqual(self.image_urls(path), (
+                'http://testserver/media/products/tee.jpg', 'https://example.com/1/2.jpg'
+            ))
+
+    @override_settings(MEDIA_BASE_URL='https://cdn.example.com')
+    def test_uploaded_images_use_the_media_base_url(self):
+        for path in ('/api/products/', f'/api/products/{self.product.slug}/'):
+            self.assertEqual(self.image_urls(path), (
+                'https://cdn.example.com/media/products/tee.jpg', 'https://example.com/1/2.jpg'
+            ))
+
+
+def png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new('RGBA', (width, height), (200, 30, 30, 128)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ImageVariantTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        overrides = self.settings(
+            MEDIA_ROOT=media_root.name, IMAGE_VARIANT_WORKERS=0,
+            IMAGE_VARIANT_WIDTHS=[100, 200, 600], IMAGE_VARIANT_FORMATS=['jpeg', 'webp'],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.product = create_product(Category.objects.create(name='Tees'), 1)
+
+    def test_upload_gets_variants_and_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile('tee.png', png_bytes(300, 150)),
+                is_primary=True, order=-1,
+            )
+        image.refresh_from_db()
+        self.assertEqual(image.variants_source, image.image.name)
+        # 600 is wider than the upload, so it is not generated
+        self.assertEqual({fmt: sorted(widths) for fmt, widths in image.variants.items()},
+                         {'jpeg': ['100', '200'], 'webp': ['100', '200']})
+        with default_storage.open(image.variants['webp']['100']) as f:
+            self.assertEqual(Image.open(f).size, (100, 50))
+
+        base = f'http://testserver/media/{image.image.name.rsplit("/", 1)[0]}/variants/'
+        expected = f'{base}tee-100w.webp 100w, {base}tee-200w.webp 200w'
+        detail = self.client.get(f'/api/products/{self.product.slug}/').data
+        listed = self.client.get('/api/products/').data['results'][0]
+        for data in (detail, listed):
+            self.assertEqual(data['image_srcset']['webp'], expected)
+            self.assertEqual(data['images'][0]['srcset']['webp'], expected)
+            self.assertEqual(data['images'][1]['srcset'], {})
+
+    def test_backfill_command_uses_worker_processes(self):
+        name = default_storage.save('products/old.png', SimpleUploadedFile('old.png', png_bytes(250, 250)))
+        image = self.product.images.get(order=0)
+        ProductImage.objects.filter(pk=image.pk).update(image=name)
+        missing = self.product.images.get(order=2)
+        ProductImage.objects.filter(pk=missing.pk).update(image='products/missing.png')
+
+        out = StringIO()
+        call_command('generate_image_variants', workers=2, stdout=out)
+        self.assertIn('Generated variants for 1 image(s); 1 failed', out.getvalue())
+        image.refresh_from_db()
+        self.assertEqual(sorted(image.variants['jpeg']), ['100', '200'])
+        card = ProductCard.objects.get()
+        self.assertEqual(card.images[0]['variants']['webp']['200'],
+                         '/media/products/variants/old-200w.webp')
+
+        # Current variants are skipped unless forced
+        call_command('generate_image_variants', workers=0, stdout=out)
+        self.assertIn('Generated variants for 0 image(s); 1 failed', out.getvalue())
+
+
+class ProductSearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.shirts = Category.objects.create(name='T-Shirts')
+        self.jackets = Category.objects.create(name='Jackets')
+        create_product(self.shirts, 1, name='Classic Cotton Tee', description='Soft cotton shirt')
+        create_product(self.jackets, 2, name='Denim Jacket', description='Lined with cotton')
+        create_product(self.jackets, 3, name='Leather Jacket', description='Genuine leather')
+
+    def search(self, query):
+        response = self.client.get('/api/products/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [p['name'] for p in response.data['results']]
+
+    def test_ranks_name_matches_first(self):
+        self.assertEqual(self.search('cotton'), ['Classic Cotton Tee', 'Denim Jacket'])
+
+    def test_prefix_matching(self):
+        self.assertEqual(set(self.search('jack')), {'Denim Jacket', 'Leather Jacket'})
+        self.assertEqual(self.search('leath jack'), ['Leather Jacket'])
+
+    def test_index_follows_product_and_category_changes(self):
+        product = Product.objects.get(name='Leather Jacket')
+        product.name = 'Suede Coat'
+        with self.committed():
+            product.save()
+        self.assertEqual(self.search('suede'), ['Suede Coat'])
+        self.jackets.name = 'Outerwear'
+        with self.committed():
+            self.jackets.save()
+        self.assertEqual(len(self.search('outerwear')), 2)
+        with self.committed():
+            product.delete()
+        self.assertEqual(self.search('suede'), [])
+
+
+class CatalogCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='T-Shirts')
+        self.product = create_product(self.category, 1)
+
+    def test_repeat_reads_are_served_from_cache(self):
+        first = self.client.get('/api/products/', {'category': 't-shirts'})
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/products/', {'category': 'T-Shirts ', 'utm': 'x'})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(f'/api/products/{self.product.slug}/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                f'/api/products/{self.product.slug}/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_writes_invalidate_cached_responses(self):
+        etag = self.client.get('/api/products/')['ETag']
+        with self.committed():
+            ProductColor.objects.create(product=self.product, color_name='Red')
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Red', response.data['results'][0]['colors'])
+
+    @override_settings(CATALOG_CACHE_ENABLED=False)
+    def test_disabled_cache_serves_live_rows(self):
+        self.client.get('/api/products/')
+        # Written the way another process would: no invalidation reaches this one
+        ProductCard.objects.update(name='Renamed')
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_invalidation_waits_for_commit(self):
+        version = catalog_version()
+        with self.committed() as callbacks:
+            ProductColor.objects.create(product=self.product, color_name='Red')
+            # Reads before the commit must not cache the old rows under a new version
+            self.assertEqual(catalog_version(), version)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(catalog_version(), version)
+
+
+class KeysetPaginationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        category = Category.objects.create(name='T-Shirts')
+        # Duplicate prices exercise the id tie-breaker across page boundaries
+        for index in range(30):
+            create_product(category, index, price=10 + index % 4)
+
+    def walk(self, url, params):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(p['id'] for p in response.data['results'])
+            if not response.data['next']:
+                return seen, response
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_product_once_in_order(self):
+        ids, _ = self.walk('/api/products/', {'cursor': '', 'ordering': '-price'})
+        expected = list(
+            Product.objects.order_by('-price', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get('/api/products/', {'cursor': '', 'ordering': 'price'})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [p['id'] for p in back.data['results']],
+            [p['id'] for p in first.data['results']]
+        )
+        self.assertIsNone(back.data['previous'])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/products/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_wrongly_typed_cursor_value_is_404(self):
+        for value in ('abc', None, [1]):
+            payload = json.dumps({'o': 'price', 'v': value, 'id': 1, 'r': 0})
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+            response = self.client.get('/api/products/', {'cursor': cursor, 'ordering': 'price'})
+            self.assertEqual(response.status_code, 404, value)
+
+    def test_page_number_pagination_is_still_the_default(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['count'], 30)
+
+
+class ExplainCatalogQueriesTests(TestCase):
+    def test_detects_sequential_scans(self):
+        from .management.commands.explain_catalog_queries import find_sequential_scans
+
+        sqlite_plan = (
+            '6 0 0 SCAN product_product USING INDEX product_active_price_id_idx\n'
+            '9 0 0 SCAN product_productimage\n'
+            '12 0 0 SEARCH product_category USING INTEGER PRIMARY KEY (rowid=?)'
+        )
+        self.assertEqual(find_sequential_scans('sqlite', sqlite_plan), ['product_productimage'])
+        pg_plan = 'Limit\n  ->  Seq Scan on product_order  (cost=0.00..1.01 rows=1)'
+        self.assertEqual(find_sequential_scans('postgresql', pg_plan), ['product_order'])
+
+
+class GenerateCatalogTests(TestCase):
+    def generate(self):
+        call_command(
+            'generate_catalog', categories=2, products_per_category=5, users=4,
+            images_per_product=2, seed=7, clear=True, stdout=StringIO()
+        )
+        return list(Product.objects.order_by('slug').values_list('slug', 'name', 'price', 'rating'))
+
+    def test_same_seed_generates_same_catalog(self):
+        first = self.generate()
+        self.assertEqual(len(first), 10)
+        self.assertEqual(ProductImage.objects.count(), 20)
+        self.assertEqual(self.generate(), first)
+
+
+class ImportProductsTests(TestCase):
+    def write_feed(self, records):
+        feed = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False)
+        with feed:
+            for record in records:
+                feed.write(json.dumps(record) + '\n')
+        self.addCleanup(os.unlink, feed.name)
+        return feed.name
+
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command('import_products', file=path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_upserts_by_slug_and_skips_unchanged_records(self):
+        record = {
+            'name': 'Linen Shirt', 'category': 'Shirts', 'price': '49.99', 'stock': 5,
+            'description': 'Breathable linen', 'images': ['https://example.com/a.jpg'],
+            'colors': ['White'], 'sizes': ['M', 'L'],
+        }
+        path = self.write_feed([record])
+        self.assertIn('1 created', self.run_import(path))
+        self.assertIn('1 unchanged', self.run_import(path, incremental=True))
+
+        path = self.write_feed([dict(record, price='39.99', stock=0)])
+        self.assertIn('1 updated', self.run_import(path, incremental=True))
+        product = Product.objects.get(slug='linen-shirt')
+        self.assertEqual(str(product.price), '39.99')
+        self.assertFalse(product.in_stock)
+        self.assertEqual(product.sizes.count(), 2)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_pruned_product_is_reactivated_when_it_returns(self):
+        records = [
+            {'name': name, 'category': 'Shirts', 'price': '19.99', 'stock': 5, 'images': []}
+            for name in ('Linen Shirt', 'Oxford Shirt')
+        ]
+        self.run_import(self.write_feed(records))
+        self.assertIn('Deactivated 1', self.run_import(self.write_feed(records[:1]), prune=True))
+        self.assertFalse(Product.objects.get(slug='oxford-shirt').is_active)
+
+        self.run_import(self.write_feed(records), incremental=True)
+        self.assertTrue(Product.objects.get(slug='oxford-shirt').is_active)
+        self.assertTrue(ProductCard.objects.filter(slug='oxford-shirt').exists())
+
+    def test_updates_keep_review_aggregates(self):
+        record = {'name': 'Linen Shirt', 'category': 'Shirts', 'price': '19.99', 'stock': 5,
+                  'rating': 4.0, 'reviews_count': 10}
+        self.run_import(self.write_feed([record]))
+        Product.objects.filter(slug='linen-shirt').update(
+            rating=Decimal('3.5'), reviews_count=12, rating_sum=42
+        )
+        self.run_import(self.write_feed([dict(record, price='24.99')]))
+        product = Product.objects.get(slug='linen-shirt')
+        self.assertEqual((product.rating, product.reviews_count, product.rating_sum),
+                         (Decimal('3.5'), 12, 42))
+        self.assertEqual(product.price, Decimal('24.99'))
+
+
+class StockReservationTests(TransactionTestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        self.user = User.objects.create(email='buyer@example.com', username='buyer')
+        self.product = create_product(Category.objects.create(name='Tees'), 1, stock=5)
+
+    def test_concurrent_checkouts_never_oversell(self):
+        product_id = self.product.pk
+        outcomes = []
+
+        def checkout():
+            try:
+                for attempt in range(50):
+                    try:
+                        with transaction.atomic():
+                            decrement_stock([(product_id, 1)])
+                        outcomes.append('sold')
+                        return
+                    except OperationalError:
+                        # SQLite allows one writer at a time; retry like a client would
+                        time.sleep(0.01)
+            except InsufficientStock:
+                outcomes.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.product.refresh_from_db()
+        self.assertEqual(outcomes.count('sold'), 5)
+        self.assertEqual(outcomes.count('rejected'), 15)
+        self.assertEqual(self.product.stock, 0)
+        self.assertFalse(self.product.in_stock)
+
+    def test_expired_reservation_is_released_for_the_next_buyer(self):
+        reserve_stock(self.user, 'order_1', [(self.product.pk, 5)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        buyer = User.objects.create(email='next@example.com', username='next')
+        with self.assertRaises(InsufficientStock):
+            reserve_stock(buyer, 'order_2', [(self.product.pk, 1)])
+
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        reserve_stock(buyer, 'order_2', [(self.product.pk, 2)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(
+            StockReservation.objects.get(razorpay_order_id='order_1').status, 'released'
+        )
+
+    def test_retried_checkout_replaces_the_earlier_hold(self):
+        reserve_stock(self.user, 'order_1', [(self.product.pk, 5)])
+        reserve_stock(self.user, 'order_2', [(self.product.pk, 5)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(
+            dict(StockReservation.objects.values_list('razorpay_order_id', 'status')),
+            {'order_1': 'released', 'order_2': 'active'}
+        )
+
+        # A failed retry keeps the hold it would have replaced
+        with self.assertRaises(InsufficientStock):
+            reserve_stock(self.user, 'order_3', [(self.product.pk, 6)])
+        self.assertEqual(StockReservation.objects.get(razorpay_order_id='order_2').status, 'active')
+
+    def test_commit_rejects_changed_cart(self):
+        reserve_stock(self.user, 'order_1', [(self.product.pk, 2)])
+        with self.assertRaises(ReservationMismatch):
+            with transaction.atomic():
+                commit_reservation(self.user, 'order_1', [(self.product.pk, 3)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(StockReservation.objects.get().status, 'active')
+
+    def test_commit_retakes_expired_hold(self):
+        reserve_stock(self.user, 'order_1', [(self.product.pk, 2)])
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        release_expired_reservations()
+        with transaction.atomic():
+            commit_reservation(self.user, 'order_1', [(self.product.pk, 2)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+        self.assertEqual(StockReservation.objects.get().status, 'committed')
+
+
+class CheckoutTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='buyer@example.com', username='buyer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Tees')
+        self.products = [create_product(self.category, i, stock=10) for i in range(10)]
+        self.cart = Cart.objects.create(user=self.user)
+
+    def fill_cart(self, products, quantity=1):
+        self.cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=quantity) for product in products
+        ])
+
+    def checkout_query_count(self, products):
+        self.fill_cart(products)
+        with CaptureQueriesContext(connection) as ctx:
+            order = place_order(self.user, load_cart_items(self.user), {})
+        self.assertEqual(order.items.count(), len(products))
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_cart_size(self):
+        self.assertEqual(
+            self.checkout_query_count(self.products[:2]),
+            self.checkout_query_count(self.products[2:]),
+        )
+
+    def test_creates_order_and_empties_cart(self):
+        self.fill_cart(self.products[:3], quantity=2)
+        response = self.client.post('/api/orders/', SHIPPING, format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, sum(p.price * 2 for p in self.products[:3]))
+        self.assertEqual(order.items.count(), 3)
+        self.assertFalse(self.cart.items.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 8)
+
+    def test_order_list_query_count_is_independent_of_line_count(self):
+        def list_query_count(products):
+            self.fill_cart(products)
+            place_order(self.user, load_cart_items(self.user), {})
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/orders/')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(list_query_count(self.products[:1]), list_query_count(self.products[1:]))
+        line = self.client.get('/api/orders/').data['results'][0]['items'][0]
+        self.assertEqual(line['product_image'], 'https://example.com/1/1.jpg')
+
+    def test_create_query_count_is_independent_of_line_count(self):
+        def create_query_count(products):
+            self.fill_cart(products)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/api/orders/', SHIPPING, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['items']), len(products))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create_query_count(self.products[:1]), create_query_count(self.products[1:]))
+
+    def test_shortage_rolls_back_every_line(self):
+        Product.objects.filter(pk=self.products[1].pk).update(stock=1)
+        self.fill_cart(self.products[:3], quantity=2)
+        response = self.client.post('/api/orders/', SHIPPING, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 3)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 10)
+
+
+class CartTotalsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='shopper@example.com', username='shopper')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Tees')
+        self.products = [create_product(category, i, stock=10) for i in range(8)]
+        self.cart = Cart.objects.create(user=self.user)
+
+    def current_cart(self, products):
+        self.cart.items.all().delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=2) for product in products
+        ])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/cart/current/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), len(products))
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_cart_size(self):
+        _, small = self.current_cart(self.products[:1])
+        _, large = self.current_cart(self.products)
+        self.assertEqual(small, large)
+
+    def test_totals_are_aggregated_in_sql(self):
+        response, _ = self.current_cart(self.products[:3])
+        expected = sum(p.price * 2 for p in self.products[:3])
+        self.assertEqual(response.data['total_items'], 6)
+        self.assertEqual(Decimal(response.data['total_price']), expected)
+        self.assertEqual(
+            Cart.objects.with_totals().get(pk=self.cart.pk).items_total_price, expected
+        )
+        cart = Cart.objects.get(pk=self.cart.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.summary()['total_items'], 6)
+            self.assertEqual(cart.total_price, expected)
+
+
+class CartDeltaResponseTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='mobile@example.com', username='mobile')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Tees')
+        self.products = [create_product(category, i, stock=10) for i in range(3)]
+
+    def test_delta_returns_changed_line_totals_and_version(self):
+        response = self.client.post(
+            '/api/cart/add_item/?response=delta',
+            {'product_id': self.products[0].pk, 'quantity': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('cart', response.data)
+        self.assertEqual(response.data['item']['product_id'], self.products[0].pk)
+        self.assertEqual(response.data['total_items'], 2)
+        self.assertEqual(response.data['version'], 1)
+
+        item_id = response.data['item']['id']
+        response = self.client.delete(f'/api/cart/remove_item/?item_id={item_id}&response=delta')
+        self.assertEqual(response.data['removed_item_ids'], [item_id])
+        self.assertIsNone(response.data['item'])
+        self.assertEqual(response.data['total_items'], 0)
+        self.assertEqual(response.data['version'], 2)
+
+    def test_full_response_is_still_the_default(self):
+        response = self.client.post(
+            '/api/cart/add_item/', {'product_id': self.products[1].pk}, format='json'
+        )
+        self.assertEqual(response.data['cart']['version'], 1)
+        self.assertEqual(len(response.data['cart']['items']), 1)
+
+
+class CartBatchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='batch@example.com', username='batch')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name='Tees')
+        self.products = [create_product(category, i, stock=5) for i in range(6)]
+        self.cart = Cart.objects.create(user=self.user)
+
+    def batch(self, operations):
+        return self.client.post(
+            '/api/cart/batch/?response=delta', {'operations': operations}, format='json'
+        )
+
+    def test_applies_operations_in_one_transaction(self):
+        kept = CartItem.objects.create(cart=self.cart, product=self.products[0], quantity=1)
+        dropped = CartItem.objects.create(cart=self.cart, product=self.products[1], quantity=1)
+        response = self.batch([
+            {'op': 'add', 'product_id': self.products[2].pk, 'quantity': 2},
+            {'op': 'add', 'product_id': self.products[2].pk},
+            {'op': 'update', 'item_id': kept.pk, 'quantity': 4},
+            {'op': 'remove', 'item_id': dropped.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['removed_item_ids'], [dropped.pk])
+        self.assertEqual(response.data['total_items'], 7)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(
+            dict(self.cart.items.values_list('product_id', 'quantity')),
+            {self.products[0].pk: 4, self.products[2].pk: 3}
+        )
+
+    def test_stock_shortage_rejects_the_whole_batch(self):
+        response = self.batch([
+            {'op': 'add', 'product_id': self.products[0].pk},
+            {'op': 'add', 'product_id': self.products[1].pk, 'quantity': 6},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_query_count_is_independent_of_batch_size(self):
+        def run(products):
+            self.cart.items.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                self.batch([{'op': 'add', 'product_id': p.pk} for p in products])
+            return len(ctx.captured_queries)
+        self.assertEqual(run(self.products[:2]), run(self.products))
+
+    def test_reorder_rebuilds_cart_and_skips_unavailable_products(self):
+        order = Order.objects.create(
+            user=self.user, order_number='ORD-REORDER', total_amount=0,
+            **{field: 'x' for field in SHIPPING}
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.products[0], product_name='a',
+                      product_price=1, quantity=2, selected_size='M'),
+            OrderItem(order=order, product=self.products[1], product_name='b',
+                      product_price=1, quantity=9),
+        ])
+        response = self.client.post(f'/api/orders/{order.pk}/reorder/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['skipped_product_ids'], [self.products[1].pk])
+        self.assertEqual(response.data['cart']['total_items'], 2)
+        self.assertEqual(self.cart.items.get().selected_size, 'M')
+
+
+class GuestCartTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = create_product(Category.objects.create(name='Tees'), 1, stock=5)
+
+    def test_guest_cart_is_kept_per_session(self):
+        client = APIClient()
+        response = client.post('/api/cart/add_item/', {'product_id': self.product.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = client.get('/api/cart/current/')
+        self.assertEqual(response.data['total_items'], 1)
+        cart = Cart.objects.get()
+        self.assertIsNone(cart.user)
+        self.assertEqual(cart.session_id, client.session.session_key)
+
+    def test_purge_deletes_only_abandoned_guest_carts(self):
+        user = User.objects.create(email='keep@example.com', username='keep')
+        old = timezone.now() - timedelta(days=60)
+        abandoned = [Cart.objects.create(session_id=f'gone-{i}') for i in range(3)]
+        fresh = Cart.objects.create(session_id='fresh')
+        users_cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=abandoned[0], product=self.product)
+        Cart.objects.filter(pk__in=[c.pk for c in abandoned] + [users_cart.pk]).update(updated_at=old)
+
+        call_command('purge_guest_carts', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(
+            set(Cart.objects.values_list('pk', flat=True)), {fresh.pk, users_cart.pk}
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+
+class IdempotencyKeyTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email='retry@example.com', username='retry')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = create_product(Category.objects.create(name='Tees'), 1, stock=5)
+
+    def add(self, key, quantity=1):
+        return self.client.post(
+            '/api/cart/add_item/', {'product_id': self.product.pk, 'quantity': quantity},
+            format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_response_without_redoing_work(self):
+        first = self.add('add-1')
+        retry = self.add('add-1')
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+        # Without the dedupe heuristic, a new key adds again straight away
+        self.add('add-2')
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.add('add-1')
+        self.assertEqual(self.add('add-1', quantity=3).status_code, 422)
+
+    def test_order_create_is_not_repeated(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        responses = [
+            self.client.post('/api/orders/', SHIPPING, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+            for _ in range(2)
+        ]
+        self.assertEqual([r.status_code for r in responses], [201, 201])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 3)
+
+
+class ReviewRatingTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Tees')
+        self.product = create_product(self.category, 1)
+        self.users = [
+            User.objects.create(email=f'reviewer{i}@example.com', username=f'reviewer{i}')
+            for i in range(4)
+        ]
+        self.client = APIClient()
+
+    def review(self, user, rating, product=None):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/reviews/', {
+            'product_id': (product or self.product).pk, 'rating': rating, 'comment': 'Nice'
+        }, format='json')
+
+    def assertAggregates(self, rating_sum, count, rating, histogram=None):
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((product.rating_sum, product.reviews_count), (rating_sum, count))
+        self.assertEqual(product.rating, Decimal(rating))
+        if histogram is not None:
+            self.assertEqual([product.rating_histogram[str(s)] for s in range(1, 6)], histogram)
+
+    def test_create_update_and_delete_adjust_aggregates(self):
+        self.assertEqual(self.review(self.users[0], 5).status_code, 201)
+        self.assertEqual(self.review(self.users[1], 4).status_code, 201)
+        self.assertAggregates(9, 2, '4.5', [0, 0, 0, 1, 1])
+
+        review = Review.objects.get(user=self.users[1])
+        self.client.force_authenticate(self.users[1])
+        response = self.client.patch(f'/api/reviews/{review.pk}/', {'rating': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregates(7, 2, '3.5', [0, 1, 0, 0, 1])
+
+        self.assertEqual(self.client.delete(f'/api/reviews/{review.pk}/').status_code, 204)
+        self.assertAggregates(5, 1, '5.0', [0, 0, 0, 0, 1])
+
+    def test_only_the_author_can_change_a_review(self):
+        self.review(self.users[0], 5)
+        review = Review.objects.get()
+        self.client.force_authenticate(self.users[1])
+        self.assertEqual(self.client.delete(f'/api/reviews/{review.pk}/').status_code, 404)
+        self.assertAggregates(5, 1, '5.0')
+
+    def test_invalid_and_duplicate_reviews_leave_aggregates_alone(self):
+        self.assertEqual(self.review(self.users[0], 7).status_code, 400)
+        self.review(self.users[0], 3)
+        self.assertEqual(self.review(self.users[0], 5).status_code, 400)
+        self.assertAggregates(3, 1, '3.0')
+
+    def test_create_does_not_read_existing_reviews_or_save_the_product(self):
+        # Product.save() would re-derive in_stock from stock
+        Product.objects.filter(pk=self.product.pk).update(in_stock=False)
+
+        def queries(user):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.review(user, 4).status_code, 201)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(self.users[0]), queries(self.users[1]))
+        self.assertFalse(Product.objects.get(pk=self.product.pk).in_stock)
+
+    def test_new_review_invalidates_cached_ratings(self):
+        self.client.get(f'/api/products/{self.product.slug}/')
+        self.review(self.users[0], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review(self.users[1], 4)
+        response = self.client.get(f'/api/products/{self.product.slug}/')
+        self.assertEqual(response.data['reviews_count'], 2)
+
+    def test_reconcile_repairs_drift(self):
+        other = create_product(self.category, 2)
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 3, product=other)
+        Product.objects.filter(pk=self.product.pk).update(rating_sum=50, reviews_count=3, rating=4)
+        Product.objects.filter(pk=other.pk).update(rating_1_count=7)
+
+        out = StringIO()
+        call_command('reconcile_ratings', '--dry-run', stdout=out)
+        self.assertIn('Found 2 product', out.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).rating_sum, 50)
+
+        call_command('reconcile_ratings', stdout=StringIO())
+        self.assertAggregates(5, 1, '5.0', [0, 0, 0, 0, 1])
+        other = Product.objects.get(pk=other.pk)
+        self.assertEqual(other.rating, Decimal('3.0'))
+        self.assertEqual(other.rating_histogram, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 0})
+
+
+class ReviewFeedTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Tees')
+        self.product = create_product(self.category, 1)
+        self.other = create_product(self.category, 2)
+        users = User.objects.bulk_create([
+            User(email=f'feed{i}@example.com', username=f'feed{i}') for i in range(30)
+        ])
+        # Same timestamp for every review, so only the id tie-breaker orders them
+        created_at = timezone.now()
+        Review.objects.bulk_create([
+            Review(product=self.product, user=user, rating=1 + i % 5, comment=f'Review {i}')
+            for i, user in enumerate(users)
+        ] + [Review(product=self.other, user=users[0], rating=5, comment='Other')])
+        Review.objects.update(created_at=created_at)
+        self.client = APIClient()
+
+    def test_pages_through_a_products_reviews_newest_first(self):
+        self.client.force_authenticate(User.objects.get(username='feed0'))
+        seen = []
+        url = f'/api/reviews/?product_id={self.product.pk}&cursor='
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(review['id'] for review in response.data['results'])
+            url = response.data['next']
+
+        expected = list(
+            Review.objects.filter(product=self.product).order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(response.data['results'][-1]['user'], 'feed0')
+
+    def test_listing_keeps_page_numbers_and_every_review(self):
+        self.assertEqual(self.client.get('/api/reviews/').status_code, 401)
+        self.client.force_authenticate(User.objects.get(username='feed0'))
+        response = self.client.get('/api/reviews/')
+        self.assertEqual(response.data['count'], 31)
+        response = self.client.get('/api/reviews/', {'product_id': self.product.pk})
+        self.assertEqual(response.data['count'], 30)
+
+    def test_product_detail_includes_histogram_without_extra_queries(self):
+        call_command('reconcile_ratings', stdout=StringIO())
+
+        def detail_queries():
+            get_catalog_cache().clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/api/products/{self.product.slug}/')
+            return response, len(ctx.captured_queries)
+
+        response, with_reviews = detail_queries()
+        self.assertEqual(response.data['rating_histogram'], {'1': 6, '2': 6, '3': 6, '4': 6, '5': 6})
+        Review.objects.filter(product=self.product).delete()
+        self.assertEqual(detail_queries()[1], with_reviews)
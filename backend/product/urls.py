@@ -6,7 +6,6 @@ from .views import (
     CategoryViewSet, ProductViewSet, CartViewSet, 
     OrderViewSet, ReviewViewSet
 )
-from .payment_views import create_razorpay_order, verify_payment
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
@@ -17,8 +16,5 @@ router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
     path('', include(router.urls)),
-    
-    # ⭐ Payment endpoints ⭐
-    path('payment/create-order/', create_razorpay_order, name='create-razorpay-order'),
-    path('payment/verify/', verify_payment, name='verify-payment'),
+    # Payment endpoints live in the payment app (/api/payment/)
 ]
\ No newline at end of file
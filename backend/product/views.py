@@ -1,22 +1,30 @@
 # product/views.py - Clean version without logs
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Q, Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
 from django.shortcuts import get_object_or_404
-import uuid
 from django.utils import timezone
-from datetime import timedelta
 
 
 
 from .models import (
-    Category, Product, Cart, CartItem, Order, OrderItem, Review
+    Category, Product, ProductCard, ProductImage, Cart, CartItem, Order, Review
 )
+from .cache import cache_catalog_response
+from .pagination import KeysetPaginationMixin
+from .ratings import apply_review_change
+from .cart_operations import CartOperationError, apply_cart_operations
+from .checkout import load_cart_items, place_order, shipping_details
+from .idempotency import idempotent
+from .search import search_products
+from .stock import InsufficientStock, restore_stock
 from .serializers import (
-    CategorySerializer, ProductListSerializer, ProductDetailSerializer,
-    CartSerializer,
+    CategorySerializer, ProductCardSerializer, ProductDetailSerializer,
+    CartSerializer, CartDeltaSerializer,
     OrderSerializer, ReviewSerializer
 )
 
@@ -28,6 +36,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     lookup_field = 'slug'
     
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         """Override list to add error handling"""
         try:
@@ -40,21 +49,25 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProductViewSet(KeysetPaginationMixin, viewsets.ReadOnlyModelViewSet):
     """Product listing and detail views"""
-    queryset = Product.objects.filter(is_active=True).prefetch_related(
-        'images', 'colors', 'sizes', 'specifications', 'material', 'category'
-    )
+    queryset = Product.objects.filter(is_active=True).select_related(
+        'category'
+    ).with_images().prefetch_related('colors', 'sizes')
     permission_classes = [AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description', 'category__name']
+    # `search` is handled by the full-text index in get_queryset
+    filter_backends = [filters.OrderingFilter]
     ordering_fields = ['price', 'rating', 'created_at']
 
     def get_serializer_class(self):
-        if self.action == 'retrieve':
-            return ProductDetailSerializer
-        return ProductListSerializer
+        if self.action == 'list':
+            return ProductCardSerializer
+        return ProductDetailSerializer
 
     def get_object(self):
         """Support both ID and slug lookup"""
@@ -72,22 +85,26 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         """Filter products based on query parameters"""
-        queryset = super().get_queryset()
+        if self.action == 'list':
+            # One denormalized row per product (see product/cards.py)
+            queryset = ProductCard.objects.all()
+            category_slug, category_name = 'category_slug', 'category_name'
+        else:
+            queryset = super().get_queryset().select_related('material').prefetch_related(
+                'specifications'
+            )
+            category_slug, category_name = 'category__slug', 'category__name'
         
-        # Multi-word search
+        # Full-text search, best match first (see product/search.py)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(category__name__icontains=search)
-            )
+            queryset = search_products(queryset, search)
         
         # Filter by category
         category = self.request.query_params.get('category', None)
         if category and category.lower() != 'all':
             queryset = queryset.filter(
-                Q(category__slug=category) | Q(category__name__iexact=category)
+                Q(**{category_slug: category}) | Q(**{f'{category_name}__iexact': category})
             )
         
         # Filter by in_stock
@@ -105,6 +122,11 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
 
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         """Override list with error handling"""
         try:
@@ -117,6 +139,9 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
 
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
+        except APIException:
+            # e.g. an invalid cursor; let DRF render the proper status
+            raise
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -142,15 +167,44 @@ class CartViewSet(viewsets.ModelViewSet):
                 request.session.create()
                 session_key = request.session.session_key
             
-            cart, created = Cart.objects.get_or_create(session_key=session_key)
+            cart, created = Cart.objects.get_or_create(session_id=session_key, user=None)
             return cart
     
+    def load_for_response(self, cart):
+        """Re-read the cart with SQL totals and CartSerializer's prefetch plan"""
+        return Cart.objects.with_totals().for_serialization().get(pk=cart.pk)
+    
+    def mutation_response(self, cart, message, item=None, removed_item_ids=(),
+                          status_code=status.HTTP_200_OK, items=None, **extra):
+        """Full cart by default; ``?response=delta`` returns only the change and totals"""
+        if self.request.query_params.get('response') == 'delta':
+            totals = cart.summary()
+            delta = {
+                'removed_item_ids': list(removed_item_ids),
+                'total_price': totals['total_price'],
+                'total_items': totals['total_items'],
+                'version': cart.version,
+            }
+            if items is not None:
+                delta['items'] = items
+            else:
+                delta['item'] = item
+            data = CartDeltaSerializer(delta).data
+            return Response({'message': message, **extra, **data}, status=status_code)
+        
+        serializer = self.get_serializer(self.load_for_response(cart))
+        return Response({
+            'message': message,
+            **extra,
+            'cart': serializer.data
+        }, status=status_code)
+    
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def current(self, request):
         """Get current cart"""
         try:
             cart = self.get_cart(request)
-            serializer = self.get_serializer(cart)
+            serializer = self.get_serializer(self.load_for_response(cart))
             return Response(serializer.data)
         except Exception as e:
             return Response(
@@ -159,8 +213,9 @@ class CartViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @idempotent
     def add_item(self, request):
-        """Add item to cart with duplicate prevention"""
+        """Add item to cart; send an Idempotency-Key to make retries safe"""
         try:
             product_id = request.data.get('product_id')
             quantity = int(request.data.get('quantity', 1))
@@ -190,14 +245,6 @@ class CartViewSet(viewsets.ModelViewSet):
             ).first()
             
             if cart_item:
-                time_since_update = timezone.now() - cart_item.updated_at
-                if time_since_update < timedelta(seconds=2):
-                    serializer = self.get_serializer(cart)
-                    return Response({
-                        'message': 'Item already in cart',
-                        'cart': serializer.data
-                    }, status=status.HTTP_200_OK)
-                
                 new_quantity = cart_item.quantity + quantity
                 if product.stock < new_quantity:
                     return Response(
@@ -214,12 +261,12 @@ class CartViewSet(viewsets.ModelViewSet):
                     selected_color=selected_color,
                     selected_size=selected_size
                 )
+            cart.bump_version()
             
-            serializer = self.get_serializer(cart)
-            return Response({
-                'message': 'Item added to cart successfully',
-                'cart': serializer.data
-            }, status=status.HTTP_201_CREATED)
+            return self.mutation_response(
+                cart, 'Item added to cart successfully', item=cart_item,
+                status_code=status.HTTP_201_CREATED
+            )
             
         except ValueError as e:
             return Response(
@@ -233,6 +280,7 @@ class CartViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['patch'], permission_classes=[AllowAny])
+    @idempotent
     def update_item(self, request):
         """Update cart item quantity"""
         try:
@@ -263,12 +311,9 @@ class CartViewSet(viewsets.ModelViewSet):
             
             cart_item.quantity = quantity
             cart_item.save()
+            cart.bump_version()
             
-            serializer = self.get_serializer(cart)
-            return Response({
-                'message': 'Cart updated successfully',
-                'cart': serializer.data
-            })
+            return self.mutation_response(cart, 'Cart updated successfully', item=cart_item)
             
         except ValueError:
             return Response(
@@ -282,6 +327,7 @@ class CartViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['delete'], permission_classes=[AllowAny])
+    @idempotent
     def remove_item(self, request):
         """Remove item from cart"""
         try:
@@ -297,18 +343,18 @@ class CartViewSet(viewsets.ModelViewSet):
             
             try:
                 cart_item = cart.items.get(id=item_id)
+                removed_id = cart_item.id
                 cart_item.delete()
             except CartItem.DoesNotExist:
                 return Response(
                     {'error': 'Cart item not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            cart.bump_version()
             
-            serializer = self.get_serializer(cart)
-            return Response({
-                'message': 'Item removed from cart',
-                'cart': serializer.data
-            })
+            return self.mutation_response(
+                cart, 'Item removed from cart', removed_item_ids=[removed_id]
+            )
             
         except Exception as e:
             return Response(
@@ -317,36 +363,61 @@ class CartViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['delete'], permission_classes=[AllowAny])
+    @idempotent
     def clear(self, request):
         """Clear all items from cart"""
         try:
             cart = self.get_cart(request)
-            items_count = cart.items.count()
+            removed_ids = list(cart.items.values_list('id', flat=True))
             cart.items.all().delete()
+            cart.bump_version()
             
-            serializer = self.get_serializer(cart)
-            return Response({
-                'message': f'Cart cleared successfully. Removed {items_count} items.',
-                'cart': serializer.data
-            })
+            return self.mutation_response(
+                cart, f'Cart cleared successfully. Removed {len(removed_ids)} items.',
+                removed_item_ids=removed_ids
+            )
             
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @idempotent
+    def batch(self, request):
+        """Apply a list of add/update/remove operations in one transaction"""
+        try:
+            cart = self.get_cart(request)
+            result = apply_cart_operations(cart, request.data.get('operations'))
+        except CartOperationError as e:
+            return Response(
+                {'error': e.message, 'operation': e.index},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return self.mutation_response(
+            cart, 'Cart updated successfully',
+            items=result['items'], removed_item_ids=result['removed_item_ids']
+        )
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """Order management with refund workflow"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # OrderItemSerializer picks each line's primary image from this prefetch
         return Order.objects.filter(user=self.request.user).prefetch_related(
             'items',
             'items__product',
-            'items__product__images'
+            Prefetch('items__product__images', queryset=ProductImage.objects.order_by('order', 'id'))
         )
     
     def get_serializer_context(self):
@@ -354,46 +425,27 @@ class OrderViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
     
+    @idempotent
     def create(self, request):
         """Create a new order from cart"""
-        cart = Cart.objects.filter(user=request.user).first()
+        items = load_cart_items(request.user)
         
-        if not cart or not cart.items.exists():
+        if not items:
             return Response(
                 {'error': 'Cart is empty'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
-
-        order = Order.objects.create(
-            user=request.user,
-            order_number=order_number,
-            total_amount=cart.total_price,
-            shipping_name=request.data.get('shipping_name'),
-            shipping_email=request.data.get('shipping_email'),
-            shipping_phone=request.data.get('shipping_phone'),
-            shipping_address=request.data.get('shipping_address'),
-            shipping_city=request.data.get('shipping_city'),
-            shipping_state=request.data.get('shipping_state'),
-            shipping_zip_code=request.data.get('shipping_zip_code'),
-            shipping_country=request.data.get('shipping_country', 'India')
-        )
-
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                product_name=cart_item.product.name,
-                product_price=cart_item.product.price,
-                quantity=cart_item.quantity,
-                selected_color=cart_item.selected_color,
-                selected_size=cart_item.selected_size
+        try:
+            order = place_order(request.user, items, shipping_details(request.data))
+        except InsufficientStock:
+            return Response(
+                {'error': 'Some items in your cart are out of stock or have insufficient quantity'},
+                status=status.HTTP_409_CONFLICT
             )
 
-        cart.items.all().delete()
-
-        serializer = self.get_serializer(order)
+        # Re-read with the line and image prefetch so lines cost no queries each
+        serializer = self.get_serializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'])
@@ -428,13 +480,23 @@ class OrderViewSet(viewsets.ModelViewSet):
             # If not paid, just cancel
             message = 'Order cancelled successfully.'
         
-        order.save()
-        
-        # Restore stock
-        for item in order.items.all():
-            if item.product:
-                item.product.stock += item.quantity
-                item.product.save()
+        with transaction.atomic():
+            # Claim the cancellation so a concurrent cancel can't restore stock twice
+            claimed = Order.objects.filter(pk=order.pk).exclude(status='cancelled').update(
+                status='cancelled'
+            )
+            if not claimed:
+                return Response(
+                    {'error': 'Order is already cancelled'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            order.save()
+
+            # Restore stock
+            restore_stock(
+                (item.product_id, item.quantity)
+                for item in order.items.all() if item.product_id
+            )
         
         serializer = self.get_serializer(order)
         return Response({
@@ -442,6 +504,44 @@ class OrderViewSet(viewsets.ModelViewSet):
             'order': serializer.data
         })
     
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def reorder(self, request, pk=None):
+        """Put this order's items back in the cart in a single batch"""
+        order = self.get_object()
+        operations = [
+            {
+                'op': 'add',
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'selected_color': item.selected_color,
+                'selected_size': item.selected_size
+            }
+            for item in order.items.all() if item.product_id
+        ]
+        if not operations:
+            return Response(
+                {'error': 'None of the products in this order are available anymore'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        cart, created = Cart.objects.get_or_create(user=request.user)
+        try:
+            result = apply_cart_operations(cart, operations, skip_unavailable=True)
+        except CartOperationError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if result['skipped_product_ids']:
+            message = 'Some items are out of stock and were not added to your cart.'
+        else:
+            message = 'All items added to your cart.'
+        cart = Cart.objects.with_totals().for_serialization().get(pk=cart.pk)
+        return Response({
+            'message': message,
+            'skipped_product_ids': result['skipped_product_ids'],
+            'cart': CartSerializer(cart, context=self.get_serializer_context()).data
+        })
+    
     @action(detail=True, methods=['post'])
     def refund(self, request, pk=None):
         """Request refund for a delivered/shipped order"""
@@ -494,48 +594,70 @@ class OrderViewSet(viewsets.ModelViewSet):
         })
     
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """Product reviews"""
+class ReviewViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
+    """Product reviews; ?product_id= lists a product's reviews newest first.
+
+    ``?cursor=`` switches to keyset pages, so a bestseller's feed needs no
+    COUNT(*) or OFFSET.
+    """
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = []
 
     def get_queryset(self):
+        queryset = Review.objects.select_related('user')
+        if self.action in ['update', 'partial_update', 'destroy']:
+            # Reviews can only be changed by their author
+            return queryset.filter(user=self.request.user)
         product_id = self.request.query_params.get('product_id')
         if product_id:
-            return Review.objects.filter(product_id=product_id)
-        return Review.objects.all()
+            return queryset.filter(product_id=product_id)
+        return queryset
 
     def create(self, request):
         """Create a review for a product"""
         product_id = request.data.get('product_id')
         
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        if not Product.objects.filter(id=product_id).exists():
             return Response(
                 {'error': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if Review.objects.filter(user=request.user, product=product).exists():
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if Review.objects.filter(user=request.user, product_id=product_id).exists():
             return Response(
                 {'error': 'You have already reviewed this product'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        review = Review.objects.create(
-            user=request.user,
-            product=product,
-            rating=request.data.get('rating'),
-            comment=request.data.get('comment', '')
-        )
+        try:
+            with transaction.atomic():
+                review = serializer.save(user=request.user, product_id=product_id)
+                apply_review_change(product_id, added=review.rating)
+        except IntegrityError:
+            # A concurrent request from the same user got there first
+            return Response(
+                {'error': 'You have already reviewed this product'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        avg_rating = Review.objects.filter(product=product).aggregate(
-            Avg('rating')
-        )['rating__avg']
-        product.rating = round(avg_rating, 1)
-        product.reviews_count = Review.objects.filter(product=product).count()
-        product.save()
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old_rating = Review.objects.select_for_update().values_list(
+                'rating', flat=True
+            ).get(pk=serializer.instance.pk)
+            review = serializer.save()
+            if review.rating != old_rating:
+                apply_review_change(review.product_id, added=review.rating, removed=old_rating)
 
-        serializer = self.get_serializer(review)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = Review.objects.filter(pk=instance.pk).delete()
+            # Only the request that actually deleted the row adjusts the totals
+            if deleted:
+                apply_review_change(instance.product_id, removed=instance.rating)